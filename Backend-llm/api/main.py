@@ -1,18 +1,84 @@
 # Backend-llm/api/main.py
-from datetime import datetime, timezone
-from fastapi import FastAPI, HTTPException, Body, Path
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Dict, Optional, Set, TypeVar
+from fastapi import FastAPI, HTTPException, Body, Path, Query, Header, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel
+import asyncio
+import json
 import os
+import time
 
-from api.pydantic_models import QueryResponse, ModelName, SingleModelChatRequest, ModelProvider
-from api.services.openai_service import chat_with_model as openai_chat_with_model
-from api.services.google_gemini_service import chat_with_model as google_chat_with_model
-from api.services.groq_service import chat_with_model as groq_chat_with_model
+try:
+    import orjson
+except ImportError:
+    orjson = None  # Falls back to the standard library encoder
+
+from api.pydantic_models import (
+    QueryResponse, ModelName, SingleModelChatRequest, ModelProvider,
+    ComparisonRequest, ComparisonResponse, AutoModel, BatchChatRequest, JobInfo,
+)
+from api.services.chat_service import (
+    execute_chat, stream_chat, stream_comparison, execute_auto_chat, stream_auto_chat, execute_batch,
+    shortest_timeout, resolve_session_history,
+)
+from api.services.provider_clients import init_provider_clients, close_provider_clients, prewarm_sdks
+from api.services.response_cache import get_response_cache, close_response_cache
+from api.services.single_flight import get_single_flight
+from api.services.similar_question_cache import get_similar_question_cache
+from api.services.conversation_summary import close_conversation_summarizer
+from api.services.rate_limiter import get_rate_limiter
+from api.services.hedging import get_hedger
+from api.services.circuit_breaker import get_circuit_breakers
+from api.services.model_router import get_model_router
+from api.services.metrics import get_metrics
+from api.services.job_queue import get_job_queue, close_job_queue
+from api.services.cassette import get_cassette, close_cassette
+from api.services.fair_scheduler import ANONYMOUS_USER, Requester, get_fair_scheduler
+from api.services.session_store import StaleHistoryError, get_session_store, close_session_store
+
+# --- Lifespan Context Manager ---
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Handles startup and shutdown events for the application.
+    Creates the pooled provider clients on startup and closes them on shutdown.
+    Provider SDKs are imported in the background after startup rather than
+    before the app can serve.
+    """
+    clients = init_provider_clients()
+    prewarm = None
+    if os.getenv("PROVIDER_SDK_PREWARM", "true").lower() != "false":
+        prewarm = asyncio.create_task(prewarm_sdks())
+    print(
+        f"Provider client pools ready (openai max={clients.openai_settings.max_connections}, "
+        f"groq max={clients.groq_settings.max_connections}).")
+    if get_response_cache() is not None:
+        print(f"Response cache enabled: {get_response_cache().stats()}")
+    if get_cassette() is not None:
+        print(f"Provider cassette in {get_cassette().mode} mode: {get_cassette().path}")
+    resumed = await get_job_queue().start()
+    if resumed:
+        print(f"Resumed {resumed} interrupted jobs.")
+    yield
+    if prewarm is not None:
+        prewarm.cancel()
+    await close_job_queue()
+    await close_conversation_summarizer()
+    await close_provider_clients()
+    close_response_cache()
+    close_cassette()
+    close_session_store()
+    print("Provider client pools closed.")
 
 app = FastAPI(
     title="TellMeMore LLM Models API",
     description="API with separate endpoints for querying different LLM providers with chat history support.",
     version="0.1",
+    lifespan=lifespan,
 )
 
 # --- CORS Configuration ---
@@ -27,14 +93,226 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# --- Helpers ---
+
+
+def dumps_json(data: Any) -> str:
+    """Serializes ``data`` with orjson when it is installed, else the standard library."""
+    if orjson is not None:
+        return orjson.dumps(data).decode()
+    return json.dumps(data)
+
+
+def format_sse_event(event: str, data: Dict[str, Any]) -> str:
+    """Formats one Server-Sent Events frame with a JSON payload."""
+    return f"event: {event}\ndata: {dumps_json(data)}\n\n"
+
+
+QUERY_RESPONSE_FIELDS = frozenset(QueryResponse.model_fields)
+# Provider payloads roughly double the response size and are not used by the BFF
+DEFAULT_RESPONSE_FIELDS = QUERY_RESPONSE_FIELDS - {"raw_response"}
+
+
+def response_fields(
+    fields: Optional[str] = Query(
+        None, description="Comma-separated QueryResponse fields to return, or 'all'. "
+                          "Defaults to every field except raw_response."),
+    x_response_fields: Optional[str] = Header(None, description="Same as the 'fields' query parameter."),
+) -> Set[str]:
+    """Resolves the ``QueryResponse`` fields a caller asked for."""
+    requested = fields or x_response_fields
+    if not requested:
+        return set(DEFAULT_RESPONSE_FIELDS)
+    names = {name.strip() for name in requested.split(",") if name.strip()}
+    if "all" in names or "*" in names:
+        return set(QUERY_RESPONSE_FIELDS)
+    unknown = names - QUERY_RESPONSE_FIELDS
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown response fields: {', '.join(sorted(unknown))}.")
+    return names
+
+
+def model_response(model: BaseModel, include: Any = None) -> Response:
+    """
+    Serializes a response model in one pass with pydantic's serializer.
+
+    Returning a ready ``Response`` skips FastAPI's re-validation and
+    ``jsonable_encoder`` pass over the model, which dominate serialization CPU.
+    """
+    return Response(content=model.model_dump_json(include=include), media_type="application/json")
+
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",  # Disable proxy buffering so deltas flush immediately
+}
+
+# Non-standard status (as used by nginx) for a request whose client went away; never actually received
+CLIENT_CLOSED_REQUEST = 499
+
+T = TypeVar("T")
+
+
+def request_timeout(
+    x_request_timeout: Optional[float] = Header(
+        None, gt=0, description="Seconds this request may take before it is abandoned"),
+    x_request_deadline: Optional[float] = Header(
+        None, description="Absolute deadline as a Unix timestamp in seconds, e.g. forwarded by the BFF"),
+) -> Optional[float]:
+    """Resolves the caller's deadline headers into the seconds this request may still take."""
+    remaining = x_request_deadline - time.time() if x_request_deadline is not None else None
+    return shortest_timeout(x_request_timeout, remaining)
+
+
+def request_requester(
+    x_user_id: Optional[str] = Header(
+        None, description="End user the request is made for, as forwarded by the BFF"),
+    x_user_tier: Optional[str] = Header(
+        None, description="The user's tier, which sets their weight in the fair scheduler. "
+                          "Ignored unless FAIR_SCHEDULER_TRUST_TIER_HEADER is set; the BFF must "
+                          "then set or strip it on every request."),
+) -> Requester:
+    """Resolves who a request is queued for by the fair scheduler."""
+    scheduler = get_fair_scheduler()
+    if scheduler is None:
+        return Requester(user_id=x_user_id or ANONYMOUS_USER)
+    return scheduler.requester(x_user_id, x_user_tier)
+
+
+async def until_disconnected(request: Request, call: Awaitable[T]) -> T:
+    """
+    Awaits ``call``, cancelling it if the client disconnects first.
+
+    Cancelling the call cancels its provider request, so rate-limit and
+    connection capacity go to requests that still have someone waiting.
+    """
+    task = asyncio.ensure_future(call)
+
+    async def watch():
+        while (await request.receive())["type"] != "http.disconnect":
+            pass
+        task.cancel()
+
+    watcher = asyncio.create_task(watch())
+    try:
+        return await task
+    except asyncio.CancelledError:
+        if not watcher.done():
+            raise  # This handler was cancelled, not the client
+        raise HTTPException(status_code=CLIENT_CLOSED_REQUEST, detail="Client closed the request.")
+    finally:
+        watcher.cancel()
+        task.cancel()
+
+
+# Per-model timeout for /compare when the request does not set one
+COMPARE_TIMEOUT_SECONDS = float(os.getenv("COMPARE_TIMEOUT_SECONDS", "120"))
+
+# Requests in flight per batch when the request does not set a concurrency
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
+
+# Longest a GET /jobs/{job_id} long-poll may wait, kept under typical proxy timeouts
+JOB_MAX_WAIT_SECONDS = float(os.getenv("JOB_MAX_WAIT_SECONDS", "50"))
+
+
+@app.exception_handler(StaleHistoryError)
+async def stale_history_handler(request: Request, exc: StaleHistoryError):
+    """Answers 409 so the client resends its full ``chat_history`` without ``history_version``."""
+    return JSONResponse(status_code=409, content={
+        "detail": str(exc), "session_id": exc.session_id, "history_version": exc.current_version})
+
+
+# --- Metrics Endpoint ---
+
+
+@app.get("/metrics", tags=["Metrics"])
+async def prometheus_metrics():
+    """Serves request, error, token, latency and in-flight metrics in the Prometheus text format."""
+    metrics = get_metrics()
+    if metrics is None:
+        raise HTTPException(status_code=404, detail="Metrics are disabled.")
+    body, content_type = metrics.render()
+    return Response(content=body, media_type=content_type)
+
+
+# --- Cache Endpoint ---
+
+
+@app.get("/cache/stats", tags=["Cache"])
+async def response_cache_stats():
+    """Returns response cache, similar question cache and in-flight request coalescing counters."""
+    cache = get_response_cache()
+    similar_cache = get_similar_question_cache()
+    single_flight = get_single_flight()
+    stats = {"enabled": False} if cache is None else {"enabled": True, **cache.stats()}
+    stats["similar_questions"] = (
+        {"enabled": True, **similar_cache.stats()} if similar_cache else {"enabled": False})
+    stats["single_flight"] = single_flight.stats() if single_flight else {"enabled": False}
+    return stats
+
+
+# --- Session Store Endpoint ---
+
+
+@app.get("/sessions/stats", tags=["Sessions"])
+async def session_store_stats():
+    """Returns stored session counts and history hit, miss, resync and conflict counters."""
+    store = get_session_store()
+    return {"enabled": False} if store is None else {"enabled": True, **store.stats()}
+
+
+# --- Rate Limit Endpoint ---
+
+
+@app.get("/rate_limits", tags=["Rate Limits"])
+async def rate_limit_stats():
+    """Returns per-provider queue depth and wait times, with a per-model breakdown."""
+    rate_limiter = get_rate_limiter()
+    return {"enabled": False} if rate_limiter is None else {"enabled": True, **rate_limiter.stats()}
+
+
+# --- Fair Scheduler Endpoint ---
+
+
+@app.get("/scheduler/stats", tags=["Rate Limits"])
+async def fair_scheduler_stats():
+    """Returns per-provider slots in use, queue depth and queue waits by user tier."""
+    scheduler = get_fair_scheduler()
+    return {"enabled": False} if scheduler is None else {"enabled": True, **scheduler.stats()}
+
+
+# --- Hedging Endpoint ---
+
+
+@app.get("/hedging/stats", tags=["Hedging"])
+async def hedging_stats():
+    """Returns hedge counts, hedge wins and the current hedge delay per model."""
+    hedger = get_hedger()
+    return {"enabled": False} if hedger is None else {"enabled": True, **hedger.stats()}
+
+
+# --- Provider Health Endpoint ---
+
+
+@app.get("/circuit_breakers", tags=["Provider Health"])
+async def circuit_breaker_stats():
+    """Returns each provider's breaker state, recent error and slow-call rates, and failover counts."""
+    breakers = get_circuit_breakers()
+    return {"enabled": False} if breakers is None else {"enabled": True, **breakers.stats()}
+
+
 # --- OpenAI Endpoint ---
 
 
 @app.post("/chat/openai/{model_name}", response_model=QueryResponse, tags=["OpenAI Chat"])
 async def chat_with_openai_model(
+    request: Request,
     model_name: ModelName = Path(
         ..., description="The OpenAI model to use for the chat. Supported: gpt-5, gpt-5-mini, gpt-nano"),
-    request_body: SingleModelChatRequest = Body(...)
+    request_body: SingleModelChatRequest = Body(...),
+    fields: Set[str] = Depends(response_fields),
+    timeout: Optional[float] = Depends(request_timeout),
+    requester: Requester = Depends(request_requester),
 ):
     if model_name.get_provider() != ModelProvider.OPENAI:
         raise HTTPException(
@@ -42,41 +320,21 @@ async def chat_with_openai_model(
             detail=f"Model {model_name.value} is not an OpenAI model."
         )
 
-    # Build messages array: system_prompts + chat_history + current question
-    messages = request_body.chat_history or []
-
-    # Prepend system prompts if provided
-    if request_body.system_prompts:
-        for prompt in request_body.system_prompts:
-            messages.insert(0, {"role": "system", "content": prompt})
-
-    messages.append({"role": "user", "content": request_body.question})
-
-    request_time = datetime.now(timezone.utc)
-    result = openai_chat_with_model(
-        model_name.value, messages, **request_body.extra_params if hasattr(request_body, 'extra_params') else {})
-    response_time = datetime.now(timezone.utc)
-    latency = (response_time - request_time).total_seconds() * 1000
-    return QueryResponse(
-        answer=result.get("answer"),
-        raw_response=result.get("raw"),
-        session_id=request_body.session_id,
-        model=model_name,
-        provider=model_name.get_provider(),
-        error_message=result.get("error"),
-        request_timestamp=request_time,
-        response_timestamp=response_time,
-        latency_ms=latency,
-        usage=result.get("usage"),  # Include token usage
-    )
+    response = await until_disconnected(
+        request, execute_chat(model_name, request_body, timeout=timeout, requester=requester))
+    return model_response(response, fields)
 # --- Google Endpoint ---
 
 
 @app.post("/chat/google/{model_name_path}", response_model=QueryResponse, tags=["Google Chat"])
 async def chat_with_google_model(
+    request: Request,
     model_name_path: ModelName = Path(
         ..., description="The specific Google Gemini model name to use. Supported: gemini-2.5-pro-latest, gemini-2.5-flash-latest, gemini-2.5-lite"),
-    request_body: SingleModelChatRequest = Body(...)
+    request_body: SingleModelChatRequest = Body(...),
+    fields: Set[str] = Depends(response_fields),
+    timeout: Optional[float] = Depends(request_timeout),
+    requester: Requester = Depends(request_requester),
 ):
     if model_name_path.get_provider() != ModelProvider.GOOGLE:
         raise HTTPException(
@@ -84,41 +342,21 @@ async def chat_with_google_model(
             detail=f"Model '{model_name_path.value}' is not a Google model. Supported: gemini-2.5-pro-latest, gemini-2.5-flash-latest, gemini-2.5-lite."
         )
 
-    # Build messages array: system_prompts + chat_history + current question
-    messages = request_body.chat_history or []
-
-    # Prepend system prompts if provided
-    if request_body.system_prompts:
-        for prompt in request_body.system_prompts:
-            messages.insert(0, {"role": "system", "content": prompt})
-
-    messages.append({"role": "user", "content": request_body.question})
-
-    request_time = datetime.now(timezone.utc)
-    result = google_chat_with_model(model_name_path.value, messages, **
-                                    request_body.extra_params if hasattr(request_body, 'extra_params') else {})
-    response_time = datetime.now(timezone.utc)
-    latency = (response_time - request_time).total_seconds() * 1000
-    return QueryResponse(
-        answer=result.get("answer"),
-        raw_response=result.get("raw"),
-        session_id=request_body.session_id,
-        model=model_name_path,
-        provider=model_name_path.get_provider(),
-        error_message=result.get("error"),
-        request_timestamp=request_time,
-        response_timestamp=response_time,
-        latency_ms=latency,
-        usage=result.get("usage"),  # Include token usage
-    )
+    response = await until_disconnected(
+        request, execute_chat(model_name_path, request_body, timeout=timeout, requester=requester))
+    return model_response(response, fields)
 # --- Groq Endpoint ---
 
 
 @app.post("/chat/groq/{model_name_path}", response_model=QueryResponse, tags=["Groq Chat"])
 async def chat_with_groq_model(
+    request: Request,
     model_name_path: ModelName = Path(
         ..., description="The specific Groq LLaMA3 model name to use. Supported: llama-3.3-70b-versatile, llama-3.1-8b-instant"),
-    request_body: SingleModelChatRequest = Body(...)
+    request_body: SingleModelChatRequest = Body(...),
+    fields: Set[str] = Depends(response_fields),
+    timeout: Optional[float] = Depends(request_timeout),
+    requester: Requester = Depends(request_requester),
 ):
     if model_name_path.get_provider() != ModelProvider.GROQ:
         raise HTTPException(
@@ -126,30 +364,310 @@ async def chat_with_groq_model(
             detail=f"Model '{model_name_path.value}' is not a Groq model. Supported: llama-3.3-70b-versatile, llama-3.1-8b-instant."
         )
 
-    # Build messages array: system_prompts + chat_history + current question
-    messages = request_body.chat_history or []
+    response = await until_disconnected(
+        request, execute_chat(model_name_path, request_body, timeout=timeout, requester=requester))
+    return model_response(response, fields)
+# --- Auto Routing Endpoints ---
+
+
+@app.post("/chat/auto/{model_name}", response_model=QueryResponse, tags=["Auto Chat"])
+async def chat_with_auto_model(
+    request: Request,
+    model_name: AutoModel = Path(
+        ..., description="auto (any model), auto-fast or auto-quality"),
+    request_body: SingleModelChatRequest = Body(...),
+    fields: Set[str] = Depends(response_fields),
+    timeout: Optional[float] = Depends(request_timeout),
+    requester: Requester = Depends(request_requester),
+):
+    """
+    Answers with the model that currently has the best recent latency and error rate.
+
+    ``model`` in the response is the concrete model chosen; ``routed_from`` is
+    the pseudo-model requested.
+    """
+    response = await until_disconnected(
+        request, execute_auto_chat(model_name, request_body, timeout=timeout, requester=requester))
+    return model_response(response, fields)
+
+
+@app.post("/chat/auto/{model_name}/stream", tags=["Auto Chat"])
+async def stream_with_auto_model(
+    model_name: AutoModel = Path(
+        ..., description="auto (any model), auto-fast or auto-quality"),
+    request_body: SingleModelChatRequest = Body(...),
+    fields: Set[str] = Depends(response_fields),
+    timeout: Optional[float] = Depends(request_timeout),
+    requester: Requester = Depends(request_requester),
+):
+    """Streams from the model with the best recent time to first token, as Server-Sent Events."""
+    request_body = resolve_session_history(request_body)  # A stale history fails before streaming starts
+    return StreamingResponse(
+        stream_chat_events(
+            stream_auto_chat(model_name, request_body, timeout=timeout, requester=requester), fields),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
+
+
+@app.get("/routing/stats", tags=["Auto Chat"])
+async def routing_stats():
+    """Returns the rolling per-model latency percentiles and error rates used by ``auto`` routing."""
+    return get_model_router().stats()
+# --- Streaming Endpoint ---
+
+
+async def stream_chat_events(events: AsyncIterator[Dict[str, Any]], fields: Set[str]) -> AsyncIterator[str]:
+    """
+    Streams provider deltas as SSE ``delta`` events, then one ``done`` event.
+
+    The ``done`` event carries the full ``QueryResponse`` (usage, latency and
+    time-to-first-token) so clients get the same metadata as the non-streaming routes.
+    """
+    async for event in events:
+        if event["type"] == "delta":
+            yield format_sse_event("delta", {"content": event["delta"]})
+        else:
+            yield format_sse_event("done", event["response"].model_dump(mode="json", include=fields))
+
+
+@app.post("/chat/{provider}/{model_name}/stream", tags=["Streaming Chat"])
+async def stream_chat_with_model(
+    provider: ModelProvider = Path(
+        ..., description="The provider serving the model: openai, google or groq"),
+    model_name: ModelName = Path(
+        ..., description="The model to stream from. Must belong to the given provider."),
+    request_body: SingleModelChatRequest = Body(...),
+    fields: Set[str] = Depends(response_fields),
+    timeout: Optional[float] = Depends(request_timeout),
+    requester: Requester = Depends(request_requester),
+):
+    """
+    Streams a chat completion as Server-Sent Events.
+
+    Emits ``event: delta`` frames (``{"content": "..."}``) as the provider
+    generates text, followed by a single ``event: done`` frame whose data is a
+    ``QueryResponse`` including ``time_to_first_token_ms``.
+    """
+    if model_name.get_provider() != provider:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Model '{model_name.value}' is not a {provider.value} model."
+        )
+    request_body = resolve_session_history(request_body)  # A stale history fails before streaming starts
+
+    return StreamingResponse(
+        stream_chat_events(
+            stream_chat(model_name, request_body, timeout=timeout, requester=requester), fields),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
+# --- Batch Endpoint ---
+
+
+async def batch_events(
+    model_name: ModelName, request_body: BatchChatRequest, fields: Set[str],
+    requester: Optional[Requester] = None,
+) -> AsyncIterator[str]:
+    """
+    Formats batch results as NDJSON lines in completion order.
+
+    Each ``result`` line carries the request's original ``index`` and its
+    ``QueryResponse``; a final ``end`` line reports the totals.
+    """
+    errors = 0
+    async for index, response in execute_batch(
+            model_name, request_body.requests,
+            concurrency=request_body.concurrency or BATCH_CONCURRENCY,
+            timeout=request_body.timeout_seconds, requester=requester):
+        errors += response.error_message is not None
+        yield dumps_json({"event": "result", "index": index,
+                          "response": response.model_dump(mode="json", include=fields)}) + "\n"
+    yield dumps_json({"event": "end", "model": model_name.value,
+                      "count": len(request_body.requests), "errors": errors}) + "\n"
+
+
+@app.post("/chat/{provider}/{model_name}/batch", tags=["Batch Chat"])
+async def batch_chat_with_model(
+    provider: ModelProvider = Path(
+        ..., description="The provider serving the model: openai, google or groq"),
+    model_name: ModelName = Path(
+        ..., description="The model that answers every request. Must belong to the given provider."),
+    request_body: BatchChatRequest = Body(...),
+    fields: Set[str] = Depends(response_fields),
+    requester: Requester = Depends(request_requester),
+):
+    """
+    Runs many chat requests against one model and streams results as NDJSON.
+
+    Requests run with bounded concurrency under the model's rate limits.
+    Results are written as they complete, each tagged with its index in
+    ``requests``, so callers can match them up regardless of order.
+    """
+    if model_name.get_provider() != provider:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Model '{model_name.value}' is not a {provider.value} model."
+        )
+
+    return StreamingResponse(
+        batch_events(model_name, request_body, fields, requester),
+        media_type="application/x-ndjson",
+        headers=SSE_HEADERS,
+    )
+# --- Job Endpoints ---
+
+
+def job_response(job: Optional[JobInfo], fields: Set[str], status_code: int = 200) -> Response:
+    """Serializes a job, shaping its ``response`` like the chat endpoints do."""
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or its result has expired.")
+    include = {name: True for name in JobInfo.model_fields} | {"response": fields}
+    response = model_response(job, include)
+    response.status_code = status_code
+    return response
+
+
+@app.post("/chat/{provider}/{model_name}/jobs", response_model=JobInfo, status_code=202, tags=["Jobs"])
+async def submit_chat_job(
+    provider: ModelProvider = Path(
+        ..., description="The provider serving the model: openai, google or groq"),
+    model_name: ModelName = Path(
+        ..., description="The model that answers the request. Must belong to the given provider."),
+    request_body: SingleModelChatRequest = Body(...),
+    fields: Set[str] = Depends(response_fields),
+):
+    """
+    Queues a chat request and returns its job id immediately.
+
+    Use this for generations that may outlast a proxy or Cloud Run timeout;
+    fetch the result with ``GET /jobs/{job_id}``.
+    """
+    if model_name.get_provider() != provider:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Model '{model_name.value}' is not a {provider.value} model."
+        )
+    request_body = resolve_session_history(request_body)  # The job keeps the history it was asked with
+    return job_response(await get_job_queue().submit(model_name, request_body), fields, status_code=202)
+
+
+@app.get("/jobs/stats", tags=["Jobs"])
+async def job_stats():
+    return await get_job_queue().stats()
+
+
+@app.get("/jobs/{job_id}", response_model=JobInfo, tags=["Jobs"])
+async def get_chat_job(
+    job_id: str,
+    wait: float = Query(
+        0, ge=0, description="Seconds to wait for the job to finish before answering (long-poll)"),
+    fields: Set[str] = Depends(response_fields),
+):
+    """
+    Returns a job's status, and its response once completed.
+
+    With ``wait`` the request is held until the job finishes or the wait
+    (capped at JOB_MAX_WAIT_SECONDS) runs out. Returns 404 for unknown jobs
+    and for finished jobs whose result has expired.
+    """
+    job = await get_job_queue().wait(job_id, min(wait, JOB_MAX_WAIT_SECONDS))
+    return job_response(job, fields)
+
+
+@app.delete("/jobs/{job_id}", response_model=JobInfo, tags=["Jobs"])
+async def cancel_chat_job(job_id: str, fields: Set[str] = Depends(response_fields)):
+    """Cancels a queued or running job. A job that already finished is returned unchanged."""
+    return job_response(await get_job_queue().cancel(job_id), fields)
+
 
-    # Prepend system prompts if provided
-    if request_body.system_prompts:
-        for prompt in request_body.system_prompts:
-            messages.insert(0, {"role": "system", "content": prompt})
+# --- Comparison Endpoint ---
 
-    messages.append({"role": "user", "content": request_body.question})
 
-    request_time = datetime.now(timezone.utc)
-    result = groq_chat_with_model(model_name_path.value, messages, **
-                                  request_body.extra_params if hasattr(request_body, 'extra_params') else {})
-    response_time = datetime.now(timezone.utc)
-    latency = (response_time - request_time).total_seconds() * 1000
-    return QueryResponse(
-        answer=result.get("answer"),
-        raw_response=result.get("raw"),
+@app.post("/compare", response_model=ComparisonResponse, tags=["Comparison"])
+async def compare_models(
+    request: Request,
+    request_body: ComparisonRequest = Body(...),
+    fields: Set[str] = Depends(response_fields),
+    time_left: Optional[float] = Depends(request_timeout),
+    requester: Requester = Depends(request_requester),
+):
+    """
+    Asks every requested model the same question concurrently.
+
+    Each model runs under its own timeout, so the wall-clock time is that of
+    the slowest model rather than the sum. A model that fails or times out is
+    returned as a ``QueryResponse`` with ``error_message`` set; the other
+    responses are unaffected.
+    """
+    timeout = shortest_timeout(request_body.timeout_seconds or COMPARE_TIMEOUT_SECONDS, time_left)
+    models = list(dict.fromkeys(request_body.models))  # De-duplicate, keep order
+    request_body = resolve_session_history(request_body)
+
+    responses = await until_disconnected(request, asyncio.gather(*(
+        execute_chat(model_name, request_body, timeout=timeout, save_turn=False, requester=requester)
+        for model_name in models
+    )))
+    comparison = ComparisonResponse(
+        original_question=request_body.question,
         session_id=request_body.session_id,
-        model=model_name_path,
-        provider=model_name_path.get_provider(),
-        error_message=result.get("error"),
-        request_timestamp=request_time,
-        response_timestamp=response_time,
-        latency_ms=latency,
-        usage=result.get("usage"),  # Include token usage
+        responses=list(responses),
+    )
+    include = {name: True for name in ComparisonResponse.model_fields}
+    include["responses"] = {"__all__": fields}
+    return model_response(comparison, include)
+
+
+async def comparison_stream_events(
+    request_body: ComparisonRequest, stream_format: str, fields: Set[str], time_left: Optional[float] = None,
+    requester: Optional[Requester] = None,
+) -> AsyncIterator[str]:
+    """
+    Formats the interleaved multi-model stream as SSE frames or NDJSON lines.
+
+    Event kinds: ``delta`` (``model``, ``content``), ``done`` (``model``,
+    ``response`` as a ``QueryResponse``) per model, and a final ``end``.
+    """
+    timeout = shortest_timeout(request_body.timeout_seconds or COMPARE_TIMEOUT_SECONDS, time_left)
+    models = list(dict.fromkeys(request_body.models))
+
+    def frame(event: str, data: Dict[str, Any]) -> str:
+        if stream_format == "ndjson":
+            return dumps_json({"event": event, **data}) + "\n"
+        return format_sse_event(event, data)
+
+    async for event in stream_comparison(models, request_body, timeout=timeout, requester=requester):
+        if event["type"] == "delta":
+            yield frame("delta", {"model": event["model"].value, "content": event["delta"]})
+        else:
+            yield frame("done", {"model": event["model"].value,
+                                 "response": event["response"].model_dump(mode="json", include=fields)})
+    yield frame("end", {"session_id": request_body.session_id,
+                        "models": [model_name.value for model_name in models]})
+
+
+@app.post("/compare/stream", tags=["Comparison"])
+async def stream_compare_models(
+    request_body: ComparisonRequest = Body(...),
+    stream_format: str = Query(
+        "sse", alias="format", pattern="^(sse|ndjson)$",
+        description="Wire format: 'sse' (text/event-stream) or 'ndjson' (application/x-ndjson)"),
+    fields: Set[str] = Depends(response_fields),
+    time_left: Optional[float] = Depends(request_timeout),
+    requester: Requester = Depends(request_requester),
+):
+    """
+    Streams every requested model over a single connection.
+
+    Deltas from all models are interleaved in arrival order and tagged with
+    the model name, so each UI pane can render as soon as its model produces
+    text. Each model ends with its own ``done`` event carrying the
+    ``QueryResponse`` metadata; ``end`` closes the stream.
+    """
+    media_type = "application/x-ndjson" if stream_format == "ndjson" else "text/event-stream"
+    request_body = resolve_session_history(request_body)  # A stale history fails before streaming starts
+    return StreamingResponse(
+        comparison_stream_events(request_body, stream_format, fields, time_left, requester),
+        media_type=media_type,
+        headers=SSE_HEADERS,
     )
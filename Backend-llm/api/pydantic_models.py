@@ -59,6 +59,22 @@ class ModelName(str, Enum):
             f"Could not determine provider for model: {self.value}")
 
 
+class AutoModel(str, Enum):
+    """
+    Pseudo-models routed to the concrete model with the best recent latency and error rate.
+
+    ``auto`` considers every model; ``auto-fast`` and ``auto-quality`` are limited to a tier.
+    """
+    AUTO = "auto"
+    AUTO_FAST = "auto-fast"
+    AUTO_QUALITY = "auto-quality"
+
+    @property
+    def tier(self) -> Optional[str]:
+        """The tier this pseudo-model is scoped to, or None for every model."""
+        return self.value.split("-", 1)[1] if "-" in self.value else None
+
+
 # Helper model for chat history input in the API
 class ChatMessageAPI(BaseModel):
     role: str = Field(..., examples=["user", "assistant"])
@@ -110,6 +126,15 @@ class SingleModelChatRequest(BaseModel):
         default_factory=list,
         description="List of system prompts to prepend to the chat history for context"
     )
+    timeout_seconds: Optional[float] = Field(
+        default=None, gt=0,
+        description="Deadline for this request in seconds; the provider call is cancelled when it passes"
+    )
+    history_version: Optional[str] = Field(
+        default=None,
+        description="history_version from the session's previous response. Send it with an empty "
+                    "chat_history to use the history stored server-side"
+    )
 
     @field_validator('session_id', mode='before')
     @classmethod
@@ -117,6 +142,67 @@ class SingleModelChatRequest(BaseModel):
         return v or str(uuid.uuid4())
 
 
+class ComparisonRequest(SingleModelChatRequest):
+    """
+    Request body for asking several models the same question at once.
+
+    Inherits question, session_id, chat_history and system_prompts from
+    SingleModelChatRequest; every listed model receives the same context.
+
+    Attributes:
+        models (List[ModelName]): The models to compare (any mix of providers).
+        timeout_seconds (Optional[float]): Per-model timeout. Models that exceed it are
+                                           reported with an error_message instead of failing the batch.
+    """
+    models: List[ModelName] = Field(
+        ..., min_length=1,
+        examples=[["gpt-5-mini", "gemini-2.5-flash", "llama-3.3-70b-versatile"]]
+    )
+    timeout_seconds: Optional[float] = Field(
+        default=None, gt=0,
+        description="Per-model timeout in seconds (defaults to COMPARE_TIMEOUT_SECONDS)"
+    )
+
+
+class BatchChatRequest(BaseModel):
+    """
+    Request body for running many independent chat requests against one model.
+
+    Attributes:
+        requests (List[SingleModelChatRequest]): The chat requests, each with its own question and context.
+        concurrency (Optional[int]): Maximum requests in flight at once (defaults to BATCH_CONCURRENCY).
+        timeout_seconds (Optional[float]): Per-request timeout. Requests that exceed it are
+                                           reported with an error_message; the batch continues.
+    """
+    requests: List[SingleModelChatRequest] = Field(..., min_length=1, max_length=1000)
+    concurrency: Optional[int] = Field(
+        default=None, ge=1, le=64,
+        description="Maximum requests in flight at once (defaults to BATCH_CONCURRENCY)"
+    )
+    timeout_seconds: Optional[float] = Field(
+        default=None, gt=0,
+        description="Per-request timeout in seconds"
+    )
+
+
+class ContextInfo(BaseModel):
+    """
+    Describes how the prompt sent to the provider was assembled.
+
+    Attributes:
+        token_budget (int): The input-token budget applied for the model.
+        prompt_tokens (int): Estimated tokens actually sent (system prompts + kept history + question).
+        dropped_messages (int): Oldest chat history messages left out to fit the budget.
+        dropped_tokens (int): Estimated tokens in the dropped messages.
+        summarized_messages (int): Older history messages replaced by the session's rolling summary.
+    """
+    token_budget: int
+    prompt_tokens: int
+    dropped_messages: int = 0
+    dropped_tokens: int = 0
+    summarized_messages: int = 0
+
+
 class QueryResponse(BaseModel):
     """
     Represents a single response returned by an AI model in a comparison session.
@@ -132,7 +218,17 @@ class QueryResponse(BaseModel):
         request_timestamp (datetime): The timestamp when the query was sent to the model.
         response_timestamp (datetime): The timestamp when the response was received from the model.
         latency_ms (float): The total time taken to receive the model's response, in milliseconds.
+        time_to_first_token_ms (Optional[float]): Time until the first streamed token arrived, in milliseconds
+                                                  (streaming responses only).
         usage (Optional[Any]): Token usage information from the LLM provider (format varies by provider).
+        cached (bool): True when the answer was served from the response cache without a provider call.
+        context (Optional[ContextInfo]): Prompt assembly details, including history dropped to fit the token budget.
+        routed_from (Optional[AutoModel]): The ``auto`` pseudo-model requested, when ``model`` was chosen by routing.
+        served_by (Optional[ModelName]): The model that actually produced the answer, when it differs from ``model``
+                                         (a fallback model after failover, or an equivalent
+                                         model that won a hedged request).
+        history_version (Optional[str]): Version of the session's stored history including this turn, when the
+                                         session store is enabled. Send it as ``history_version`` next turn.
     """
     answer: Optional[str] = None
     raw_response: Optional[Any] = None
@@ -143,11 +239,16 @@ class QueryResponse(BaseModel):
     request_timestamp: datetime
     response_timestamp: datetime
     latency_ms: float
+    time_to_first_token_ms: Optional[float] = None
     usage: Optional[Any] = None  # Token usage info (varies by provider)
+    cached: bool = False
+    context: Optional[ContextInfo] = None
+    routed_from: Optional[AutoModel] = None
+    served_by: Optional[ModelName] = None
+    history_version: Optional[str] = None
 
-    @field_validator('request_timestamp', 'response_timestamp', mode='before')
+    @field_validator('request_timestamp', 'response_timestamp', mode='after')
     @classmethod
-    # Use `any` for `v` if it might be a string from JSON
     def ensure_datetime_is_aware(cls, v: datetime) -> datetime:
         """
         Validates that the datetime field is timezone-aware.
@@ -158,6 +259,42 @@ class QueryResponse(BaseModel):
         return v.astimezone(timezone.utc)
 
 
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    CANCELLED = "cancelled"
+
+    @property
+    def finished(self) -> bool:
+        return self in (JobStatus.COMPLETED, JobStatus.CANCELLED)
+
+
+class JobInfo(BaseModel):
+    """
+    The state of an asynchronous chat job.
+
+    Attributes:
+        job_id (str): Identifier returned on submission, used to poll or cancel the job.
+        status (JobStatus): queued, running, completed or cancelled.
+        model (ModelName): The model the job runs against.
+        created_at (datetime): When the job was submitted.
+        started_at (Optional[datetime]): When a worker picked the job up.
+        finished_at (Optional[datetime]): When the job completed or was cancelled.
+        expires_at (Optional[datetime]): When a finished job's result is discarded.
+        response (Optional[QueryResponse]): The chat response, once the job has completed.
+                                            Provider errors are reported in its error_message.
+    """
+    job_id: str
+    status: JobStatus
+    model: ModelName
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    expires_at: Optional[datetime] = None
+    response: Optional[QueryResponse] = None
+
+
 class ComparisonResponse(BaseModel):
     """
     Represents the collection of responses from multiple language models for a single input query.
@@ -0,0 +1,209 @@
+"""
+Cassette Module
+Record/replay of provider traffic for offline benchmarking on real payloads.
+
+In record mode every provider chat call and stream is passed through to the
+real (or fake) service and written to a gzip-compressed JSON Lines cassette:
+the request messages, the standardized result dict (raw payload included)
+and its latency, or for streams every event with its offset from the start
+of the call.
+
+In replay mode no provider is contacted. Calls are answered from the
+cassette with the recorded timing, optionally scaled. A request is matched
+on a hash of its provider, model, messages and parameters; when nothing
+matches exactly, the model's recordings are served in turn, so synthetic
+load (e.g. ``benchmarks/load_benchmark.py``) still gets realistic payload
+sizes and timing. Use ``CASSETTE_STRICT=true`` to fail on a miss instead.
+
+Configuration (environment variables):
+    CASSETTE_MODE        "record" or "replay" (default off)
+    CASSETTE_PATH        Cassette file (default cassettes/provider_traffic.jsonl.gz)
+    CASSETTE_TIME_SCALE  Replay timing multiplier: 1 is recorded speed, 0 is instant (default 1)
+    CASSETTE_STRICT      "true" to return an error when a replayed request was not recorded
+"""
+
+from collections import defaultdict
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+
+from api.pydantic_models import ModelProvider
+
+RECORD = "record"
+REPLAY = "replay"
+DEFAULT_CASSETTE_PATH = os.path.join("cassettes", "provider_traffic.jsonl.gz")
+
+
+def interaction_key(provider: str, model_name: str, messages: List[Dict[str, str]],
+                    params: Optional[Dict[str, Any]] = None) -> str:
+    """Returns a stable hash of everything sent to the provider."""
+    # Transport settings such as the per-request timeout do not change the answer
+    params = {name: value for name, value in (params or {}).items()
+              if name not in ("request_options", "timeout")}
+    encoded = json.dumps([provider, model_name, messages, params], sort_keys=True,
+                         separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def load_cassette(path: str) -> List[Dict[str, Any]]:
+    """Reads every interaction in a cassette, tolerating a file cut short by a crash."""
+    interactions = []
+    with gzip.open(path, "rt", encoding="utf-8") as file:
+        try:
+            for line in file:
+                if line.strip():
+                    interactions.append(json.loads(line))
+        except (EOFError, json.JSONDecodeError):
+            pass  # The recorder stopped mid-write; keep what was complete
+    return interactions
+
+
+class Cassette:
+    """Records provider calls to, or replays them from, one cassette file."""
+
+    def __init__(self, mode: str, path: str = DEFAULT_CASSETTE_PATH, time_scale: float = 1.0,
+                 strict: bool = False):
+        if mode not in (RECORD, REPLAY):
+            raise ValueError(f"Unknown cassette mode '{mode}'.")
+        self.mode = mode
+        self.path = path
+        self.time_scale = time_scale
+        self.strict = strict
+        self.recorded = 0
+        self.replayed = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._file = None
+        self._by_key: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self._by_model: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self._turns: Dict[str, int] = defaultdict(int)
+        if mode == RECORD:
+            if os.path.dirname(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+            self._file = gzip.open(path, "at", encoding="utf-8")
+        else:
+            for interaction in load_cassette(path):
+                self._by_key[f"{interaction['kind']}:{interaction['key']}"].append(interaction)
+                self._by_model[f"{interaction['kind']}:{interaction['model']}"].append(interaction)
+
+    def chat_function(self, provider: ModelProvider, chat_function: Callable) -> Callable:
+        """Wraps a service ``chat_with_model`` for recording, or replaces it for replay."""
+        async def record(model_name: str, messages: List[Dict[str, str]], **kwargs) -> Dict[str, Any]:
+            started = time.perf_counter()
+            result = await chat_function(model_name, messages, **kwargs)
+            self._write({"kind": "chat", "provider": provider.value, "model": model_name,
+                         "key": interaction_key(provider.value, model_name, messages, kwargs),
+                         "messages": messages, "latency_s": time.perf_counter() - started,
+                         "result": result})
+            return result
+
+        async def replay(model_name: str, messages: List[Dict[str, str]], **kwargs) -> Dict[str, Any]:
+            interaction = self._find("chat", provider, model_name, messages, kwargs)
+            if interaction is None:
+                return self._miss(model_name)
+            await asyncio.sleep(interaction["latency_s"] * self.time_scale)
+            return dict(interaction["result"])  # Callers may annotate the result
+
+        return record if self.mode == RECORD else replay
+
+    def stream_function(self, provider: ModelProvider, stream_function: Callable) -> Callable:
+        """Wraps a service ``stream_chat_with_model`` for recording, or replaces it for replay."""
+        async def record(model_name: str, messages: List[Dict[str, str]], **kwargs) -> AsyncIterator[Dict[str, Any]]:
+            started = time.perf_counter()
+            events = []
+            async for event in stream_function(model_name, messages, **kwargs):
+                events.append([time.perf_counter() - started, event])
+                yield event
+            self._write({"kind": "stream", "provider": provider.value, "model": model_name,
+                         "key": interaction_key(provider.value, model_name, messages, kwargs),
+                         "messages": messages, "events": events})
+
+        async def replay(model_name: str, messages: List[Dict[str, str]], **kwargs) -> AsyncIterator[Dict[str, Any]]:
+            interaction = self._find("stream", provider, model_name, messages, kwargs)
+            if interaction is None:
+                yield {"type": "done", **self._miss(model_name)}
+                return
+            started = time.perf_counter()
+            for offset, event in interaction["events"]:
+                delay = offset * self.time_scale - (time.perf_counter() - started)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                yield dict(event)
+
+        return record if self.mode == RECORD else replay
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "path": self.path,
+            "time_scale": self.time_scale,
+            "recorded": self.recorded,
+            "replayed": self.replayed,
+            "misses": self.misses,
+            "interactions": sum(len(entries) for entries in self._by_key.values()),
+        }
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def _write(self, interaction: Dict[str, Any]):
+        line = json.dumps(interaction, separators=(",", ":"), default=str)
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(line + "\n")
+            self._file.flush()  # Keeps the cassette readable if the process dies
+            self.recorded += 1
+
+    def _find(self, kind: str, provider: ModelProvider, model_name: str,
+              messages: List[Dict[str, str]], params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        key = f"{kind}:{interaction_key(provider.value, model_name, messages, params)}"
+        candidates = self._by_key.get(key)
+        if not candidates and not self.strict:
+            key = f"{kind}:{model_name}"
+            candidates = self._by_model.get(key)
+        if not candidates:
+            return None
+        # Repeated requests cycle through their recordings in order
+        turn = self._turns[key]
+        self._turns[key] = turn + 1
+        self.replayed += 1
+        return candidates[turn % len(candidates)]
+
+    def _miss(self, model_name: str) -> Dict[str, Any]:
+        self.misses += 1
+        return {"answer": None, "raw": None, "usage": None, "status_code": 404, "error_type": "other",
+                "error": f"No recorded interaction for model {model_name} in cassette {self.path}."}
+
+
+_cassette: Optional[Cassette] = None
+
+
+def get_cassette() -> Optional[Cassette]:
+    """Returns the process-wide cassette, or None when record/replay is off."""
+    global _cassette
+    mode = os.getenv("CASSETTE_MODE", "").lower()
+    if _cassette is None and mode:
+        _cassette = Cassette(
+            mode,
+            path=os.getenv("CASSETTE_PATH") or DEFAULT_CASSETTE_PATH,
+            time_scale=float(os.getenv("CASSETTE_TIME_SCALE", "1")),
+            strict=os.getenv("CASSETTE_STRICT", "false").lower() == "true",
+        )
+    return _cassette
+
+
+def close_cassette():
+    """Flushes and closes a recording cassette. Called at application shutdown."""
+    global _cassette
+    if _cassette is not None:
+        _cassette.close()
+        _cassette = None
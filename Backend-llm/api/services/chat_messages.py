@@ -0,0 +1,52 @@
+"""
+Chat Messages Module
+Assembles the provider message list shared by every chat path.
+
+Kept free of service imports so provider modules can read the message layout
+(e.g. the stable system prompt prefix used for prompt caching) without
+importing ``chat_service``.
+"""
+
+from typing import Dict, List
+
+from api.pydantic_models import SingleModelChatRequest
+
+# Marks the system message carrying a rolling conversation summary
+SUMMARY_PREFIX = "Summary of the earlier conversation:\n"
+
+# Chat history role aliases accepted by ChatMessageAPI, mapped to the provider roles
+HISTORY_ROLES = {"human": "user", "ai": "assistant"}
+
+
+def build_messages(request_body: SingleModelChatRequest) -> List[Dict[str, str]]:
+    """
+    Builds the provider message list: system_prompts + chat_history + current question.
+
+    System prompts come first, in the order given, so every turn of a session
+    (and every session using the same prompts) starts with an identical
+    prefix that provider prompt caches can reuse. Chat history entries are
+    converted to plain dicts so the async provider clients can serialize them
+    directly.
+    """
+    messages = [{"role": "system", "content": prompt} for prompt in (request_body.system_prompts or [])]
+    messages.extend(
+        {"role": HISTORY_ROLES.get(message.role, message.role), "content": message.content}
+        for message in (request_body.chat_history or [])
+    )
+    messages.append({"role": "user", "content": request_body.question})
+    return messages
+
+
+def leading_system_prompts(messages: List[Dict[str, str]]) -> List[str]:
+    """
+    Returns the system prompts at the head of ``messages``, excluding a summary.
+
+    These are identical on every turn of a session, unlike the summary that
+    follows them, so they are what provider prompt caches can reuse.
+    """
+    prompts = []
+    for message in messages:
+        if message.get("role") != "system" or message.get("content", "").startswith(SUMMARY_PREFIX):
+            break
+        prompts.append(message.get("content", ""))
+    return prompts
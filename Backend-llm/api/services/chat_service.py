@@ -0,0 +1,660 @@
+"""
+Chat Service Module
+Provider-agnostic chat execution shared by every Backend-llm endpoint.
+
+Builds the provider message list, dispatches to the provider service module
+for the requested model and wraps the standardized result dict in a
+``QueryResponse`` with timing metadata.
+
+A request's deadline (``timeout``, or ``timeout_seconds`` in the request
+body, whichever is sooner) bounds the whole request, and the time left is
+passed to the provider call as its own timeout. A request that is cancelled,
+because the client disconnected or its deadline passed, cancels its provider
+call and is counted separately in the metrics.
+"""
+
+from contextlib import aclosing, nullcontext
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+import asyncio
+
+from api.pydantic_models import QueryResponse, ModelName, ModelProvider, SingleModelChatRequest, ContextInfo, AutoModel
+from api.services import openai_service, google_gemini_service, groq_service
+from api.services.chat_messages import build_messages
+from api.services.response_cache import canonical_request_key, get_response_cache
+from api.services.similar_question_cache import get_similar_question_cache
+from api.services.fair_scheduler import Requester, get_fair_scheduler
+from api.services.single_flight import get_single_flight
+from api.services.context_window import count_message_tokens, fit_to_budget, get_token_budget
+from api.services.conversation_summary import get_conversation_summarizer
+from api.services.rate_limiter import get_rate_limiter
+from api.services.hedging import get_hedger
+from api.services.circuit_breaker import get_circuit_breakers
+from api.services.model_router import get_model_router
+from api.services.metrics import CLIENT, DEADLINE, get_metrics
+from api.services.provider_errors import TIMEOUT
+from api.services.fake_provider import get_fake_provider
+from api.services.cassette import get_cassette
+from api.services.session_store import StaleHistoryError, get_session_store
+
+
+PROVIDER_SERVICES = {
+    ModelProvider.OPENAI: openai_service,
+    ModelProvider.GOOGLE: google_gemini_service,
+    ModelProvider.GROQ: groq_service,
+}
+
+
+def resolve_session_history(request_body: SingleModelChatRequest) -> SingleModelChatRequest:
+    """
+    Fills in ``chat_history`` from the session store when the client sent only ``history_version``.
+
+    Requests that carry their own ``chat_history`` are returned unchanged.
+
+    Raises:
+        StaleHistoryError: No history is stored at that version, so the client
+                           must resend its full ``chat_history``.
+    """
+    if request_body.chat_history or request_body.history_version is None:
+        return request_body
+    store = get_session_store()
+    if store is None:
+        raise StaleHistoryError(request_body.session_id, request_body.history_version, None)
+    history = store.history(request_body.session_id, request_body.history_version)
+    return request_body.model_copy(update={"chat_history": history})
+
+
+def save_session_turn(request_body: SingleModelChatRequest, result: Dict[str, Any]) -> Optional[str]:
+    """Appends an answered turn to the session store and returns the session's new history version."""
+    store = get_session_store()
+    if store is None or result.get("error") or not result.get("answer"):
+        return None
+    return store.append_turn(request_body.session_id, request_body.chat_history or [],
+                             request_body.question, result["answer"],
+                             base_version=request_body.history_version)
+
+
+def assemble_context(
+    model_name: ModelName,
+    request_body: SingleModelChatRequest,
+) -> Tuple[List[Dict[str, str]], ContextInfo]:
+    """
+    Builds the message list and trims chat history to the model's token budget.
+
+    When conversation summaries are enabled, history already covered by the
+    session's rolling summary is replaced by it first. System prompts and the
+    current question are always kept; the oldest history is dropped first.
+    """
+    messages = build_messages(request_body)
+    summarized_messages = 0
+    summarizer = get_conversation_summarizer()
+    if summarizer is not None:
+        messages, summarized_messages = summarizer.apply(request_body.session_id, messages, summarize)
+
+    budget = get_token_budget(model_name.value)
+    messages, prompt_tokens, dropped_messages, dropped_tokens = fit_to_budget(messages, budget)
+    return messages, ContextInfo(
+        token_budget=budget,
+        prompt_tokens=prompt_tokens,
+        dropped_messages=dropped_messages,
+        dropped_tokens=dropped_tokens,
+        summarized_messages=summarized_messages,
+    )
+
+
+def request_key(model_name: ModelName, request_body: SingleModelChatRequest,
+                extra_params: Optional[Dict[str, Any]] = None) -> str:
+    """Returns the canonical hash of everything that determines the answer."""
+    return canonical_request_key(
+        model_name.value,
+        request_body.system_prompts,
+        [{"role": message.role, "content": message.content}
+         for message in (request_body.chat_history or [])],
+        request_body.question,
+        extra_params,
+    )
+
+
+def similar_question_scope(model_name: ModelName, request_body: SingleModelChatRequest,
+                           extra_params: Optional[Dict[str, Any]] = None) -> str:
+    """Returns the canonical hash of everything but the question that determines the answer."""
+    return request_key(model_name, request_body.model_copy(update={"question": ""}), extra_params)
+
+
+def get_chat_function(provider: ModelProvider):
+    """
+    Returns the ``chat_with_model`` service function for a provider.
+
+    The fake provider stands in for the real one when enabled, and a cassette
+    records the calls or replays them instead.
+    """
+    chat_function = (get_fake_provider(provider) or PROVIDER_SERVICES[provider]).chat_with_model
+    cassette = get_cassette()
+    return cassette.chat_function(provider, chat_function) if cassette else chat_function
+
+
+def get_stream_function(provider: ModelProvider):
+    """Returns the ``stream_chat_with_model`` service function for a provider, like ``get_chat_function``."""
+    stream_function = (get_fake_provider(provider) or PROVIDER_SERVICES[provider]).stream_chat_with_model
+    cassette = get_cassette()
+    return cassette.stream_function(provider, stream_function) if cassette else stream_function
+
+
+def shortest_timeout(*timeouts: Optional[float]) -> Optional[float]:
+    """Returns the smallest of the given timeouts in seconds, or None if none is set."""
+    timeouts = [timeout for timeout in timeouts if timeout is not None]
+    return min(timeouts) if timeouts else None
+
+
+def provider_timeout(deadline: float) -> float:
+    """Returns the seconds left until ``deadline`` (event loop time) as a provider call timeout."""
+    return max(deadline - asyncio.get_running_loop().time(), 0.001)
+
+
+def send_chat_call(
+    target: ModelName,
+    messages: List[Dict[str, str]],
+    extra_params: Optional[Dict[str, Any]] = None,
+    estimated_tokens: int = 0,
+    deadline: Callable[[], Optional[float]] = lambda: None,
+) -> Awaitable[Dict[str, Any]]:
+    """
+    Sends one non-streaming call to ``target`` under its rate limits, with metrics and breaker tracking.
+
+    ``deadline`` is read when each attempt is sent; the time left until it
+    becomes the provider timeout.
+    """
+    chat_function = get_chat_function(target.get_provider())
+    rate_limiter = get_rate_limiter()
+    breakers = get_circuit_breakers()
+    metrics = get_metrics()
+
+    def send() -> Awaitable[Dict[str, Any]]:
+        params = extra_params or {}
+        call_deadline = deadline()
+        if call_deadline is not None:
+            params = {**params, "timeout": provider_timeout(call_deadline)}
+        call = chat_function(target.value, messages, **params)
+        if metrics is not None:
+            call = metrics.observe_provider_call(target, call)
+        return breakers.track(target.get_provider().value, call) if breakers else call
+
+    if rate_limiter is not None:
+        return rate_limiter.call(target.get_provider().value, target.value, send,
+                                 estimated_tokens=estimated_tokens)
+    return send()
+
+
+def summarize(model_name: ModelName, messages: List[Dict[str, str]]) -> Awaitable[Dict[str, Any]]:
+    """Runs a conversation summary update through the same rate limits, breakers and metrics as chats."""
+    estimated_tokens = sum(count_message_tokens(message) for message in messages)
+
+    def call_model(target: ModelName) -> Awaitable[Dict[str, Any]]:
+        return send_chat_call(target, messages, estimated_tokens=estimated_tokens)
+
+    breakers = get_circuit_breakers()
+    return breakers.call(model_name, call_model) if breakers else call_model(model_name)
+
+
+def deadline_passed(deadline: Optional[float]) -> bool:
+    """True once ``deadline`` (event loop time) has passed; never for a request without one."""
+    return deadline is not None and asyncio.get_running_loop().time() >= deadline
+
+
+def timeout_result(model_name: ModelName, timeout: Optional[float]) -> Dict[str, Any]:
+    """
+    Returns the error result for a request that timed out.
+
+    ``timeout`` is the request's own timeout when its deadline passed, or None
+    for a timeout raised from inside the provider call path.
+    """
+    if timeout is None:
+        return {"error": f"Model {model_name.value} timed out.", "error_type": TIMEOUT}
+    if timeout <= 0:
+        return {"error": f"Request deadline passed before model {model_name.value} was called.",
+                "error_type": TIMEOUT}
+    return {"error": f"Model {model_name.value} timed out after {timeout:g} seconds.", "error_type": TIMEOUT}
+
+
+def build_query_response(
+    model_name: ModelName,
+    request_body: SingleModelChatRequest,
+    result: Dict[str, Any],
+    request_time: datetime,
+    response_time: datetime,
+    first_token_time: Optional[datetime] = None,
+    cached: bool = False,
+    context: Optional[ContextInfo] = None,
+    history_version: Optional[str] = None,
+) -> QueryResponse:
+    """Wraps a standardized service result dict in a ``QueryResponse``."""
+    return QueryResponse(
+        answer=result.get("answer"),
+        raw_response=result.get("raw"),
+        session_id=request_body.session_id,
+        model=model_name,
+        provider=model_name.get_provider(),
+        error_message=result.get("error"),
+        request_timestamp=request_time,
+        response_timestamp=response_time,
+        latency_ms=(response_time - request_time).total_seconds() * 1000,
+        time_to_first_token_ms=(first_token_time - request_time).total_seconds() * 1000
+        if first_token_time else None,
+        usage=result.get("usage"),  # Include token usage
+        cached=cached,
+        context=context,
+        served_by=result.get("served_by"),
+        history_version=history_version,
+    )
+
+
+def record_completion(
+    model_name: ModelName,
+    result: Dict[str, Any],
+    request_time: datetime,
+    response_time: datetime,
+    first_token_time: Optional[datetime] = None,
+    cached: bool = False,
+):
+    """Feeds a finished request into the metrics and the ``auto`` routing windows."""
+    latency = (response_time - request_time).total_seconds()
+    time_to_first_token = (first_token_time - request_time).total_seconds() if first_token_time else None
+    metrics = get_metrics()
+    if metrics is not None:
+        metrics.observe_request(model_name, result, latency, time_to_first_token, cached=cached)
+    if not cached:
+        get_model_router().observe(ModelName(result.get("served_by") or model_name.value),
+                                   latency, bool(result.get("error")), time_to_first_token)
+
+
+def record_cancellation(model_name: ModelName, reason: str):
+    """Counts a request abandoned before it completed, because of its deadline or its client."""
+    metrics = get_metrics()
+    if metrics is not None:
+        metrics.observe_cancelled(model_name, reason)
+
+
+async def execute_chat(
+    model_name: ModelName,
+    request_body: SingleModelChatRequest,
+    timeout: Optional[float] = None,
+    save_turn: bool = True,
+    requester: Optional[Requester] = None,
+) -> QueryResponse:
+    """
+    Runs one chat request against the provider that serves ``model_name``.
+
+    When the response cache is enabled, an identical earlier request is
+    answered from the cache with ``cached=True`` and no provider call; the
+    similar question cache does the same for near-duplicate questions.
+    Identical requests already in flight are coalesced into one call, which
+    waits for capacity under the model's rate limits before it is sent. With
+    hedging enabled, a slow call is duplicated and the first answer wins. A
+    provider whose circuit breaker is open is skipped in favour of the model's
+    fallback chain; ``served_by`` names the model that answered.
+
+    The request's deadline is passed to the provider as its call timeout; a
+    coalesced call gets the latest deadline among the requests waiting on it
+    and is cancelled once every one of them has given up. Cancelling this
+    coroutine (e.g. on client disconnect) cancels the provider call the same way.
+
+    With the fair scheduler enabled, the call first waits for a slot on the
+    provider in weighted fair order across requesters.
+
+    With the session store enabled, a request carrying only ``history_version``
+    uses the session's stored history, and the answered turn is appended to it.
+
+    Args:
+        model_name (ModelName): The model to query.
+        request_body (SingleModelChatRequest): Question, history and system prompts.
+        timeout (Optional[float]): Seconds to wait before giving up, capped by the
+                                   request's ``timeout_seconds``. A timeout is
+                                   reported in ``error_message`` rather than raised.
+        save_turn (bool): Append the answered turn to the session store. Off when
+                          several models answer the same turn.
+        requester (Optional[Requester]): The end user the call is queued for by the
+                                         fair scheduler; anonymous when None.
+
+    Returns:
+        QueryResponse: The answer or error with timing and usage metadata.
+
+    Raises:
+        StaleHistoryError: ``history_version`` does not match the stored history.
+    """
+    request_body = resolve_session_history(request_body)
+    timeout = shortest_timeout(timeout, request_body.timeout_seconds)
+    deadline = None if timeout is None else asyncio.get_running_loop().time() + timeout
+    messages, context = assemble_context(model_name, request_body)
+    extra_params = getattr(request_body, "extra_params", None) or {}
+    key = request_key(model_name, request_body, extra_params)
+    cache = get_response_cache()
+    similar_cache = get_similar_question_cache()
+    scope = similar_question_scope(model_name, request_body, extra_params) if similar_cache else None
+    single_flight = get_single_flight()
+    hedger = get_hedger()
+    breakers = get_circuit_breakers()
+    scheduler = get_fair_scheduler()
+    metrics = get_metrics()
+
+    request_time = datetime.now(timezone.utc)
+    cached_result = await cache.get(key) if cache is not None else None
+    if cached_result is None and similar_cache is not None:
+        cached_result = similar_cache.get(scope, request_body.question)
+    if cached_result is not None:
+        response_time = datetime.now(timezone.utc)
+        record_completion(model_name, cached_result, request_time, response_time, cached=True)
+        return build_query_response(
+            model_name, request_body, cached_result, request_time, response_time, cached=True,
+            context=context, history_version=save_session_turn(request_body, cached_result) if save_turn else None)
+
+    def call_deadline() -> Optional[float]:
+        return single_flight.call_deadline(key) if single_flight else deadline
+
+    def call_model(target: ModelName) -> Awaitable[Dict[str, Any]]:
+        return send_chat_call(target, messages, extra_params, context.prompt_tokens, call_deadline)
+
+    def call_hedged(target: ModelName) -> Awaitable[Dict[str, Any]]:
+        return hedger.call(target, call_model) if hedger else call_model(target)
+
+    def call_routed() -> Awaitable[Dict[str, Any]]:
+        return breakers.call(model_name, call_hedged) if breakers else call_hedged(model_name)
+
+    async def call_provider() -> Dict[str, Any]:
+        # Queued ahead of failover, so a request that gets no slot is not sent to a fallback instead
+        if scheduler is not None:
+            result = await scheduler.call(model_name.get_provider().value, requester, call_routed)
+        else:
+            result = await call_routed()
+        if not result.get("served_by"):  # Only cache the requested model's answers
+            if cache is not None:
+                cache.set(key, result)
+            if similar_cache is not None:
+                similar_cache.set(scope, request_body.question, result)
+        return result
+
+    if timeout is not None and timeout <= 0:
+        result = timeout_result(model_name, timeout)
+        record_cancellation(model_name, DEADLINE)
+        response_time = datetime.now(timezone.utc)
+        record_completion(model_name, result, request_time, response_time)
+        return build_query_response(model_name, request_body, result, request_time, response_time,
+                                    context=context)
+
+    # Identical concurrent requests share one provider call
+    call = single_flight.run(key, call_provider, deadline) if single_flight else call_provider()
+    try:
+        with metrics.in_flight(model_name) if metrics else nullcontext():
+            result = await asyncio.wait_for(call, timeout)
+    except asyncio.TimeoutError:
+        # Only our own deadline counts as a cancellation; other timeouts come from the call path
+        expired = deadline_passed(deadline)
+        result = timeout_result(model_name, timeout if expired else None)
+        if expired:
+            record_cancellation(model_name, DEADLINE)
+    except asyncio.CancelledError:
+        record_cancellation(model_name, CLIENT)
+        raise
+    response_time = datetime.now(timezone.utc)
+    record_completion(model_name, result, request_time, response_time)
+
+    return build_query_response(model_name, request_body, result, request_time, response_time,
+                                context=context,
+                                history_version=save_session_turn(request_body, result) if save_turn else None)
+
+
+async def stream_chat(
+    model_name: ModelName,
+    request_body: SingleModelChatRequest,
+    timeout: Optional[float] = None,
+    save_turn: bool = True,
+    requester: Optional[Requester] = None,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Streams one chat request against the provider that serves ``model_name``.
+
+    Yields ``{"type": "delta", "delta": str}`` events as text arrives and ends
+    with ``{"type": "done", "response": QueryResponse}`` carrying usage, latency
+    and time-to-first-token. A response cache hit is replayed as one delta, and
+    identical streams already in flight are shared rather than restarted. New
+    provider streams wait for capacity under the model's rate limits and, with
+    hedging enabled, are duplicated when the first token is late. Streams fail
+    over along the fallback chain only before any text has been sent.
+
+    A stream still running at its deadline (``timeout`` or the request's
+    ``timeout_seconds``) is closed and ends with a timeout error. Closing this
+    generator early closes the provider stream. Session history is resolved
+    and saved as in ``execute_chat``.
+    """
+    request_body = resolve_session_history(request_body)
+    timeout = shortest_timeout(timeout, request_body.timeout_seconds)
+    deadline = None if timeout is None else asyncio.get_running_loop().time() + timeout
+    messages, context = assemble_context(model_name, request_body)
+    key = request_key(model_name, request_body)
+    cache = get_response_cache()
+    similar_cache = get_similar_question_cache()
+    scope = similar_question_scope(model_name, request_body) if similar_cache else None
+    single_flight = get_single_flight()
+    rate_limiter = get_rate_limiter()
+    hedger = get_hedger()
+    breakers = get_circuit_breakers()
+    scheduler = get_fair_scheduler()
+    metrics = get_metrics()
+
+    request_time = datetime.now(timezone.utc)
+    cached_result = await cache.get(key) if cache is not None else None
+    if cached_result is None and similar_cache is not None:
+        cached_result = similar_cache.get(scope, request_body.question)
+    if cached_result is not None:
+        yield {"type": "delta", "delta": cached_result["answer"]}
+        response_time = datetime.now(timezone.utc)
+        record_completion(model_name, cached_result, request_time, response_time, response_time,
+                          cached=True)
+        yield {
+            "type": "done",
+            "response": build_query_response(
+                model_name, request_body, cached_result, request_time, response_time, response_time,
+                cached=True, context=context,
+                history_version=save_session_turn(request_body, cached_result) if save_turn else None),
+        }
+        return
+
+    def open_model_stream(target: ModelName) -> AsyncIterator[Dict[str, Any]]:
+        stream_function = get_stream_function(target.get_provider())
+
+        def send() -> AsyncIterator[Dict[str, Any]]:
+            params = {}
+            stream_deadline = single_flight.stream_deadline(key) if single_flight else deadline
+            if stream_deadline is not None:
+                params["timeout"] = provider_timeout(stream_deadline)
+            stream = stream_function(target.value, messages, **params)
+            return breakers.track_stream(target.get_provider().value, stream) if breakers else stream
+
+        if rate_limiter is not None:
+            return rate_limiter.stream(target.get_provider().value, target.value, send,
+                                       estimated_tokens=context.prompt_tokens)
+        return send()
+
+    def open_hedged_stream(target: ModelName) -> AsyncIterator[Dict[str, Any]]:
+        return hedger.stream(target, open_model_stream) if hedger else open_model_stream(target)
+
+    def open_routed_stream() -> AsyncIterator[Dict[str, Any]]:
+        if breakers is not None:
+            return breakers.stream(model_name, open_hedged_stream)
+        return open_hedged_stream(model_name)
+
+    def open_stream() -> AsyncIterator[Dict[str, Any]]:
+        if scheduler is not None:
+            return scheduler.stream(model_name.get_provider().value, requester, open_routed_stream)
+        return open_routed_stream()
+
+    # Identical concurrent streams share one provider stream
+    source = single_flight.stream(key, open_stream, deadline) if single_flight else open_stream()
+    first_token_time = None
+    result: Dict[str, Any] = {}
+    try:
+        with metrics.in_flight(model_name) if metrics else nullcontext():
+            async with aclosing(source):
+                while True:
+                    # The deadline covers waiting on the provider, not the client reading our yields
+                    async with asyncio.timeout_at(deadline):
+                        try:
+                            chunk = await anext(source)
+                        except StopAsyncIteration:
+                            break
+                    if chunk["type"] == "delta":
+                        if first_token_time is None:
+                            first_token_time = datetime.now(timezone.utc)
+                        yield chunk
+                    else:
+                        result = chunk
+    except TimeoutError:
+        expired = deadline_passed(deadline)
+        result = timeout_result(model_name, timeout if expired else None)
+        if expired:
+            record_cancellation(model_name, DEADLINE)
+    except (asyncio.CancelledError, GeneratorExit):
+        record_cancellation(model_name, CLIENT)
+        raise
+    response_time = datetime.now(timezone.utc)
+    record_completion(model_name, result, request_time, response_time, first_token_time)
+
+    if not result.get("served_by"):
+        if cache is not None:
+            cache.set(key, result)
+        if similar_cache is not None:
+            similar_cache.set(scope, request_body.question, result)
+
+    yield {
+        "type": "done",
+        "response": build_query_response(
+            model_name, request_body, result, request_time, response_time, first_token_time,
+            context=context, history_version=save_session_turn(request_body, result) if save_turn else None),
+    }
+
+
+async def execute_auto_chat(
+    auto_model: AutoModel,
+    request_body: SingleModelChatRequest,
+    timeout: Optional[float] = None,
+    requester: Optional[Requester] = None,
+) -> QueryResponse:
+    """
+    Runs a chat request on the model the router picks for ``auto_model``.
+
+    The response's ``model`` is the concrete model chosen and ``routed_from``
+    the pseudo-model that was requested.
+    """
+    model_name = get_model_router().choose(auto_model)
+    response = await execute_chat(model_name, request_body, timeout=timeout, requester=requester)
+    response.routed_from = auto_model
+    return response
+
+
+async def stream_auto_chat(
+    auto_model: AutoModel,
+    request_body: SingleModelChatRequest,
+    timeout: Optional[float] = None,
+    requester: Optional[Requester] = None,
+) -> AsyncIterator[Dict[str, Any]]:
+    """Streaming counterpart of ``execute_auto_chat``, routed on time to first token."""
+    model_name = get_model_router().choose(auto_model, streaming=True)
+    async for event in stream_chat(model_name, request_body, timeout=timeout, requester=requester):
+        if event["type"] == "done":
+            event["response"].routed_from = auto_model
+        yield event
+
+
+async def execute_batch(
+    model_name: ModelName,
+    requests: Sequence[SingleModelChatRequest],
+    concurrency: int,
+    timeout: Optional[float] = None,
+    requester: Optional[Requester] = None,
+) -> AsyncIterator[Tuple[int, QueryResponse]]:
+    """
+    Runs many chat requests against one model with at most ``concurrency`` in flight.
+
+    Each request goes through ``execute_chat``, so caching, coalescing and the
+    model's rate limits apply per request. A request that raises is reported
+    as a response with ``error_message``; the rest of the batch continues.
+
+    Yields:
+        Tuple[int, QueryResponse]: The request's index in ``requests`` and its
+        response, in completion order.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    pending = iter(enumerate(requests))
+
+    async def worker():
+        for index, request_body in pending:  # Workers share one iterator
+            request_time = datetime.now(timezone.utc)
+            try:
+                response = await execute_chat(model_name, request_body, timeout=timeout, requester=requester)
+            except Exception as e:
+                response = build_query_response(model_name, request_body, {"error": str(e)},
+                                                request_time, datetime.now(timezone.utc))
+            await queue.put((index, response))
+
+    workers = [asyncio.create_task(worker()) for _ in range(min(concurrency, len(requests)))]
+    try:
+        for _ in range(len(requests)):
+            yield await queue.get()
+    finally:
+        # Stop issuing requests if the consumer goes away early
+        for task in workers:
+            task.cancel()
+
+
+async def stream_comparison(
+    models: Sequence[ModelName],
+    request_body: SingleModelChatRequest,
+    timeout: Optional[float] = None,
+    requester: Optional[Requester] = None,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Streams several models at once, interleaving their events as they arrive.
+
+    Every event from ``stream_chat`` is tagged with a ``model`` key. A fast
+    model's deltas are yielded immediately and never wait behind a slow one.
+    A model that exceeds ``timeout`` or raises gets a ``done`` event whose
+    response carries the error; the other streams continue.
+
+    Args:
+        models (Sequence[ModelName]): The models to stream concurrently.
+        request_body (SingleModelChatRequest): Shared question and context.
+        timeout (Optional[float]): Per-model limit on the whole stream, in seconds.
+        requester (Optional[Requester]): The end user the streams are queued for.
+
+    Yields:
+        Dict[str, Any]: ``delta`` and ``done`` events, each with a ``model`` key.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    finished = object()
+
+    async def pump(model_name: ModelName):
+        request_time = datetime.now(timezone.utc)
+        try:
+            async for event in stream_chat(model_name, request_body, timeout=timeout, save_turn=False,
+                                           requester=requester):
+                await queue.put({**event, "model": model_name})
+        except Exception as e:
+            response = build_query_response(
+                model_name, request_body, {"error": str(e)},
+                request_time, datetime.now(timezone.utc))
+            await queue.put({"type": "done", "response": response, "model": model_name})
+        finally:
+            await queue.put(finished)
+
+    tasks = [asyncio.create_task(pump(model_name)) for model_name in models]
+    try:
+        remaining = len(tasks)
+        while remaining:
+            event = await queue.get()
+            if event is finished:
+                remaining -= 1
+            else:
+                yield event
+    finally:
+        # Stop provider streams if the consumer goes away early
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,284 @@
+"""
+Circuit Breaker Module
+Per-provider health tracking, circuit breakers and cross-provider failover.
+
+Each provider has a breaker fed by the outcome and latency of every provider
+call. When too many recent calls failed or were slow, the breaker opens and
+requests for that provider no longer wait on it: they fail fast, or fail over
+along the model's configured fallback chain. After a cool-down the breaker is
+half-open and lets one probe request through; a healthy probe closes it.
+
+Only provider-side failures count against a breaker: timeouts, rate limits,
+5xx responses and connection errors. Bad requests (4xx) do not, and neither
+do failures reported before any request was sent, such as a missing API key
+or SDK: those carry no status or error class, and failing over would hide them.
+
+Configuration (environment variables):
+    CIRCUIT_BREAKER_ENABLED            "false" to disable (default on)
+    CIRCUIT_BREAKER_WINDOW             Recent calls considered per provider (default 20)
+    CIRCUIT_BREAKER_MIN_REQUESTS       Calls needed before the breaker can open (default 10)
+    CIRCUIT_BREAKER_ERROR_RATE         Failure share that opens the breaker (default 0.5)
+    CIRCUIT_BREAKER_SLOW_CALL_SECONDS  Calls at least this slow count as slow (default 30)
+    CIRCUIT_BREAKER_SLOW_CALL_RATE     Slow share that opens the breaker (default 0.5)
+    CIRCUIT_BREAKER_OPEN_SECONDS       Cool-down before a half-open probe (default 30)
+    FAILOVER_CHAINS                    JSON map of model to fallback models, e.g.
+                                       '{"gpt-5-mini": ["gemini-2.5-flash", "llama-3.3-70b-versatile"]}'
+"""
+
+from collections import deque
+from contextlib import aclosing
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+import asyncio
+import json
+import os
+import time
+
+from api.pydantic_models import ModelName
+from api.services.provider_errors import CONNECTION, RATE_LIMIT, TIMEOUT
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+def is_provider_failure(result: Dict[str, Any]) -> bool:
+    """True when a failed result points at the provider rather than the request."""
+    if not result.get("error"):
+        return False
+    if result.get("error_type") in (TIMEOUT, RATE_LIMIT, CONNECTION):
+        return True
+    status_code = result.get("status_code")
+    return status_code is not None and status_code >= 500
+
+
+class CircuitBreaker:
+    """Closed/open/half-open state for one provider over a window of recent calls."""
+
+    def __init__(
+        self,
+        window_size: int = 20,
+        min_requests: int = 10,
+        error_rate_threshold: float = 0.5,
+        slow_call_seconds: float = 30.0,
+        slow_call_rate_threshold: float = 0.5,
+        open_seconds: float = 30.0,
+    ):
+        self.min_requests = min_requests
+        self.error_rate_threshold = error_rate_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate_threshold = slow_call_rate_threshold
+        self.open_seconds = open_seconds
+        self._outcomes: Deque[Tuple[bool, bool]] = deque(maxlen=window_size)  # (failed, slow)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probe_started: Optional[float] = None
+        self.opened = 0
+        self.rejected = 0
+        self.probes = 0
+
+    @property
+    def state(self) -> str:
+        if self._state == OPEN and time.monotonic() >= self._opened_at + self.open_seconds:
+            self._state = HALF_OPEN
+            self._probe_started = None
+        return self._state
+
+    def allow(self) -> bool:
+        """
+        Returns whether a request may be sent to the provider now.
+
+        While half-open, one probe is let through at a time; a probe that never
+        reports back (e.g. was cancelled) is replaced after ``open_seconds``.
+        """
+        state = self.state
+        if state == CLOSED:
+            return True
+        now = time.monotonic()
+        if state == HALF_OPEN and (self._probe_started is None
+                                   or now - self._probe_started >= self.open_seconds):
+            self._probe_started = now
+            self.probes += 1
+            return True
+        self.rejected += 1
+        return False
+
+    def record(self, failed: bool, latency: float):
+        """Records one finished provider call."""
+        slow = latency >= self.slow_call_seconds
+        state = self.state
+        if state == HALF_OPEN:
+            if failed or slow:
+                self._open()
+            else:
+                self._outcomes.clear()
+                self._state = CLOSED
+            return
+        if state == OPEN:
+            return  # Late result of a call sent before the breaker opened
+
+        self._outcomes.append((failed, slow))
+        if len(self._outcomes) >= self.min_requests:
+            error_rate = sum(f for f, _ in self._outcomes) / len(self._outcomes)
+            slow_rate = sum(s for _, s in self._outcomes) / len(self._outcomes)
+            if error_rate >= self.error_rate_threshold or slow_rate >= self.slow_call_rate_threshold:
+                self._open()
+
+    def _open(self):
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        self._outcomes.clear()
+        self.opened += 1
+
+    def stats(self) -> Dict[str, Any]:
+        outcomes = list(self._outcomes)
+        return {
+            "state": self.state,
+            "recent_calls": len(outcomes),
+            "error_rate": round(sum(f for f, _ in outcomes) / len(outcomes), 3) if outcomes else 0.0,
+            "slow_rate": round(sum(s for _, s in outcomes) / len(outcomes), 3) if outcomes else 0.0,
+            "opened": self.opened,
+            "rejected": self.rejected,
+            "probes": self.probes,
+        }
+
+
+class CircuitBreakers:
+    """Provider breakers plus the failover chains that route around open ones."""
+
+    def __init__(self, fallbacks: Optional[Dict[str, List[str]]] = None, **breaker_settings):
+        self.fallbacks = {ModelName(model): [ModelName(fallback) for fallback in chain]
+                          for model, chain in (fallbacks or {}).items()}
+        self.breaker_settings = breaker_settings
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self.failovers: Dict[str, int] = {}
+
+    def breaker(self, provider: str) -> CircuitBreaker:
+        if provider not in self._breakers:
+            self._breakers[provider] = CircuitBreaker(**self.breaker_settings)
+        return self._breakers[provider]
+
+    def candidates(self, model_name: ModelName) -> List[ModelName]:
+        """The requested model followed by its fallback chain."""
+        return [model_name] + [m for m in self.fallbacks.get(model_name, []) if m != model_name]
+
+    async def track(self, provider: str, call: Awaitable[Dict[str, Any]]) -> Dict[str, Any]:
+        """Awaits one provider call and records its outcome and latency."""
+        breaker = self.breaker(provider)
+        started = time.monotonic()
+        try:
+            result = await call
+        except asyncio.CancelledError:
+            elapsed = time.monotonic() - started
+            if elapsed >= breaker.slow_call_seconds:
+                breaker.record(False, elapsed)  # Abandoned by a caller timeout; still slow
+            raise
+        breaker.record(is_provider_failure(result), time.monotonic() - started)
+        return result
+
+    async def track_stream(
+        self, provider: str, stream: AsyncIterator[Dict[str, Any]],
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Passes a provider stream through, recording its outcome and time to first event."""
+        breaker = self.breaker(provider)
+        started = time.monotonic()
+        first_event_latency = None
+        async with aclosing(stream) as source:
+            async for event in source:
+                if first_event_latency is None:
+                    first_event_latency = time.monotonic() - started
+                if event["type"] == "done":
+                    breaker.record(is_provider_failure(event), first_event_latency)
+                yield event
+
+    async def call(
+        self,
+        model_name: ModelName,
+        start: Callable[[ModelName], Awaitable[Dict[str, Any]]],
+    ) -> Dict[str, Any]:
+        """
+        Runs ``start`` for the first model whose provider is healthy.
+
+        A model whose breaker is open is skipped; a provider failure moves on
+        to the next model in the chain.
+
+        Returns:
+            Dict[str, Any]: The result, with ``served_by`` set when a fallback
+            model answered, or the last failure (fail fast if none was tried).
+        """
+        result = None
+        for target in self.candidates(model_name):
+            if not self.breaker(target.get_provider().value).allow():
+                continue
+            result = await start(target)
+            if not is_provider_failure(result):
+                return self._served(model_name, target, result)
+        return result or self._unavailable(model_name)
+
+    async def stream(
+        self,
+        model_name: ModelName,
+        open_stream: Callable[[ModelName], AsyncIterator[Dict[str, Any]]],
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Streaming counterpart of ``call``; fails over only before any text was sent."""
+        result = None
+        for target in self.candidates(model_name):
+            if not self.breaker(target.get_provider().value).allow():
+                continue
+            produced_text = False
+            async with aclosing(open_stream(target)) as source:
+                async for event in source:
+                    if event["type"] == "delta":
+                        produced_text = True
+                        yield event
+                    else:
+                        result = self._served(model_name, target, event)
+            if result is not None and (produced_text or not is_provider_failure(result)):
+                yield result
+                return
+        yield result or {"type": "done", **self._unavailable(model_name)}
+
+    def _served(self, model_name: ModelName, target: ModelName, result: Dict[str, Any]) -> Dict[str, Any]:
+        if target == model_name:
+            return result
+        if not result.get("error"):
+            self.failovers[model_name.value] = self.failovers.get(model_name.value, 0) + 1
+        return {**result, "served_by": result.get("served_by") or target.value}
+
+    def _unavailable(self, model_name: ModelName) -> Dict[str, Any]:
+        return {
+            "answer": None,
+            "raw": None,
+            "usage": None,
+            "error": (f"Provider {model_name.get_provider().value} is unavailable (circuit open) "
+                      f"and no fallback model could serve {model_name.value}."),
+            "status_code": 503,
+            "error_type": "circuit_open",
+            "rate_limit": None,
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "providers": {provider: breaker.stats() for provider, breaker in self._breakers.items()},
+            "failovers": dict(self.failovers),
+            "fallbacks": {model.value: [m.value for m in chain] for model, chain in self.fallbacks.items()},
+        }
+
+
+_circuit_breakers: Optional[CircuitBreakers] = None
+
+
+def get_circuit_breakers() -> Optional[CircuitBreakers]:
+    """Returns the process-wide breakers, or None when they are disabled."""
+    global _circuit_breakers
+    if (_circuit_breakers is None
+            and os.getenv("CIRCUIT_BREAKER_ENABLED", "true").lower() != "false"):
+        _circuit_breakers = CircuitBreakers(
+            fallbacks=json.loads(os.getenv("FAILOVER_CHAINS", "{}") or "{}"),
+            window_size=int(os.getenv("CIRCUIT_BREAKER_WINDOW", "20")),
+            min_requests=int(os.getenv("CIRCUIT_BREAKER_MIN_REQUESTS", "10")),
+            error_rate_threshold=float(os.getenv("CIRCUIT_BREAKER_ERROR_RATE", "0.5")),
+            slow_call_seconds=float(os.getenv("CIRCUIT_BREAKER_SLOW_CALL_SECONDS", "30")),
+            slow_call_rate_threshold=float(os.getenv("CIRCUIT_BREAKER_SLOW_CALL_RATE", "0.5")),
+            open_seconds=float(os.getenv("CIRCUIT_BREAKER_OPEN_SECONDS", "30")),
+        )
+    return _circuit_breakers
@@ -0,0 +1,155 @@
+"""
+Context Window Module
+Token counting and budget-aware trimming of the message list sent to providers.
+
+System prompts and the current question are always kept. Chat history is
+kept newest-first until the model's token budget is reached, so long
+sessions stop growing in cost and latency and never overflow the context
+window. Token counts are memoized per message hash because the same history
+is re-sent on every turn of a session.
+
+Token counts use ``tiktoken`` when it is installed and fall back to a
+characters-per-token estimate otherwise.
+
+Configuration (environment variables):
+    CONTEXT_TOKEN_BUDGETS   JSON object of per-model input budgets, e.g. '{"gpt-5": 32000}'
+    CONTEXT_TOKEN_BUDGET    Budget for models not listed above (default: model limits below)
+"""
+
+from collections import OrderedDict
+from typing import Dict, List, Tuple
+import hashlib
+import json
+import os
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None  # Falls back to the character estimate
+
+
+# Input-token limits per model, leaving room for the completion
+DEFAULT_TOKEN_BUDGETS: Dict[str, int] = {
+    "gpt-5": 272_000,
+    "gpt-5-mini": 272_000,
+    "gpt-nano": 272_000,
+    "gemini-2.5-pro": 1_000_000,
+    "gemini-2.5-flash": 1_000_000,
+    "gemini-2.5-flash-lite": 1_000_000,
+    "llama-3.1-8b-instant": 100_000,
+    "llama-3.3-70b-versatile": 100_000,
+}
+
+CHARS_PER_TOKEN = 4
+MESSAGE_OVERHEAD_TOKENS = 4  # Role and framing tokens added per message
+TOKEN_COUNT_CACHE_SIZE = 50_000
+
+_token_counts: "OrderedDict[bytes, int]" = OrderedDict()
+_encoding = None
+
+
+def _get_encoding():
+    """Loads the tiktoken encoding once; returns None if unavailable."""
+    global _encoding, tiktoken
+    if _encoding is None and tiktoken is not None:
+        try:
+            _encoding = tiktoken.get_encoding("o200k_base")
+        except Exception:
+            tiktoken = None  # Encoding files unavailable (e.g. offline); use the estimate
+    return _encoding
+
+
+def count_text_tokens(text: str) -> int:
+    """Counts the tokens in ``text``."""
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def count_message_tokens(message: Dict[str, str]) -> int:
+    """
+    Counts the tokens in one chat message, including per-message overhead.
+
+    Results are memoized by a hash of (role, content) in a bounded LRU.
+    """
+    digest = hashlib.blake2b(
+        f"{message.get('role', '')}\0{message.get('content', '')}".encode("utf-8"),
+        digest_size=16).digest()
+    count = _token_counts.get(digest)
+    if count is None:
+        count = count_text_tokens(message.get("content", "")) + MESSAGE_OVERHEAD_TOKENS
+        _token_counts[digest] = count
+        if len(_token_counts) > TOKEN_COUNT_CACHE_SIZE:
+            _token_counts.popitem(last=False)
+    else:
+        _token_counts.move_to_end(digest)
+    return count
+
+
+def get_token_budget(model_name: str) -> int:
+    """Returns the configured input-token budget for ``model_name``."""
+    overrides = json.loads(os.getenv("CONTEXT_TOKEN_BUDGETS", "{}") or "{}")
+    if model_name in overrides:
+        return int(overrides[model_name])
+    default_budget = os.getenv("CONTEXT_TOKEN_BUDGET")
+    if default_budget:
+        return int(default_budget)
+    return DEFAULT_TOKEN_BUDGETS.get(model_name, 100_000)
+
+
+def fit_to_budget(
+    messages: List[Dict[str, str]],
+    budget: int,
+) -> Tuple[List[Dict[str, str]], int, int, int]:
+    """
+    Drops the oldest chat history so ``messages`` fit within ``budget`` tokens.
+
+    System messages and the final (current) message are always kept, even if
+    they alone exceed the budget. History is kept newest-first; a kept window
+    never starts with an assistant reply whose question was dropped.
+
+    Args:
+        messages (List[Dict[str, str]]): Full message list, current question last.
+        budget (int): Maximum input tokens.
+
+    Returns:
+        Tuple of (kept messages, kept tokens, dropped message count, dropped tokens).
+    """
+    if not messages:
+        return [], 0, 0, 0
+
+    system = [m for m in messages[:-1] if m.get("role") == "system"]
+    history = [m for m in messages[:-1] if m.get("role") != "system"]
+    current = messages[-1]
+
+    used = sum(count_message_tokens(m) for m in system) + count_message_tokens(current)
+    kept_from = len(history)
+    for index in range(len(history) - 1, -1, -1):
+        cost = count_message_tokens(history[index])
+        if used + cost > budget:
+            break
+        used += cost
+        kept_from = index
+
+    # Start a trimmed window on a user turn rather than an orphaned assistant reply
+    while 0 < kept_from < len(history) and history[kept_from].get("role") in ("assistant", "ai"):
+        used -= count_message_tokens(history[kept_from])
+        kept_from += 1
+
+    dropped = history[:kept_from]
+    dropped_tokens = sum(count_message_tokens(m) for m in dropped)
+    return _without_oldest_history(messages, len(dropped)), used, len(dropped), dropped_tokens
+
+
+def _without_oldest_history(messages: List[Dict[str, str]], dropped_count: int) -> List[Dict[str, str]]:
+    """Rebuilds the message list without its ``dropped_count`` oldest history messages."""
+    kept: List[Dict[str, str]] = []
+    skipped = 0
+    for message in messages[:-1]:
+        if message.get("role") != "system" and skipped < dropped_count:
+            skipped += 1
+            continue
+        kept.append(message)
+    kept.append(messages[-1])
+    return kept
@@ -0,0 +1,209 @@
+"""
+Conversation Summary Module
+Rolling per-session summaries that replace old turns in long conversations.
+
+Once a session's history grows past the recent window, the older turns are
+compressed by a cheap model (llama-3.1-8b-instant by default) in a background
+task, off the request path. The summary call goes through the same rate
+limiter, circuit breaker and metrics as chat calls. Later requests for the session send
+system prompts + summary + recent turns instead of the full history, so prompt
+size and latency stay flat as the session grows. The summary is updated
+incrementally: only turns that aged out since the last update are folded in.
+
+A summary is only reused while the client's history still starts with the
+exact messages it covers (checked by hash); an edited history discards it.
+
+Configuration (environment variables):
+    CONVERSATION_SUMMARY_ENABLED          "true" to enable (default off)
+    CONVERSATION_SUMMARY_MODEL            Summarizer model (default llama-3.1-8b-instant)
+    CONVERSATION_SUMMARY_KEEP_RECENT      History messages always sent verbatim (default 8)
+    CONVERSATION_SUMMARY_MIN_NEW_MESSAGES Aged-out messages that trigger an update (default 8)
+    CONVERSATION_SUMMARY_MAX_SESSIONS     Sessions kept in the LRU (default 1000)
+    CONVERSATION_SUMMARY_MAX_WORDS        Target summary length (default 300)
+"""
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+import asyncio
+import hashlib
+import logging
+import os
+
+from api.pydantic_models import ModelName
+from api.services.chat_messages import SUMMARY_PREFIX
+
+logger = logging.getLogger(__name__)
+
+SUMMARIZER_INSTRUCTIONS = (
+    "You maintain a running summary of a conversation between a user and an assistant. "
+    "Merge the new messages into the existing summary. Keep names, facts, preferences, "
+    "decisions and open questions; drop pleasantries. Write at most {max_words} words "
+    "in plain prose and reply with the updated summary only."
+)
+
+
+@dataclass
+class SessionSummary:
+    """A session's summary and the history prefix it covers."""
+    text: str
+    covered_messages: int
+    prefix_hash: str
+
+
+def _prefix_hash(history: List[Dict[str, str]]) -> str:
+    digest = hashlib.sha256()
+    for message in history:
+        digest.update(message.get("role", "").encode("utf-8") + b"\0")
+        digest.update(message.get("content", "").encode("utf-8") + b"\0")
+    return digest.hexdigest()
+
+
+class ConversationSummarizer:
+    """
+    Keeps rolling summaries per ``session_id`` in a bounded LRU.
+
+    ``apply`` is synchronous and cheap; summary updates run as background tasks.
+    """
+
+    def __init__(
+        self,
+        model_name: ModelName = ModelName.LLAMA_3_1_8B_INSTANT,
+        keep_recent: int = 8,
+        min_new_messages: int = 8,
+        max_sessions: int = 1000,
+        max_words: int = 300,
+    ):
+        self.model_name = model_name
+        self.keep_recent = keep_recent
+        self.min_new_messages = min_new_messages
+        self.max_sessions = max_sessions
+        self.max_words = max_words
+        self._summaries: "OrderedDict[str, SessionSummary]" = OrderedDict()
+        self._pending: Dict[str, asyncio.Task] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self.updates = 0
+        self.failures = 0
+
+    def apply(
+        self,
+        session_id: str,
+        messages: List[Dict[str, str]],
+        summarize: Callable[[ModelName, List[Dict[str, str]]], Awaitable[Dict[str, Any]]],
+    ) -> Tuple[List[Dict[str, str]], int]:
+        """
+        Replaces summarized history with the session summary and schedules an update.
+
+        Args:
+            session_id (str): The chat session.
+            messages (List[Dict[str, str]]): system prompts + history + current question.
+            summarize (Callable): Sends the summarizer messages to a model and returns its result dict.
+
+        Returns:
+            Tuple of (messages to send, number of history messages replaced by the summary).
+        """
+        system = [m for m in messages[:-1] if m.get("role") == "system"]
+        history = [m for m in messages[:-1] if m.get("role") != "system"]
+        current = messages[-1]
+
+        summary = self._summaries.get(session_id)
+        if summary is not None:
+            if (summary.covered_messages > len(history)
+                    or _prefix_hash(history[:summary.covered_messages]) != summary.prefix_hash):
+                del self._summaries[session_id]  # History was edited; start over
+                summary = None
+            else:
+                self._summaries.move_to_end(session_id)
+
+        covered = summary.covered_messages if summary else 0
+        aged_out = len(history) - self.keep_recent
+        if aged_out - covered >= self.min_new_messages and session_id not in self._pending:
+            self._schedule_update(session_id, summary, history[:aged_out], summarize)
+
+        if summary is None:
+            return messages, 0
+        summary_message = {"role": "system", "content": SUMMARY_PREFIX + summary.text}
+        return system + [summary_message] + history[covered:] + [current], covered
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "sessions": len(self._summaries),
+            "pending_updates": len(self._pending),
+            "updates": self.updates,
+            "failures": self.failures,
+        }
+
+    async def aclose(self):
+        """Cancels summary updates still running. Called at application shutdown."""
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def _schedule_update(self, session_id, summary, aged_history, summarize):
+        task = asyncio.create_task(self._update(session_id, summary, aged_history, summarize))
+        self._pending[session_id] = task
+        self._tasks.add(task)
+
+        def _finished(_):
+            self._tasks.discard(task)
+            if self._pending.get(session_id) is task:
+                del self._pending[session_id]
+
+        task.add_done_callback(_finished)
+
+    async def _update(self, session_id, summary, aged_history, summarize):
+        covered = summary.covered_messages if summary else 0
+        new_messages = "\n".join(
+            f"{m.get('role', 'user')}: {m.get('content', '')}" for m in aged_history[covered:])
+        prompt = (f"Existing summary:\n{summary.text if summary else '(none)'}\n\n"
+                  f"New messages:\n{new_messages}")
+        try:
+            result = await summarize(self.model_name, [
+                {"role": "system", "content": SUMMARIZER_INSTRUCTIONS.format(max_words=self.max_words)},
+                {"role": "user", "content": prompt},
+            ])
+        except Exception:
+            self.failures += 1
+            logger.exception("Conversation summary update failed for session %s", session_id)
+            return
+        if result.get("error") or not result.get("answer"):
+            self.failures += 1
+            logger.warning("Conversation summary update failed for session %s: %s",
+                           session_id, result.get("error"))
+            return
+
+        self._summaries[session_id] = SessionSummary(
+            text=result["answer"].strip(),
+            covered_messages=len(aged_history),
+            prefix_hash=_prefix_hash(aged_history),
+        )
+        self._summaries.move_to_end(session_id)
+        while len(self._summaries) > self.max_sessions:
+            self._summaries.popitem(last=False)
+        self.updates += 1
+
+
+_conversation_summarizer: Optional[ConversationSummarizer] = None
+
+
+def get_conversation_summarizer() -> Optional[ConversationSummarizer]:
+    """Returns the process-wide summarizer, or None when summaries are disabled."""
+    global _conversation_summarizer
+    if (_conversation_summarizer is None
+            and os.getenv("CONVERSATION_SUMMARY_ENABLED", "false").lower() == "true"):
+        _conversation_summarizer = ConversationSummarizer(
+            model_name=ModelName(os.getenv("CONVERSATION_SUMMARY_MODEL", "llama-3.1-8b-instant")),
+            keep_recent=int(os.getenv("CONVERSATION_SUMMARY_KEEP_RECENT", "8")),
+            min_new_messages=int(os.getenv("CONVERSATION_SUMMARY_MIN_NEW_MESSAGES", "8")),
+            max_sessions=int(os.getenv("CONVERSATION_SUMMARY_MAX_SESSIONS", "1000")),
+            max_words=int(os.getenv("CONVERSATION_SUMMARY_MAX_WORDS", "300")),
+        )
+    return _conversation_summarizer
+
+
+async def close_conversation_summarizer():
+    """Stops pending summary updates. Called at application shutdown."""
+    global _conversation_summarizer
+    if _conversation_summarizer is not None:
+        await _conversation_summarizer.aclose()
+        _conversation_summarizer = None
@@ -0,0 +1,290 @@
+"""
+Fair Scheduler Module
+Weighted fair queueing of provider calls across users.
+
+Each provider has a fixed number of slots for requests in flight. When they
+are all taken, requests queue per user (``X-User-Id``, forwarded by the BFF)
+and the next free slot goes to the user with the smallest virtual finish
+time. A user's finish time advances by ``1 / weight`` per request, where the
+weight comes from the user's tier (``X-User-Tier``); users that have been
+idle start level with the current virtual time rather than with the credit
+they built up. A user with many requests queued is therefore served at
+their weighted share of the slots while someone sending an occasional chat
+goes ahead of them.
+
+A request that does not get a slot within the max queue time fails with a
+rate-limit error instead of being sent. Requests without a user header share
+one anonymous queue.
+
+Both headers are client-supplied. ``X-User-Tier`` is ignored (every request
+gets the "default" tier) unless ``FAIR_SCHEDULER_TRUST_TIER_HEADER`` is set,
+which must only be done when the BFF sets or strips the header on every
+request, so a direct caller cannot claim a higher tier.
+
+Configuration (environment variables):
+    FAIR_SCHEDULER_ENABLED            "true" to enable (default off)
+    FAIR_SCHEDULER_CONCURRENCY        Requests in flight per provider (default 32)
+    FAIR_SCHEDULER_TIER_WEIGHTS       JSON weights by tier, e.g. '{"free": 1, "pro": 4}';
+                                      "default" applies to unknown tiers (default 1)
+    FAIR_SCHEDULER_MAX_QUEUE_SECONDS  Longest a request waits for a slot (default 20)
+    FAIR_SCHEDULER_TRUST_TIER_HEADER  "true" to honour X-User-Tier (default off)
+"""
+
+from collections import deque
+from contextlib import aclosing
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, Optional
+import asyncio
+import json
+import os
+import time
+
+from api.services.provider_errors import RATE_LIMIT
+
+ANONYMOUS_USER = "anonymous"
+DEFAULT_TIER = "default"
+
+
+@dataclass(frozen=True)
+class Requester:
+    """The end user a request is scheduled for, and their tier."""
+    user_id: str = ANONYMOUS_USER
+    tier: str = DEFAULT_TIER
+
+
+class QueueTimeout(Exception):
+    """Raised internally when a request gets no slot within the max queue time."""
+
+
+@dataclass
+class _UserQueue:
+    weight: float = 1.0
+    finish: float = 0.0  # Virtual finish time of the user's last dispatched request
+    head_finish: float = 0.0  # Virtual finish time of the first waiter, fixed when it reached the head
+    waiters: Deque[asyncio.Future] = field(default_factory=deque)
+
+
+@dataclass
+class _TierStats:
+    requests: int = 0
+    queued: int = 0
+    rejected: int = 0
+    total_wait: float = 0.0
+    max_wait: float = 0.0
+
+
+class ProviderQueue:
+    """Slots and per-user queues for one provider."""
+
+    def __init__(self, concurrency: int):
+        self.concurrency = concurrency
+        self.in_flight = 0
+        self.queue_depth = 0
+        self.virtual_time = 0.0
+        self._users: Dict[str, _UserQueue] = {}
+        self.tiers: Dict[str, _TierStats] = {}
+
+    async def acquire(self, requester: Requester, weight: float, max_wait: float):
+        """
+        Waits for a slot in weighted fair order.
+
+        Raises:
+            QueueTimeout: If no slot frees up within ``max_wait`` seconds.
+        """
+        start = time.monotonic()
+        tier = self.tiers.setdefault(requester.tier, _TierStats())
+        user = self._users.setdefault(requester.user_id, _UserQueue())
+        user.weight = weight
+        if self.in_flight < self.concurrency and self.queue_depth == 0:
+            self._dispatch(user)
+        else:
+            waiter = asyncio.get_running_loop().create_future()
+            if not user.waiters:
+                user.head_finish = self._next_finish(user)
+            user.waiters.append(waiter)
+            self.queue_depth += 1
+            try:
+                async with asyncio.timeout(max_wait):
+                    await waiter
+            except BaseException as e:
+                if waiter.done() and not waiter.cancelled():
+                    self.release()  # Granted just as we gave up; pass the slot on
+                elif waiter in user.waiters:
+                    user.waiters.remove(waiter)
+                    self.queue_depth -= 1
+                    self._forget_if_idle(requester.user_id)
+                if isinstance(e, TimeoutError):
+                    tier.rejected += 1
+                    raise QueueTimeout from None
+                raise
+
+        waited = time.monotonic() - start
+        tier.requests += 1
+        if waited > 0.001:
+            tier.queued += 1
+        tier.total_wait += waited
+        tier.max_wait = max(tier.max_wait, waited)
+
+    def release(self):
+        """Frees a slot and hands free slots to the users with the smallest finish times."""
+        self.in_flight -= 1
+        while self.in_flight < self.concurrency and self.queue_depth:
+            user_id, user = min(
+                ((user_id, user) for user_id, user in self._users.items() if user.waiters),
+                key=lambda item: item[1].head_finish)
+            waiter = user.waiters.popleft()
+            self.queue_depth -= 1
+            if waiter.cancelled():
+                continue  # Its request is leaving the queue; the next waiter keeps the head's place
+            self.virtual_time = max(self.virtual_time, user.head_finish - 1.0 / user.weight)
+            user.finish = user.head_finish
+            user.head_finish = self._next_finish(user)
+            self.in_flight += 1
+            waiter.set_result(None)
+            self._forget_if_idle(user_id)
+
+    def _next_finish(self, user: _UserQueue) -> float:
+        return max(self.virtual_time, user.finish) + 1.0 / user.weight
+
+    def _dispatch(self, user: _UserQueue):
+        started_at = max(self.virtual_time, user.finish)
+        user.finish = started_at + 1.0 / user.weight
+        self.virtual_time = started_at
+        self.in_flight += 1
+
+    def _forget_if_idle(self, user_id: str):
+        # Users ahead of virtual time keep their finish time so they cannot reset it by pausing
+        user = self._users.get(user_id)
+        if user is not None and not user.waiters and user.finish <= self.virtual_time:
+            del self._users[user_id]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "concurrency": self.concurrency,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "queued_users": sum(1 for user in self._users.values() if user.waiters),
+            "tiers": {
+                name: {
+                    "requests": tier.requests,
+                    "queued_requests": tier.queued,
+                    "rejected": tier.rejected,
+                    "avg_wait_ms": round(tier.total_wait / tier.requests * 1000, 2) if tier.requests else 0.0,
+                    "max_wait_ms": round(tier.max_wait * 1000, 2),
+                }
+                for name, tier in self.tiers.items()
+            },
+        }
+
+
+class FairScheduler:
+    """Routes provider calls through per-provider weighted fair queues."""
+
+    def __init__(
+        self,
+        concurrency: int = 32,
+        tier_weights: Optional[Dict[str, float]] = None,
+        max_queue_seconds: float = 20.0,
+        trust_tier_header: bool = False,
+    ):
+        self.concurrency = concurrency
+        self.tier_weights = tier_weights or {}
+        self.max_queue_seconds = max_queue_seconds
+        self.trust_tier_header = trust_tier_header
+        self._queues: Dict[str, ProviderQueue] = {}
+
+    def requester(self, user_id: Optional[str], tier: Optional[str]) -> Requester:
+        """Builds the requester from the user headers, ignoring the tier unless it is trusted."""
+        return Requester(user_id=user_id or ANONYMOUS_USER,
+                         tier=(tier if self.trust_tier_header else None) or DEFAULT_TIER)
+
+    def weight(self, tier: str) -> float:
+        return float(self.tier_weights.get(tier, self.tier_weights.get(DEFAULT_TIER, 1.0)))
+
+    def queue(self, provider: str) -> ProviderQueue:
+        if provider not in self._queues:
+            self._queues[provider] = ProviderQueue(self.concurrency)
+        return self._queues[provider]
+
+    async def call(
+        self,
+        provider: str,
+        requester: Optional[Requester],
+        call: Callable[[], Awaitable[Dict[str, Any]]],
+    ) -> Dict[str, Any]:
+        """
+        Runs ``call`` once ``requester`` gets a slot on ``provider``.
+
+        Returns:
+            Dict[str, Any]: The call's result, or a rate-limit error result if
+            no slot freed up within the max queue time.
+        """
+        requester = requester or Requester()
+        queue = self.queue(provider)
+        try:
+            await queue.acquire(requester, self.weight(requester.tier), self.max_queue_seconds)
+        except QueueTimeout:
+            return self._queue_timeout_result(provider)
+        try:
+            return await call()
+        finally:
+            queue.release()
+
+    async def stream(
+        self,
+        provider: str,
+        requester: Optional[Requester],
+        open_stream: Callable[[], AsyncIterator[Dict[str, Any]]],
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Streaming counterpart of ``call``. The slot is held until the stream ends."""
+        requester = requester or Requester()
+        queue = self.queue(provider)
+        try:
+            await queue.acquire(requester, self.weight(requester.tier), self.max_queue_seconds)
+        except QueueTimeout:
+            yield {"type": "done", **self._queue_timeout_result(provider)}
+            return
+        try:
+            async with aclosing(open_stream()) as source:
+                async for chunk in source:
+                    yield chunk
+        finally:
+            queue.release()
+
+    def _queue_timeout_result(self, provider: str) -> Dict[str, Any]:
+        return {
+            "answer": None,
+            "raw": None,
+            "usage": None,
+            "error": (f"Too many requests queued for {provider}; no slot within "
+                      f"{self.max_queue_seconds:g} seconds."),
+            "status_code": 429,
+            "error_type": RATE_LIMIT,
+            "rate_limit": None,
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-provider slots in use, queue depth and waits by tier."""
+        return {
+            "concurrency": self.concurrency,
+            "max_queue_seconds": self.max_queue_seconds,
+            "tier_weights": self.tier_weights,
+            "trust_tier_header": self.trust_tier_header,
+            "providers": {provider: queue.stats() for provider, queue in self._queues.items()},
+        }
+
+
+_fair_scheduler: Optional[FairScheduler] = None
+
+
+def get_fair_scheduler() -> Optional[FairScheduler]:
+    """Returns the process-wide fair scheduler, or None when it is disabled."""
+    global _fair_scheduler
+    if _fair_scheduler is None and os.getenv("FAIR_SCHEDULER_ENABLED", "false").lower() == "true":
+        _fair_scheduler = FairScheduler(
+            concurrency=int(os.getenv("FAIR_SCHEDULER_CONCURRENCY", "32")),
+            tier_weights=json.loads(os.getenv("FAIR_SCHEDULER_TIER_WEIGHTS", "{}") or "{}"),
+            max_queue_seconds=float(os.getenv("FAIR_SCHEDULER_MAX_QUEUE_SECONDS", "20")),
+            trust_tier_header=os.getenv("FAIR_SCHEDULER_TRUST_TIER_HEADER", "false").lower() == "true",
+        )
+    return _fair_scheduler
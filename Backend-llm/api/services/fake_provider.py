@@ -0,0 +1,208 @@
+"""
+Fake Provider Module
+A deterministic built-in stand-in for the OpenAI, Gemini and Groq services.
+
+With ``FAKE_PROVIDER_ENABLED=true`` every chat and stream call is answered
+locally instead of by the provider SDKs, so load tests and benchmarks burn no
+quota and need no API keys. Results have the same shape as the real service
+module's: OpenAI/Groq ``chat.completion`` payloads and usage dicts, Gemini
+``candidates``/``usage_metadata``, streamed delta events and error results
+carrying ``status_code``, ``error_type`` and ``rate_limit``.
+
+Timing follows a simple model: a time to first token drawn from the
+configured distribution, then ``completion_tokens`` generated at
+``tokens_per_second``. Answers are derived from a hash of the messages, and
+latency and error draws come from a per-model generator seeded with
+``seed``, so a run is reproducible for a given request order.
+
+Configuration (environment variables):
+    FAKE_PROVIDER_ENABLED    "true" to answer every request with the fake provider (default off)
+    FAKE_PROVIDER_SETTINGS   JSON settings keyed by model, provider or "default", e.g.
+                             '{"default": {"ttft_ms": 150}, "gpt-5": {"error_rate": 0.02}}'.
+                             Keys are the FakeSettings fields below.
+"""
+
+from dataclasses import dataclass, fields
+from typing import Any, AsyncIterator, Dict, List, Optional
+import asyncio
+import hashlib
+import json
+import math
+import os
+import random
+import time
+
+from api.pydantic_models import ModelProvider
+from api.services.context_window import count_message_tokens
+from api.services.provider_errors import AUTH, OTHER, RATE_LIMIT, TIMEOUT
+
+# Vocabulary for generated answers; one word counts as one completion token
+WORDS = (
+    "the model considers your question and answers with a short deterministic reply "
+    "built for load testing so that every run of the benchmark sees the same text"
+).split()
+
+# Status code and message reported for each injected error type
+INJECTED_ERRORS = {
+    RATE_LIMIT: (429, "Error code: 429 - Rate limit reached (fake provider)"),
+    TIMEOUT: (None, "Request timed out. (fake provider)"),
+    AUTH: (401, "Error code: 401 - Invalid API key (fake provider)"),
+    OTHER: (500, "Error code: 500 - Internal server error (fake provider)"),
+}
+
+
+@dataclass
+class FakeSettings:
+    """Timing, size and failure behaviour of the fake provider for one model."""
+    ttft_ms: float = 200.0               # Mean time to first token
+    latency_distribution: str = "lognormal"  # fixed, uniform, exponential or lognormal
+    latency_spread: float = 0.25         # Lognormal sigma, or +/- fraction for uniform
+    tokens_per_second: float = 100.0     # Generation speed after the first token; 0 is instant
+    completion_tokens: int = 50
+    stream_chunk_tokens: int = 4         # Tokens per streamed delta
+    error_rate: float = 0.0              # Share of requests that fail
+    error_type: str = OTHER              # rate_limit, timeout, auth or other
+    retry_after_s: float = 1.0           # Retry-After reported with injected 429s
+    seed: int = 0
+
+
+def draw_latency(rng: random.Random, mean: float, distribution: str, spread: float) -> float:
+    """Draws one latency with the given mean from the named distribution."""
+    if mean <= 0 or distribution == "fixed":
+        return max(mean, 0.0)
+    if distribution == "uniform":
+        return rng.uniform(mean * (1 - spread), mean * (1 + spread))
+    if distribution == "exponential":
+        return rng.expovariate(1 / mean)
+    if distribution == "lognormal":
+        return rng.lognormvariate(math.log(mean) - spread ** 2 / 2, spread)
+    raise ValueError(f"Unknown latency distribution '{distribution}'.")
+
+
+class FakeProvider:
+    """Answers chat and stream calls for one provider with that provider's result shape."""
+
+    def __init__(self, provider: ModelProvider, settings_config: Optional[Dict[str, Dict[str, Any]]] = None):
+        self.provider = provider
+        self.settings_config = settings_config or {}
+        self._rngs: Dict[str, random.Random] = {}
+        self.calls = 0
+
+    def settings_for(self, model_name: str) -> FakeSettings:
+        """Merges the "default", provider and model entries of the configuration."""
+        merged = {
+            **self.settings_config.get("default", {}),
+            **self.settings_config.get(self.provider.value, {}),
+            **self.settings_config.get(model_name, {}),
+        }
+        known = {field.name for field in fields(FakeSettings)}
+        return FakeSettings(**{key: value for key, value in merged.items() if key in known})
+
+    async def chat_with_model(
+        self, model_name: str, messages: List[Dict[str, str]], api_key: Optional[str] = None, **kwargs,
+    ) -> Dict[str, Any]:
+        """Waits for the drawn latency and returns a result dict like the real service's."""
+        settings, rng = self.settings_for(model_name), self._rng(model_name)
+        self.calls += 1
+        ttft = draw_latency(rng, settings.ttft_ms / 1000, settings.latency_distribution, settings.latency_spread)
+        failed = rng.random() < settings.error_rate
+        if failed:
+            await asyncio.sleep(ttft)
+            return self._error(settings)
+        await asyncio.sleep(ttft + _generation_seconds(settings, settings.completion_tokens))
+        answer, usage = self._answer(model_name, messages, settings)
+        return {"answer": answer, "raw": self._raw(model_name, answer, usage), "usage": usage, "error": None}
+
+    async def stream_chat_with_model(
+        self, model_name: str, messages: List[Dict[str, str]], api_key: Optional[str] = None, **kwargs,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Yields delta events at the configured token rate, then a done event."""
+        settings, rng = self.settings_for(model_name), self._rng(model_name)
+        self.calls += 1
+        ttft = draw_latency(rng, settings.ttft_ms / 1000, settings.latency_distribution, settings.latency_spread)
+        failed = rng.random() < settings.error_rate
+        await asyncio.sleep(ttft)
+        if failed:
+            yield {"type": "done", "answer": None, "raw": None, "usage": None, **self._error(settings)}
+            return
+
+        answer, usage = self._answer(model_name, messages, settings)
+        words = answer.split(" ")
+        chunk = max(1, settings.stream_chunk_tokens)
+        for start in range(0, len(words), chunk):
+            if start:
+                await asyncio.sleep(_generation_seconds(settings, chunk))
+            yield {"type": "delta", "delta": (" " if start else "") + " ".join(words[start:start + chunk])}
+        yield {"type": "done", "answer": answer, "raw": None, "usage": usage, "error": None}
+
+    def _rng(self, model_name: str) -> random.Random:
+        rng = self._rngs.get(model_name)
+        if rng is None:
+            rng = self._rngs[model_name] = random.Random(f"{self.settings_for(model_name).seed}:{model_name}")
+        return rng
+
+    def _answer(self, model_name: str, messages: List[Dict[str, str]], settings: FakeSettings):
+        digest = hashlib.sha256(json.dumps([model_name, messages], sort_keys=True).encode()).digest()
+        text_rng = random.Random(digest)
+        answer = " ".join(text_rng.choice(WORDS) for _ in range(max(1, settings.completion_tokens)))
+        prompt_tokens = sum(count_message_tokens(message) for message in messages)
+        completion_tokens = max(1, settings.completion_tokens)
+        if self.provider == ModelProvider.GOOGLE:
+            usage = {"prompt_token_count": prompt_tokens, "candidates_token_count": completion_tokens,
+                     "total_token_count": prompt_tokens + completion_tokens}
+        else:
+            usage = {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                     "total_tokens": prompt_tokens + completion_tokens}
+            if self.provider == ModelProvider.GROQ:
+                generation = _generation_seconds(settings, completion_tokens)
+                usage.update({"queue_time": 0.0, "prompt_time": 0.0, "completion_time": generation,
+                              "total_time": generation})
+        return answer, usage
+
+    def _raw(self, model_name: str, answer: str, usage: Dict[str, Any]) -> Dict[str, Any]:
+        if self.provider == ModelProvider.GOOGLE:
+            return {
+                "candidates": [{
+                    "content": {"parts": [{"text": answer}], "role": "model"},
+                    "finish_reason": 1,
+                    "safety_ratings": [],
+                }],
+                "usage_metadata": usage,
+            }
+        return {
+            "id": f"chatcmpl-fake-{self.calls}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model_name,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": answer},
+                         "finish_reason": "stop"}],
+            "usage": usage,
+        }
+
+    def _error(self, settings: FakeSettings) -> Dict[str, Any]:
+        error_type = settings.error_type if settings.error_type in INJECTED_ERRORS else OTHER
+        status_code, message = INJECTED_ERRORS[error_type]
+        rate_limit = None
+        if error_type == RATE_LIMIT:
+            rate_limit = {"remaining_requests": 0.0, "remaining_tokens": None, "reset_requests_s": None,
+                          "reset_tokens_s": None, "retry_after_s": settings.retry_after_s}
+        return {"answer": None, "raw": None, "usage": None, "error": message,
+                "status_code": status_code, "error_type": error_type, "rate_limit": rate_limit}
+
+
+def _generation_seconds(settings: FakeSettings, tokens: int) -> float:
+    return tokens / settings.tokens_per_second if settings.tokens_per_second > 0 else 0.0
+
+
+_fake_providers: Optional[Dict[ModelProvider, FakeProvider]] = None
+
+
+def get_fake_provider(provider: ModelProvider) -> Optional[FakeProvider]:
+    """Returns the fake provider standing in for ``provider``, or None when it is disabled."""
+    global _fake_providers
+    if _fake_providers is None:
+        if os.getenv("FAKE_PROVIDER_ENABLED", "false").lower() != "true":
+            return None
+        settings_config = json.loads(os.getenv("FAKE_PROVIDER_SETTINGS", "{}") or "{}")
+        _fake_providers = {member: FakeProvider(member, settings_config) for member in ModelProvider}
+    return _fake_providers[provider]
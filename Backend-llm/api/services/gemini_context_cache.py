@@ -0,0 +1,145 @@
+"""
+Gemini Context Cache Module
+Serves long Gemini system instructions from Gemini's cached-content API.
+
+Every chat turn re-sends the same system prompts. When a system instruction
+is long enough, it is stored once as Gemini cached content and later
+requests use a model bound to that cache: the cached tokens skip prefill and
+are billed at the cached rate (reported as ``cached_content_token_count``).
+
+Handles are kept in-process per (API key, model, instruction) together with
+their expiry. A cache is recreated shortly before its TTL runs out; evicted
+caches are not deleted remotely and simply expire. If creating a cache fails
+(e.g. the instruction is under the model's minimum), the instruction is sent
+inline and the cache is not retried for a while.
+
+Configuration (environment variables):
+    GEMINI_CONTEXT_CACHE_ENABLED      "false" to disable (default on)
+    GEMINI_CONTEXT_CACHE_MIN_TOKENS   Shortest system instruction worth caching (default 4096)
+    GEMINI_CONTEXT_CACHE_TTL_SECONDS  Lifetime of each cached content (default 3600)
+    GEMINI_CONTEXT_CACHE_MAX_ENTRIES  Cache handles kept in-process (default 32)
+"""
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Any, Callable, Dict, Optional
+import asyncio
+import hashlib
+import logging
+import os
+import time
+
+from api.services.context_window import count_text_tokens
+from api.services.provider_clients import load_sdk
+
+logger = logging.getLogger(__name__)
+
+# Recreate a cache this long before it expires so no request races its expiry
+REFRESH_MARGIN_SECONDS = 60
+# Wait this long before retrying an instruction whose cache could not be created
+FAILURE_BACKOFF_SECONDS = 300
+
+
+@dataclass
+class CacheHandle:
+    """One Gemini cached content and the model bound to it."""
+    name: str
+    model: Any
+    expires_at: float
+
+
+def create_cached_model(model_name: str, system_instruction: str, ttl_seconds: float) -> CacheHandle:
+    """Creates Gemini cached content for ``system_instruction`` (blocking network call)."""
+    genai = load_sdk("google")
+    cached = genai.caching.CachedContent.create(
+        model=model_name, system_instruction=system_instruction, ttl=timedelta(seconds=ttl_seconds))
+    return CacheHandle(cached.name, genai.GenerativeModel.from_cached_content(cached),
+                       time.monotonic() + ttl_seconds)
+
+
+class GeminiContextCache:
+    """In-process registry of Gemini cached contents for system instructions."""
+
+    def __init__(self, min_tokens: int = 4096, ttl_seconds: float = 3600, max_entries: int = 32,
+                 create: Optional[Callable[[str, str, float], CacheHandle]] = None):
+        self.min_tokens = min_tokens
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._create = create or create_cached_model
+        self._handles: "OrderedDict[str, CacheHandle]" = OrderedDict()
+        self._failed_until: Dict[str, float] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self.hits = 0
+        self.created = 0
+        self.failures = 0
+
+    async def model(self, model_name: str, system_instruction: str, api_key: str = "") -> Optional[Any]:
+        """
+        Returns a ``GenerativeModel`` bound to cached content for ``system_instruction``.
+
+        Returns None when the instruction is too short to cache or its cache
+        could not be created; the caller then sends the instruction inline.
+        """
+        if count_text_tokens(system_instruction) < self.min_tokens:
+            return None
+        key = hashlib.sha256(f"{api_key}\0{model_name}\0{system_instruction}".encode("utf-8")).hexdigest()
+        handle = self._fresh(key)
+        if handle is not None:
+            self.hits += 1
+            return handle.model
+        if self._failed_until.get(key, 0) > time.monotonic():
+            return None
+
+        # One creation per instruction; concurrent requests wait for it
+        async with self._locks.setdefault(key, asyncio.Lock()):
+            handle = self._fresh(key)
+            if handle is None:
+                try:
+                    handle = await asyncio.to_thread(self._create, model_name, system_instruction, self.ttl_seconds)
+                except Exception as e:
+                    logger.warning("Could not create Gemini cached content for %s: %s", model_name, e)
+                    self.failures += 1
+                    self._failed_until[key] = time.monotonic() + FAILURE_BACKOFF_SECONDS
+                    return None
+                self.created += 1
+                self._handles[key] = handle
+                self._failed_until.pop(key, None)
+                while len(self._handles) > self.max_entries:
+                    evicted, _ = self._handles.popitem(last=False)
+                    self._locks.pop(evicted, None)
+            else:
+                self.hits += 1
+        return handle.model
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._handles),
+            "hits": self.hits,
+            "created": self.created,
+            "failures": self.failures,
+            "min_tokens": self.min_tokens,
+            "ttl_seconds": self.ttl_seconds,
+        }
+
+    def _fresh(self, key: str) -> Optional[CacheHandle]:
+        handle = self._handles.get(key)
+        if handle is None or handle.expires_at - REFRESH_MARGIN_SECONDS <= time.monotonic():
+            return None
+        self._handles.move_to_end(key)
+        return handle
+
+
+_context_cache: Optional[GeminiContextCache] = None
+
+
+def get_gemini_context_cache() -> Optional[GeminiContextCache]:
+    """Returns the process-wide Gemini context cache, or None when disabled."""
+    global _context_cache
+    if _context_cache is None and os.getenv("GEMINI_CONTEXT_CACHE_ENABLED", "true").lower() != "false":
+        _context_cache = GeminiContextCache(
+            min_tokens=int(os.getenv("GEMINI_CONTEXT_CACHE_MIN_TOKENS", "4096")),
+            ttl_seconds=float(os.getenv("GEMINI_CONTEXT_CACHE_TTL_SECONDS", "3600")),
+            max_entries=int(os.getenv("GEMINI_CONTEXT_CACHE_MAX_ENTRIES", "32")),
+        )
+    return _context_cache
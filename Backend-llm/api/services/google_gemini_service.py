@@ -1,17 +1,71 @@
 """
 Google Gemini Service Module
 Encapsulates all logic for Google Gemini chat, model selection, and error handling.
+
+System prompts are sent as Gemini's ``system_instruction`` (from the context
+cache when they are long) rather than as conversation turns, and assistant
+turns use Gemini's ``model`` role.
 """
 
-from typing import List, Dict, Any, Optional
+from typing import AsyncIterator, List, Dict, Any, Optional, Tuple
+import asyncio
 import os
 from dotenv import load_dotenv
-import google.generativeai as genai
+from api.services.provider_clients import get_provider_clients
+from api.services.provider_errors import describe_error
+from api.services.chat_messages import leading_system_prompts
+from api.services.gemini_context_cache import get_gemini_context_cache
 
 load_dotenv()
 
+# Gemini conversations only have user and model turns
+GEMINI_ROLES = {"assistant": "model"}
+
+
+def to_gemini_contents(messages: List[Dict[str, str]]) -> Tuple[Optional[str], List[Dict[str, Any]]]:
+    """
+    Splits OpenAI-style messages into a Gemini system instruction and contents.
+
+    The leading system messages (the request's system prompts) form the
+    system instruction, which is the same on every turn and can be served
+    from a context cache. A conversation summary or a system message inside
+    the history is sent as a user turn.
+    """
+    instruction = leading_system_prompts(messages)
+    contents = [
+        {"role": GEMINI_ROLES.get(message.get("role"), "user"), "parts": [message.get("content", "")]}
+        for message in messages[len(instruction):]
+    ]
+    return "\n\n".join(instruction) or None, contents
+
+
+async def gemini_model_for(clients, model_name: str, api_key: str, system_instruction: Optional[str]):
+    """Returns the model to call: bound to a context cache for long instructions, else inline."""
+    model = clients.gemini_model(model_name, api_key, system_instruction)
+    context_cache = get_gemini_context_cache()
+    if system_instruction and context_cache is not None:
+        return await context_cache.model(model_name, system_instruction, api_key) or model
+    return model
 
-def chat_with_model(
+
+def gemini_usage(usage_metadata) -> Dict[str, Any]:
+    """Converts Gemini ``usage_metadata`` to a dict, including tokens served from a context cache."""
+    return {
+        'prompt_token_count': usage_metadata.prompt_token_count,
+        'candidates_token_count': usage_metadata.candidates_token_count,
+        'total_token_count': usage_metadata.total_token_count,
+        'cached_content_token_count': getattr(usage_metadata, 'cached_content_token_count', 0) or 0,
+    }
+
+
+def gemini_request_options(clients, timeout: Optional[float] = None) -> Dict[str, Any]:
+    """Returns the pooled request options, with ``timeout`` (the request's remaining deadline) if set."""
+    if timeout is None:
+        return clients.gemini_request_options
+    return {**clients.gemini_request_options, "timeout": timeout}
+
+
+async def chat_with_model(
     model_name: str,
     messages: List[Dict[str, str]],
     api_key: Optional[str] = None,
@@ -20,6 +74,10 @@ def chat_with_model(
     """
     Sends a chat request to the Google Gemini API and returns the response.
 
+    Uses ``generate_content_async`` so the FastAPI event loop is never blocked
+    while waiting on the provider. The ``GenerativeModel`` is cached per model
+    name in the shared client registry.
+
     Args:
         model_name (str): The name of the Gemini model to use (e.g., 'gemini-2.5-pro').
         messages (List[Dict[str, str]]): List of message dicts in Gemini format.
@@ -28,6 +86,7 @@ def chat_with_model(
 
     Returns:
         Dict[str, Any]: Standardized response dict with answer, usage, and error info.
+        Failures also carry status_code, error_type and rate_limit hints.
     """
     if api_key is None:
         api_key = os.getenv("GOOGLE_API_KEY")
@@ -35,16 +94,13 @@ def chat_with_model(
         return {"error": "Google Gemini API key not provided."}
 
     try:
-        genai.configure(api_key=api_key)
-        model = genai.GenerativeModel(model_name)
+        clients = get_provider_clients()
         # Gemini expects a list of content blocks (dicts with 'role' and 'parts')
         # Convert OpenAI-style messages to Gemini format
-        gemini_messages = []
-        for msg in messages:
-            role = msg.get("role", "user")
-            content = msg.get("content", "")
-            gemini_messages.append({"role": role, "parts": [content]})
-        response = model.generate_content(gemini_messages, **kwargs)
+        system_instruction, gemini_messages = to_gemini_contents(messages)
+        model = await gemini_model_for(clients, model_name, api_key, system_instruction)
+        kwargs.setdefault("request_options", gemini_request_options(clients, kwargs.pop("timeout", None)))
+        response = await model.generate_content_async(gemini_messages, **kwargs)
         answer = response.text if hasattr(response, "text") else ""
 
         # Extract serializable raw response data
@@ -67,20 +123,13 @@ def chat_with_model(
                     }
                     for candidate in response.candidates
                 ],
-                'usage_metadata': {
-                    'prompt_token_count': response.usage_metadata.prompt_token_count,
-                    'candidates_token_count': response.usage_metadata.candidates_token_count,
-                    'total_token_count': response.usage_metadata.total_token_count,
-                } if hasattr(response, 'usage_metadata') else None,
+                'usage_metadata': gemini_usage(response.usage_metadata)
+                if hasattr(response, 'usage_metadata') else None,
             }
 
             # Convert usage_metadata to dict for Pydantic V2 serialization
             if hasattr(response, 'usage_metadata'):
-                usage_dict = {
-                    'prompt_token_count': response.usage_metadata.prompt_token_count,
-                    'candidates_token_count': response.usage_metadata.candidates_token_count,
-                    'total_token_count': response.usage_metadata.total_token_count,
-                }
+                usage_dict = gemini_usage(response.usage_metadata)
 
         return {
             "answer": answer,
@@ -93,17 +142,74 @@ def chat_with_model(
             "answer": None,
             "raw": None,
             "usage": None,
-            "error": str(e)
+            "error": str(e),
+            **describe_error(e),
         }
 
 
+async def stream_chat_with_model(
+    model_name: str,
+    messages: List[Dict[str, str]],
+    api_key: Optional[str] = None,
+    **kwargs
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Streams a chat response from the Google Gemini API as it is generated.
+
+    Yields ``{"type": "delta", "delta": str}`` for every text fragment and
+    finishes with one ``{"type": "done", ...}`` dict carrying the same answer,
+    usage and error keys as ``chat_with_model``.
+
+    Args:
+        model_name (str): The name of the Gemini model to use (e.g., 'gemini-2.5-flash').
+        messages (List[Dict[str, str]]): List of message dicts in OpenAI format.
+        api_key (Optional[str]): Gemini API key. If None, loads from environment.
+        **kwargs: Additional parameters for Gemini API.
+
+    Yields:
+        Dict[str, Any]: Delta events followed by a final standardized response dict.
+    """
+    if api_key is None:
+        api_key = os.getenv("GOOGLE_API_KEY")
+    if not api_key:
+        yield {"type": "done", "answer": None, "raw": None, "usage": None,
+               "error": "Google Gemini API key not provided."}
+        return
+
+    parts: List[str] = []
+    usage_dict = None
+    try:
+        clients = get_provider_clients()
+        system_instruction, gemini_messages = to_gemini_contents(messages)
+        model = await gemini_model_for(clients, model_name, api_key, system_instruction)
+        kwargs.setdefault("request_options", gemini_request_options(clients, kwargs.pop("timeout", None)))
+        response = await model.generate_content_async(gemini_messages, stream=True, **kwargs)
+        async for chunk in response:
+            text = "".join(
+                part.text for part in chunk.candidates[0].content.parts
+                if hasattr(part, "text")
+            ) if chunk.candidates else ""
+            if text:
+                parts.append(text)
+                yield {"type": "delta", "delta": text}
+            usage = getattr(chunk, "usage_metadata", None)
+            if usage:
+                usage_dict = gemini_usage(usage)
+
+        yield {"type": "done", "answer": "".join(parts), "raw": None,
+               "usage": usage_dict, "error": None}
+    except Exception as e:
+        yield {"type": "done", "answer": "".join(parts) or None, "raw": None,
+               "usage": usage_dict, "error": str(e), **describe_error(e)}
+
+
 if __name__ == "__main__":
     api_key = os.getenv("GOOGLE_API_KEY")
     model_name = "gemini-2.5-pro"  # Change as needed
     messages = [
         {"role": "user", "content": "Hello! What is the capital of France?"}
     ]
-    result = chat_with_model(model_name, messages, api_key=api_key)
+    result = asyncio.run(chat_with_model(model_name, messages, api_key=api_key))
     print("Google Gemini Service Test Result:")
     print(result)
 
@@ -111,5 +217,5 @@ if __name__ == "__main__":
 # messages = [
 #     {"role": "user", "content": "Hello!"}
 # ]
-# result = chat_with_model("gemini-2.5-pro", messages)
+# result = await chat_with_model("gemini-2.5-pro", messages)
 # print(result)
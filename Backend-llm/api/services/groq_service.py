@@ -3,20 +3,18 @@ Groq Service Module
 Encapsulates all logic for Groq chat, model selection, and error handling.
 """
 
-from typing import List, Dict, Any, Optional
+from typing import AsyncIterator, List, Dict, Any, Optional
+import asyncio
 import os
 from dotenv import load_dotenv
 
-try:
-    import groq
-except ImportError:
-    groq = None  # Will raise error if used without install
-
+from api.services.provider_clients import get_provider_clients, sdk_available
+from api.services.provider_errors import describe_error, parse_rate_limit_headers
 
 load_dotenv()
 
 
-def chat_with_model(
+async def chat_with_model(
     model_name: str,
     messages: List[Dict[str, str]],
     api_key: Optional[str] = None,
@@ -25,6 +23,10 @@ def chat_with_model(
     """
     Sends a chat request to the Groq API and returns the response.
 
+    Uses the async Groq client so the FastAPI event loop is never blocked
+    while waiting on the provider. The client comes from the shared
+    registry, so warm requests reuse pooled keep-alive connections.
+
     Args:
         model_name (str): The name of the Groq model to use (e.g., 'llama-3.1-8b-instant').
         messages (List[Dict[str, str]]): List of message dicts in OpenAI format.
@@ -33,8 +35,9 @@ def chat_with_model(
 
     Returns:
         Dict[str, Any]: Standardized response dict with answer, usage, and error info.
+        Failures also carry status_code, error_type and rate_limit hints.
     """
-    if groq is None:
+    if not sdk_available("groq"):
         return {"error": "Groq SDK not installed. Please install the 'groq' package."}
     if api_key is None:
         api_key = os.getenv("GROQ_API_KEY")
@@ -42,12 +45,13 @@ def chat_with_model(
         return {"error": "Groq API key not provided."}
 
     try:
-        client = groq.Groq(api_key=api_key)
-        response = client.chat.completions.create(
+        client = get_provider_clients().groq_client(api_key)
+        raw_response = await client.chat.completions.with_raw_response.create(
             model=model_name,
             messages=messages,
             **kwargs
         )
+        response = await raw_response.parse()
         answer = response.choices[0].message.content if response.choices else ""
 
         # Convert usage to dict if it exists (for Pydantic V2 serialization)
@@ -68,24 +72,89 @@ def chat_with_model(
             "answer": answer,
             "raw": response.model_dump() if hasattr(response, "model_dump") else response,
             "usage": usage_dict,
-            "error": None
+            "error": None,
+            "rate_limit": parse_rate_limit_headers(raw_response.headers),
         }
     except Exception as e:
         return {
             "answer": None,
             "raw": None,
             "usage": None,
-            "error": str(e)
+            "error": str(e),
+            **describe_error(e),
         }
 
 
+async def stream_chat_with_model(
+    model_name: str,
+    messages: List[Dict[str, str]],
+    api_key: Optional[str] = None,
+    **kwargs
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Streams a chat completion from the Groq API as it is generated.
+
+    Yields ``{"type": "delta", "delta": str}`` for every content fragment and
+    finishes with one ``{"type": "done", ...}`` dict carrying the same answer,
+    usage and error keys as ``chat_with_model``.
+
+    Args:
+        model_name (str): The name of the Groq model to use.
+        messages (List[Dict[str, str]]): List of message dicts in OpenAI format.
+        api_key (Optional[str]): Groq API key. If None, loads from environment.
+        **kwargs: Additional parameters for Groq API.
+
+    Yields:
+        Dict[str, Any]: Delta events followed by a final standardized response dict.
+    """
+    if not sdk_available("groq"):
+        yield {"type": "done", "answer": None, "raw": None, "usage": None,
+               "error": "Groq SDK not installed. Please install the 'groq' package."}
+        return
+    if api_key is None:
+        api_key = os.getenv("GROQ_API_KEY")
+    if not api_key:
+        yield {"type": "done", "answer": None, "raw": None, "usage": None,
+               "error": "Groq API key not provided."}
+        return
+
+    parts: List[str] = []
+    usage_dict = None
+    try:
+        client = get_provider_clients().groq_client(api_key)
+        raw_stream = await client.chat.completions.with_raw_response.create(
+            model=model_name,
+            messages=messages,
+            stream=True,
+            **kwargs
+        )
+        rate_limit = parse_rate_limit_headers(raw_stream.headers)
+        async for chunk in await raw_stream.parse():
+            usage_obj = getattr(chunk, "usage", None)
+            # Groq reports streamed usage under the x_groq extension on the last chunk
+            x_groq = getattr(chunk, "x_groq", None)
+            if usage_obj is None and x_groq is not None:
+                usage_obj = getattr(x_groq, "usage", None)
+            if usage_obj:
+                usage_dict = usage_obj.model_dump()
+            if chunk.choices and chunk.choices[0].delta.content:
+                parts.append(chunk.choices[0].delta.content)
+                yield {"type": "delta", "delta": chunk.choices[0].delta.content}
+
+        yield {"type": "done", "answer": "".join(parts), "raw": None,
+               "usage": usage_dict, "error": None, "rate_limit": rate_limit}
+    except Exception as e:
+        yield {"type": "done", "answer": "".join(parts) or None, "raw": None,
+               "usage": usage_dict, "error": str(e), **describe_error(e)}
+
+
 if __name__ == "__main__":
     api_key = os.getenv("GROQ_API_KEY")
     model_name = "llama-3.1-8b-instant"  # Change as needed
     messages = [
         {"role": "user", "content": "Hello! What is the capital of France?"}
     ]
-    result = chat_with_model(model_name, messages, api_key=api_key)
+    result = asyncio.run(chat_with_model(model_name, messages, api_key=api_key))
     print("Groq Service Test Result:")
     print(result)
 
@@ -93,5 +162,5 @@ if __name__ == "__main__":
 # messages = [
 #     {"role": "user", "content": "Hello!"}
 # ]
-# result = chat_with_model("llama-3.1-8b-instant", messages)
+# result = await chat_with_model("llama-3.1-8b-instant", messages)
 # print(result)
@@ -0,0 +1,253 @@
+"""
+Hedging Module
+Hedged provider requests to cut tail latency caused by occasional stragglers.
+
+A hedged request starts normally. If it has not finished (or, for streams,
+produced its first token) after the model's recent p95 latency, a duplicate
+is sent to the same model or to a configured equivalent. The first attempt
+to succeed wins and the other is cancelled.
+
+Hedges are capped by a budget: each request earns ``budget_percent / 100``
+of a hedge credit and each hedge spends one, so at most that share of
+traffic is duplicated even when a provider slows down across the board.
+
+Configuration (environment variables):
+    HEDGING_ENABLED                "true" to enable (default off)
+    HEDGE_PERCENTILE               Latency percentile that triggers a hedge (default 95)
+    HEDGE_BUDGET_PERCENT           Maximum share of requests that may be hedged (default 5)
+    HEDGE_MIN_DELAY_SECONDS        Never hedge sooner than this (default 1)
+    HEDGE_INITIAL_DELAY_SECONDS    Delay used until enough samples exist (default 10)
+    HEDGE_MIN_SAMPLES              Samples needed before the percentile is used (default 20)
+    HEDGE_EQUIVALENTS              JSON map of model to hedge model, e.g. '{"gemini-2.5-pro": "gpt-5"}'
+                                   (default: hedge to the same model)
+"""
+
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+import asyncio
+import json
+import os
+import time
+
+from api.pydantic_models import ModelName
+from api.services.latency_tracker import LatencyTracker, TOTAL, TTFT
+
+MAX_HEDGE_CREDIT = 10.0  # Largest burst of hedges the budget allows
+
+
+@dataclass
+class _StreamAttempt:
+    model_name: ModelName
+    iterator: AsyncIterator[Dict[str, Any]]
+    first: asyncio.Task
+    started: float
+
+
+async def _first_event(iterator: AsyncIterator[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    return await anext(iterator, None)
+
+
+class Hedger:
+    """Sends a duplicate request when the first one is slower than usual."""
+
+    def __init__(
+        self,
+        percentile: float = 95.0,
+        budget_percent: float = 5.0,
+        min_delay: float = 1.0,
+        initial_delay: float = 10.0,
+        min_samples: int = 20,
+        equivalents: Optional[Dict[str, str]] = None,
+        latencies: Optional[LatencyTracker] = None,
+    ):
+        self.percentile = percentile
+        self.budget_percent = budget_percent
+        self.min_delay = min_delay
+        self.initial_delay = initial_delay
+        self.min_samples = min_samples
+        self.equivalents = {ModelName(model): ModelName(hedge)
+                            for model, hedge in (equivalents or {}).items()}
+        self.latencies = latencies or LatencyTracker()
+        self.credit = 0.0
+        self._counters: Dict[str, Dict[str, int]] = {}
+
+    def hedge_delay(self, model_name: ModelName, kind: str = TOTAL) -> float:
+        """Seconds to wait before hedging: the model's recent percentile latency."""
+        window = self.latencies.window(model_name.value, kind)
+        if len(window) < self.min_samples:
+            return self.initial_delay
+        return max(self.min_delay, window.percentile(self.percentile))
+
+    def hedge_model(self, model_name: ModelName) -> ModelName:
+        return self.equivalents.get(model_name, model_name)
+
+    def _count_request(self, model_name: ModelName) -> Dict[str, int]:
+        counters = self._counters.setdefault(
+            model_name.value, {"requests": 0, "hedges": 0, "hedge_wins": 0, "budget_denied": 0})
+        counters["requests"] += 1
+        self.credit = min(MAX_HEDGE_CREDIT, self.credit + self.budget_percent / 100)
+        return counters
+
+    def _spend_hedge(self, counters: Dict[str, int]) -> bool:
+        if self.credit < 1:
+            counters["budget_denied"] += 1
+            return False
+        self.credit -= 1
+        counters["hedges"] += 1
+        return True
+
+    async def call(
+        self,
+        model_name: ModelName,
+        start: Callable[[ModelName], Awaitable[Dict[str, Any]]],
+    ) -> Dict[str, Any]:
+        """
+        Runs ``start(model_name)``, hedging it if it is slow.
+
+        Args:
+            model_name (ModelName): The requested model.
+            start (Callable): Starts one provider call for a model and returns its result dict.
+
+        Returns:
+            Dict[str, Any]: The first successful result (with ``served_by`` set when an
+            equivalent model answered), or the primary's error if every attempt failed.
+        """
+        counters = self._count_request(model_name)
+        started: Dict[asyncio.Task, tuple] = {}
+
+        def launch(target: ModelName) -> asyncio.Task:
+            task = asyncio.create_task(start(target))
+            started[task] = (target, time.monotonic())
+            return task
+
+        primary = launch(model_name)
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=self.hedge_delay(model_name, TOTAL))
+            if not done and self._spend_hedge(counters):
+                launch(self.hedge_model(model_name))
+
+            pending = set(started)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in sorted(done, key=lambda t: t is not primary):
+                    result = task.result()
+                    if result.get("error"):
+                        continue
+                    target, began = started[task]
+                    self.latencies.observe(target.value, time.monotonic() - began, TOTAL)
+                    if task is not primary:
+                        counters["hedge_wins"] += 1
+                    if target != model_name:
+                        result = {**result, "served_by": target.value}
+                    return result
+            return primary.result()
+        finally:
+            for task, (target, began) in started.items():
+                if not task.done():
+                    # The loser took at least this long; keep the straggler in the window
+                    self.latencies.observe(target.value, time.monotonic() - began, TOTAL)
+                    task.cancel()
+
+    async def stream(
+        self,
+        model_name: ModelName,
+        open_stream: Callable[[ModelName], AsyncIterator[Dict[str, Any]]],
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streaming counterpart of ``call``, hedging on time to first token.
+
+        The attempt that produces the first text (or a successful ``done``)
+        wins and is streamed to the end; the other stream is closed.
+        """
+        counters = self._count_request(model_name)
+        attempts: List[_StreamAttempt] = []
+
+        def launch(target: ModelName):
+            iterator = open_stream(target)
+            attempts.append(_StreamAttempt(
+                target, iterator, asyncio.create_task(_first_event(iterator)), time.monotonic()))
+
+        launch(model_name)
+        try:
+            done, _ = await asyncio.wait({attempts[0].first}, timeout=self.hedge_delay(model_name, TTFT))
+            if not done and self._spend_hedge(counters):
+                launch(self.hedge_model(model_name))
+
+            winner = None
+            pending = {attempt.first: attempt for attempt in attempts}
+            while pending and winner is None:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in sorted(done, key=lambda t: t is not attempts[0].first):
+                    attempt = pending.pop(task)
+                    event = task.result()
+                    if event is not None and not event.get("error"):
+                        winner = attempt
+                        break
+            if winner is None:
+                winner = attempts[0]  # Every attempt failed before producing text
+            else:
+                self.latencies.observe(winner.model_name.value, time.monotonic() - winner.started, TTFT)
+                if winner is not attempts[0]:
+                    counters["hedge_wins"] += 1
+
+            for attempt in attempts:
+                if attempt is not winner:
+                    await self._close(attempt)
+
+            def tag(event: Dict[str, Any]) -> Dict[str, Any]:
+                if event["type"] == "done" and winner.model_name != model_name:
+                    return {**event, "served_by": winner.model_name.value}
+                return event
+
+            event = winner.first.result()
+            if event is None:
+                return
+            yield tag(event)
+            if event["type"] == "delta":
+                async for event in winner.iterator:
+                    yield tag(event)
+        finally:
+            for attempt in attempts:
+                await self._close(attempt)
+
+    async def _close(self, attempt: _StreamAttempt):
+        if not attempt.first.done():
+            self.latencies.observe(attempt.model_name.value, time.monotonic() - attempt.started, TTFT)
+            attempt.first.cancel()
+        await asyncio.gather(attempt.first, return_exceptions=True)
+        await attempt.iterator.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hedge counts and wins per model, with the current hedge delays."""
+        models = {}
+        for model, counters in self._counters.items():
+            model_name = ModelName(model)
+            models[model] = {
+                **counters,
+                "hedge_delay_ms": round(self.hedge_delay(model_name, TOTAL) * 1000, 1),
+                "stream_hedge_delay_ms": round(self.hedge_delay(model_name, TTFT) * 1000, 1),
+            }
+        return {
+            "percentile": self.percentile,
+            "budget_percent": self.budget_percent,
+            "hedge_credit": round(self.credit, 2),
+            "models": models,
+        }
+
+
+_hedger: Optional[Hedger] = None
+
+
+def get_hedger() -> Optional[Hedger]:
+    """Returns the process-wide hedger, or None when hedging is disabled."""
+    global _hedger
+    if _hedger is None and os.getenv("HEDGING_ENABLED", "false").lower() == "true":
+        _hedger = Hedger(
+            percentile=float(os.getenv("HEDGE_PERCENTILE", "95")),
+            budget_percent=float(os.getenv("HEDGE_BUDGET_PERCENT", "5")),
+            min_delay=float(os.getenv("HEDGE_MIN_DELAY_SECONDS", "1")),
+            initial_delay=float(os.getenv("HEDGE_INITIAL_DELAY_SECONDS", "10")),
+            min_samples=int(os.getenv("HEDGE_MIN_SAMPLES", "20")),
+            equivalents=json.loads(os.getenv("HEDGE_EQUIVALENTS", "{}") or "{}"),
+        )
+    return _hedger
@@ -0,0 +1,290 @@
+"""
+Job Queue Module
+Asynchronous chat jobs for generations that outlive a proxy timeout.
+
+A job is submitted, gets an id back immediately and runs on a local worker
+pool; the caller polls (or long-polls) for the result and can cancel it.
+Jobs live in a SQLite table, so with ``JOB_QUEUE_PATH`` set, queued jobs
+survive a restart and jobs that were running when the process stopped are
+queued again. Finished results are kept for a TTL and then purged.
+
+Long-polling waits on in-process events. With several processes sharing a
+queue file, a waiter on another process sees the result on its next poll.
+SQLite statements run in worker threads so the event loop never waits on
+the database.
+
+Configuration (environment variables):
+    JOB_QUEUE_PATH          SQLite file backing the queue (default: in memory)
+    JOB_WORKERS             Jobs run concurrently (default 4)
+    JOB_RESULT_TTL_SECONDS  How long finished results are kept (default 3600)
+    JOB_TIMEOUT_SECONDS     Per-job provider timeout (default 600)
+"""
+
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+from api.pydantic_models import JobInfo, JobStatus, ModelName, QueryResponse, SingleModelChatRequest
+from api.services.chat_service import execute_chat
+
+JobRunner = Callable[[ModelName, SingleModelChatRequest, Optional[float]], Awaitable[QueryResponse]]
+
+
+class JobStore:
+    """SQLite-backed job table. Every transition is a single committed statement."""
+
+    def __init__(self, path: str = ":memory:"):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id TEXT PRIMARY KEY, model TEXT NOT NULL, request TEXT NOT NULL,"
+            " status TEXT NOT NULL, response TEXT, created_at REAL NOT NULL,"
+            " started_at REAL, finished_at REAL, expires_at REAL)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)")
+        self._conn.commit()
+
+    def add(self, job_id: str, model_name: ModelName, request_body: SingleModelChatRequest) -> JobInfo:
+        """Queues a job and returns it as inserted."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, model, request, status, created_at) VALUES (?, ?, ?, ?, ?)",
+                (job_id, model_name.value, request_body.model_dump_json(), JobStatus.QUEUED.value, time.time()))
+            self._conn.commit()
+            return self._select(job_id)
+
+    def claim_next(self) -> Optional[Dict[str, Any]]:
+        """Marks the oldest queued job as running and returns it, or None if none is queued."""
+        with self._lock:
+            row = self._conn.execute(
+                "UPDATE jobs SET status = ?, started_at = ? WHERE id = ("
+                " SELECT id FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1)"
+                " RETURNING id, model, request",
+                (JobStatus.RUNNING.value, time.time(), JobStatus.QUEUED.value)).fetchone()
+            self._conn.commit()
+        if row is None:
+            return None
+        return {"id": row[0], "model": ModelName(row[1]),
+                "request": SingleModelChatRequest.model_validate_json(row[2])}
+
+    def finish(self, job_id: str, status: JobStatus, ttl_seconds: float,
+               response: Optional[QueryResponse] = None) -> bool:
+        """Records a job's outcome. Returns False if the job had already finished."""
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ?, response = ?, finished_at = ?, expires_at = ?"
+                " WHERE id = ? AND status IN (?, ?)",
+                (status.value, response.model_dump_json() if response is not None else None,
+                 now, now + ttl_seconds, job_id, JobStatus.QUEUED.value, JobStatus.RUNNING.value))
+            self._conn.commit()
+        return cursor.rowcount == 1
+
+    def get(self, job_id: str) -> Optional[JobInfo]:
+        """Returns the job, or None if it does not exist or its result has expired."""
+        with self._lock:
+            return self._select(job_id)
+
+    def _select(self, job_id: str) -> Optional[JobInfo]:
+        row = self._conn.execute(
+            "SELECT id, model, status, response, created_at, started_at, finished_at, expires_at"
+            " FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None or (row[7] is not None and row[7] <= time.time()):
+            return None
+        return JobInfo(
+            job_id=row[0], model=row[1], status=row[2],
+            response=QueryResponse.model_validate_json(row[3]) if row[3] else None,
+            created_at=_timestamp(row[4]), started_at=_timestamp(row[5]),
+            finished_at=_timestamp(row[6]), expires_at=_timestamp(row[7]))
+
+    def requeue_running(self) -> int:
+        """Queues jobs left running by a previous process again. Returns how many."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ?, started_at = NULL WHERE status = ?",
+                (JobStatus.QUEUED.value, JobStatus.RUNNING.value))
+            self._conn.commit()
+        return cursor.rowcount
+
+    def purge_expired(self) -> int:
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM jobs WHERE expires_at <= ?", (time.time(),))
+            self._conn.commit()
+        return cursor.rowcount
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {status.value: 0 for status in JobStatus} | dict(rows)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def _timestamp(seconds: Optional[float]) -> Optional[datetime]:
+    return datetime.fromtimestamp(seconds, timezone.utc) if seconds is not None else None
+
+
+class JobQueue:
+    """
+    A worker pool draining a ``JobStore``.
+
+    Workers are asyncio tasks started on the running event loop, either at
+    application startup or by the first submission. Each job runs in its own
+    task so cancelling a job does not stop its worker. Store calls are run
+    with ``asyncio.to_thread``.
+    """
+
+    def __init__(
+        self,
+        store: Optional[JobStore] = None,
+        workers: int = 4,
+        result_ttl_seconds: float = 3600.0,
+        job_timeout: Optional[float] = 600.0,
+        runner: Optional[JobRunner] = None,
+    ):
+        self.store = store or JobStore()
+        self.workers = workers
+        self.result_ttl_seconds = result_ttl_seconds
+        self.job_timeout = job_timeout
+        self._runner = runner or (lambda model_name, request_body, timeout: execute_chat(
+            model_name, request_body, timeout=timeout))
+        self._worker_tasks: List[asyncio.Task] = []
+        self._running: Dict[str, asyncio.Task] = {}
+        self._finished: Dict[str, Set[asyncio.Event]] = {}  # One event per long-poll waiting on a job
+        self._wakeup: Optional[asyncio.Event] = None
+        self._resumed: Optional[asyncio.Task] = None
+
+    async def start(self) -> int:
+        """Starts the workers if they are not running. Returns jobs resumed from a previous run."""
+        if self._worker_tasks:
+            return 0
+        # Workers wait for the requeue so they never claim a job it is about to reset
+        self._resumed = asyncio.create_task(asyncio.to_thread(self.store.requeue_running))
+        self._wakeup = asyncio.Event()
+        self._wakeup.set()
+        self._worker_tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+        return await asyncio.shield(self._resumed)
+
+    async def stop(self):
+        """Cancels the workers. Jobs still running are queued again on the next start."""
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+
+    async def submit(self, model_name: ModelName, request_body: SingleModelChatRequest) -> JobInfo:
+        """Queues a chat request and returns the new job."""
+        await self.start()
+        job_id = uuid.uuid4().hex
+        job = await asyncio.to_thread(self.store.add, job_id, model_name, request_body)
+        self._wakeup.set()
+        return job
+
+    async def get(self, job_id: str) -> Optional[JobInfo]:
+        return await asyncio.to_thread(self.store.get, job_id)
+
+    async def wait(self, job_id: str, timeout: float) -> Optional[JobInfo]:
+        """Returns the job once it has finished, or as it is after ``timeout`` seconds."""
+        if timeout <= 0:
+            return await self.get(job_id)
+        # Registered before the first read so a job finishing meanwhile still wakes us
+        finished = asyncio.Event()
+        waiters = self._finished.setdefault(job_id, set())
+        waiters.add(finished)
+        try:
+            job = await self.get(job_id)
+            if job is None or job.status.finished:
+                return job
+            try:
+                await asyncio.wait_for(finished.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        finally:
+            waiters.discard(finished)
+            if not waiters and self._finished.get(job_id) is waiters:
+                del self._finished[job_id]
+        return await self.get(job_id)
+
+    async def cancel(self, job_id: str) -> Optional[JobInfo]:
+        """Cancels a queued or running job. Finished jobs are returned unchanged."""
+        if await asyncio.to_thread(self.store.finish, job_id, JobStatus.CANCELLED, self.result_ttl_seconds):
+            task = self._running.get(job_id)
+            if task is not None:
+                task.cancel()
+            self._notify(job_id)
+        return await self.get(job_id)
+
+    async def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "running_here": len(self._running),
+            "result_ttl_seconds": self.result_ttl_seconds,
+            "jobs": await asyncio.to_thread(self.store.counts),
+        }
+
+    async def _work(self):
+        await asyncio.shield(self._resumed)
+        while True:
+            self._wakeup.clear()  # Cleared before claiming so a submission in between is not missed
+            job = await asyncio.to_thread(self.store.claim_next)
+            if job is None:
+                await asyncio.to_thread(self.store.purge_expired)
+                await self._wakeup.wait()
+                continue
+            task = asyncio.create_task(self._runner(job["model"], job["request"], self.job_timeout))
+            self._running[job["id"]] = task
+            try:
+                await asyncio.wait([task])  # Returns when the job ends, even if it was cancelled
+            finally:
+                self._running.pop(job["id"], None)
+                task.cancel()  # No-op unless the worker itself is being stopped
+            if task.cancelled():
+                continue
+            response = task.exception() or task.result()
+            if isinstance(response, BaseException):
+                now = datetime.now(timezone.utc)
+                response = QueryResponse(
+                    error_message=str(response), session_id=job["request"].session_id,
+                    model=job["model"], provider=job["model"].get_provider(),
+                    request_timestamp=now, response_timestamp=now, latency_ms=0.0)
+            await asyncio.to_thread(
+                self.store.finish, job["id"], JobStatus.COMPLETED, self.result_ttl_seconds, response)
+            self._notify(job["id"])
+
+    def _notify(self, job_id: str):
+        for finished in self._finished.pop(job_id, ()):
+            finished.set()
+
+
+_job_queue: Optional[JobQueue] = None
+
+
+def get_job_queue() -> JobQueue:
+    """Returns the process-wide job queue, created from the ``JOB_*`` settings."""
+    global _job_queue
+    if _job_queue is None:
+        _job_queue = JobQueue(
+            store=JobStore(os.getenv("JOB_QUEUE_PATH") or ":memory:"),
+            workers=int(os.getenv("JOB_WORKERS", "4")),
+            result_ttl_seconds=float(os.getenv("JOB_RESULT_TTL_SECONDS", "3600")),
+            job_timeout=float(os.getenv("JOB_TIMEOUT_SECONDS", "600")),
+        )
+    return _job_queue
+
+
+async def close_job_queue():
+    """Stops the workers and closes the store. Called at application shutdown."""
+    global _job_queue
+    if _job_queue is not None:
+        await _job_queue.stop()
+        _job_queue.store.close()
+        _job_queue = None
@@ -0,0 +1,57 @@
+"""
+Latency Tracker Module
+Rolling per-model latency samples and percentiles, kept in process.
+
+Two kinds of samples are tracked per model: ``total`` (whole non-streaming
+call) and ``ttft`` (time to the first streamed token). Each is a fixed-size
+window of the most recent samples, so percentiles follow current provider
+behaviour rather than the whole process lifetime.
+"""
+
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+import math
+
+TOTAL = "total"
+TTFT = "ttft"
+
+
+class LatencyWindow:
+    """The most recent ``size`` latency samples, in seconds."""
+
+    def __init__(self, size: int = 200):
+        self.samples: Deque[float] = deque(maxlen=size)
+
+    def add(self, seconds: float):
+        self.samples.append(seconds)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Returns the nearest-rank ``q``-th percentile, or None without samples."""
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        rank = max(1, math.ceil(q / 100 * len(ordered)))
+        return ordered[rank - 1]
+
+    def __len__(self) -> int:
+        return len(self.samples)
+
+
+class LatencyTracker:
+    """Latency windows keyed by (model, kind)."""
+
+    def __init__(self, window_size: int = 200):
+        self.window_size = window_size
+        self._windows: Dict[Tuple[str, str], LatencyWindow] = {}
+
+    def window(self, model_name: str, kind: str = TOTAL) -> LatencyWindow:
+        key = (model_name, kind)
+        if key not in self._windows:
+            self._windows[key] = LatencyWindow(self.window_size)
+        return self._windows[key]
+
+    def observe(self, model_name: str, seconds: float, kind: str = TOTAL):
+        self.window(model_name, kind).add(seconds)
+
+    def percentile(self, model_name: str, q: float, kind: str = TOTAL) -> Optional[float]:
+        return self.window(model_name, kind).percentile(q)
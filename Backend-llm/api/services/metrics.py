@@ -0,0 +1,173 @@
+"""
+Metrics Module
+Prometheus metrics for chat requests and provider calls, served at ``GET /metrics``.
+
+Two latencies are recorded per provider/model so a regression can be placed
+on our side or the provider's:
+    * ``backend_llm_request_latency_seconds``: the whole request as the caller
+      sees it (queueing, hedging and failover included), plus time to first
+      token for streams.
+    * ``backend_llm_provider_call_latency_seconds``: each individual provider
+      call (non-streaming).
+
+Requests, errors by class (timeout, rate_limit, auth, other), prompt,
+cached prompt and completion tokens and in-flight requests are tracked as
+well. Requests abandoned before they completed are counted in
+``backend_llm_cancelled_requests`` by reason: ``deadline`` (also reported as
+a timeout error) or ``client`` (the caller disconnected or cancelled; these
+are not counted as requests at all). Updates are in-process counter
+increments, cheap enough to leave on in production.
+
+Requests are labelled with the model that actually served them.
+
+Configuration (environment variables):
+    METRICS_ENABLED   "false" to disable (default on; needs ``prometheus-client``)
+"""
+
+from contextlib import contextmanager
+from typing import Any, Awaitable, Dict, Iterator, Optional, Tuple
+import os
+import time
+
+try:
+    from prometheus_client import (
+        CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest,
+    )
+except ImportError:
+    CollectorRegistry = None  # Metrics are disabled without prometheus-client
+
+from api.pydantic_models import ModelName
+from api.services.provider_errors import AUTH, CONNECTION, OTHER, RATE_LIMIT, TIMEOUT
+
+# LLM calls range from sub-second cache-like answers to multi-minute generations
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 15.0, 30.0, 60.0, 120.0, 300.0)
+TTFT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 4.0, 8.0, 15.0, 30.0)
+ERROR_CLASSES = (TIMEOUT, RATE_LIMIT, AUTH, CONNECTION, OTHER)
+
+# Why a request was abandoned before it completed
+DEADLINE = "deadline"
+CLIENT = "client"
+
+
+def usage_tokens(usage: Optional[Dict[str, Any]]) -> Tuple[Optional[int], Optional[int]]:
+    """Returns (prompt, completion) tokens from an OpenAI/Groq or Gemini usage dict."""
+    if not usage:
+        return None, None
+    prompt = usage.get("prompt_tokens", usage.get("prompt_token_count"))
+    completion = usage.get("completion_tokens", usage.get("candidates_token_count"))
+    return prompt, completion
+
+
+def cached_prompt_tokens(usage: Optional[Dict[str, Any]]) -> int:
+    """Returns the prompt tokens served from the provider's prompt or context cache."""
+    if not usage:
+        return 0
+    details = usage.get("prompt_tokens_details") or {}
+    return details.get("cached_tokens") or usage.get("cached_content_token_count") or 0
+
+
+class ChatMetrics:
+    """The Backend-llm metric families, registered in their own registry."""
+
+    def __init__(self):
+        self.registry = CollectorRegistry()
+        labels = ["provider", "model"]
+        self.requests = Counter(
+            "backend_llm_requests", "Chat requests completed.",
+            labels + ["cached"], registry=self.registry)
+        self.errors = Counter(
+            "backend_llm_request_errors", "Chat requests that returned an error, by error class.",
+            labels + ["error_class"], registry=self.registry)
+        self.latency = Histogram(
+            "backend_llm_request_latency_seconds", "End-to-end chat request latency.",
+            labels, buckets=LATENCY_BUCKETS, registry=self.registry)
+        self.time_to_first_token = Histogram(
+            "backend_llm_time_to_first_token_seconds", "Time to the first streamed token.",
+            labels, buckets=TTFT_BUCKETS, registry=self.registry)
+        self.provider_latency = Histogram(
+            "backend_llm_provider_call_latency_seconds", "Latency of individual provider calls.",
+            labels, buckets=LATENCY_BUCKETS, registry=self.registry)
+        self.prompt_tokens = Counter(
+            "backend_llm_prompt_tokens", "Prompt tokens reported by providers.",
+            labels, registry=self.registry)
+        self.cached_prompt_tokens = Counter(
+            "backend_llm_cached_prompt_tokens", "Prompt tokens served from provider prompt caches.",
+            labels, registry=self.registry)
+        self.completion_tokens = Counter(
+            "backend_llm_completion_tokens", "Completion tokens reported by providers.",
+            labels, registry=self.registry)
+        self.cancelled = Counter(
+            "backend_llm_cancelled_requests", "Chat requests abandoned before completing, by reason.",
+            labels + ["reason"], registry=self.registry)
+        self.in_flight_requests = Gauge(
+            "backend_llm_in_flight_requests", "Chat requests currently waiting on a provider.",
+            labels, registry=self.registry)
+
+    @contextmanager
+    def in_flight(self, model_name: ModelName) -> Iterator[None]:
+        """Counts a request as in flight for the duration of the block."""
+        gauge = self.in_flight_requests.labels(model_name.get_provider().value, model_name.value)
+        gauge.inc()
+        try:
+            yield
+        finally:
+            gauge.dec()
+
+    def observe_request(
+        self,
+        model_name: ModelName,
+        result: Dict[str, Any],
+        latency: float,
+        time_to_first_token: Optional[float] = None,
+        cached: bool = False,
+    ):
+        """Records one completed chat request against the model that served it."""
+        served = ModelName(result.get("served_by") or model_name.value)
+        labels = (served.get_provider().value, served.value)
+        self.requests.labels(*labels, "true" if cached else "false").inc()
+        if result.get("error"):
+            error_class = result.get("error_type")
+            self.errors.labels(*labels, error_class if error_class in ERROR_CLASSES else OTHER).inc()
+        if cached:
+            return
+        self.latency.labels(*labels).observe(latency)
+        if time_to_first_token is not None:
+            self.time_to_first_token.labels(*labels).observe(time_to_first_token)
+        prompt, completion = usage_tokens(result.get("usage"))
+        if prompt:
+            self.prompt_tokens.labels(*labels).inc(prompt)
+        if completion:
+            self.completion_tokens.labels(*labels).inc(completion)
+        cached_prompt = cached_prompt_tokens(result.get("usage"))
+        if cached_prompt:
+            self.cached_prompt_tokens.labels(*labels).inc(cached_prompt)
+
+    def observe_cancelled(self, model_name: ModelName, reason: str):
+        """Records one request abandoned because of its ``deadline`` or its ``client``."""
+        self.cancelled.labels(model_name.get_provider().value, model_name.value, reason).inc()
+
+    async def observe_provider_call(
+        self, model_name: ModelName, call: Awaitable[Dict[str, Any]],
+    ) -> Dict[str, Any]:
+        """Awaits one provider call and records its latency."""
+        started = time.perf_counter()
+        result = await call
+        self.provider_latency.labels(model_name.get_provider().value, model_name.value).observe(
+            time.perf_counter() - started)
+        return result
+
+    def render(self) -> Tuple[bytes, str]:
+        """Returns the exposition text and its content type."""
+        return generate_latest(self.registry), CONTENT_TYPE_LATEST
+
+
+_metrics: Optional[ChatMetrics] = None
+
+
+def get_metrics() -> Optional[ChatMetrics]:
+    """Returns the process-wide metrics, or None when disabled or prometheus-client is missing."""
+    global _metrics
+    if (_metrics is None and CollectorRegistry is not None
+            and os.getenv("METRICS_ENABLED", "true").lower() != "false"):
+        _metrics = ChatMetrics()
+    return _metrics
@@ -0,0 +1,185 @@
+"""
+Model Router Module
+Latency-aware routing of the ``auto`` pseudo-models to a concrete model.
+
+Every completed chat request records its model's total latency, time to
+first token (streams) and success in rolling in-process windows. An ``auto``
+request is routed to the candidate with the lowest expected latency: the
+recent percentile latency, inflated by the recent error rate. Candidates
+whose provider circuit breaker is open are skipped, and so are candidates
+whose recent error rate is above the maximum (failures the breaker does not
+count, such as a 404 for a model the account cannot use, still count here).
+A model whose recent requests all failed has no usable latency and ranks last.
+
+Models without enough completed requests are tried first, and a small share
+of requests explores the other candidates so a model that recovers wins
+traffic back.
+
+Configuration (environment variables):
+    AUTO_MODEL_TIERS            JSON map of tier to candidate models, e.g.
+                                '{"fast": ["gpt-nano", "llama-3.1-8b-instant"]}'
+                                (default: the FAST_MODELS / QUALITY_MODELS below)
+    AUTO_ROUTING_PERCENTILE     Latency percentile compared between models (default 90)
+    AUTO_ROUTING_WINDOW         Recent requests kept per model (default 200)
+    AUTO_ROUTING_MIN_SAMPLES    Completed requests before a model is ranked (default 5)
+    AUTO_ROUTING_EXPLORE_RATE   Share of requests sent to a random candidate (default 0.05)
+    AUTO_ROUTING_MAX_ERROR_RATE Recent error rate above which a model is avoided (default 0.5)
+"""
+
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+import json
+import math
+import os
+import random
+
+from api.pydantic_models import AutoModel, ModelName
+from api.services.circuit_breaker import OPEN, get_circuit_breakers
+from api.services.latency_tracker import LatencyTracker, TOTAL, TTFT
+
+FAST_MODELS = [
+    ModelName.GPT_NANO,
+    ModelName.GEMINI_2_5_FLASH_LITE,
+    ModelName.GEMINI_2_5_FLASH,
+    ModelName.LLAMA_3_1_8B_INSTANT,
+]
+QUALITY_MODELS = [
+    ModelName.GPT_5,
+    ModelName.GEMINI_2_5_PRO,
+    ModelName.LLAMA_3_3_70B_VERSATILE,
+]
+MIN_SUCCESS_RATE = 0.05  # Caps the error penalty so a failing model's score stays finite
+
+
+class ModelRouter:
+    """Rolling per-model latency and error windows, and the ``auto`` model choice."""
+
+    def __init__(
+        self,
+        tiers: Optional[Dict[str, List[str]]] = None,
+        percentile: float = 90.0,
+        window_size: int = 200,
+        min_samples: int = 5,
+        explore_rate: float = 0.05,
+        max_error_rate: float = 0.5,
+    ):
+        tiers = {"fast": FAST_MODELS, "quality": QUALITY_MODELS, **(tiers or {})}
+        self.tiers = {tier: [ModelName(model) for model in models] for tier, models in tiers.items()}
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.explore_rate = explore_rate
+        self.max_error_rate = max_error_rate
+        self.latencies = LatencyTracker(window_size)
+        self._errors: Dict[str, Deque[bool]] = {}
+        self._window_size = window_size
+        self.routed: Dict[str, Dict[str, int]] = {}
+
+    def candidates(self, auto_model: AutoModel) -> List[ModelName]:
+        """The tier's models, or every model for plain ``auto``."""
+        if auto_model.tier is None:
+            return list(ModelName)
+        return self.tiers[auto_model.tier]
+
+    def observe(self, model_name: ModelName, latency: float, failed: bool,
+                time_to_first_token: Optional[float] = None):
+        """Records one completed request for ``model_name``."""
+        if not failed:
+            self.latencies.observe(model_name.value, latency, TOTAL)
+            if time_to_first_token is not None:
+                self.latencies.observe(model_name.value, time_to_first_token, TTFT)
+        errors = self._errors.setdefault(model_name.value, deque(maxlen=self._window_size))
+        errors.append(failed)
+
+    def error_rate(self, model_name: ModelName) -> float:
+        errors = self._errors.get(model_name.value)
+        return sum(errors) / len(errors) if errors else 0.0
+
+    def attempts(self, model_name: ModelName) -> int:
+        """Completed requests, successful or failed, in the model's recent window."""
+        return len(self._errors.get(model_name.value, ()))
+
+    def expected_latency(self, model_name: ModelName, streaming: bool = False) -> Optional[float]:
+        """
+        Recent percentile latency divided by the success rate, in seconds.
+
+        Streams compare time to first token when it has been measured. Returns
+        None while the model has too few completed requests, and infinity when
+        none of its recent requests succeeded.
+        """
+        if self.attempts(model_name) < self.min_samples:
+            return None
+        window = self.latencies.window(model_name.value, TTFT if streaming else TOTAL)
+        if len(window) < self.min_samples:
+            window = self.latencies.window(model_name.value, TOTAL)
+        if not window:
+            return math.inf
+        return window.percentile(self.percentile) / max(MIN_SUCCESS_RATE, 1 - self.error_rate(model_name))
+
+    def choose(self, auto_model: AutoModel, streaming: bool = False) -> ModelName:
+        """Picks the concrete model that should serve an ``auto`` request now."""
+        candidates = self.candidates(auto_model)
+        breakers = get_circuit_breakers()
+        if breakers is not None:
+            healthy = [m for m in candidates if breakers.breaker(m.get_provider().value).state != OPEN]
+            candidates = healthy or candidates
+        reliable = [m for m in candidates if self.attempts(m) < self.min_samples
+                    or self.error_rate(m) <= self.max_error_rate]
+        ranked = reliable or candidates
+
+        unmeasured = [m for m in candidates if self.expected_latency(m, streaming) is None]
+        if unmeasured:
+            choice = random.choice(unmeasured)
+        elif random.random() < self.explore_rate:
+            choice = random.choice(candidates)
+        else:
+            choice = min(ranked, key=lambda m: self.expected_latency(m, streaming))
+
+        routed = self.routed.setdefault(auto_model.value, {})
+        routed[choice.value] = routed.get(choice.value, 0) + 1
+        return choice
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-model latency percentiles, attempts and error rates, and routing counts per pseudo-model."""
+        models = {}
+        for model_name in ModelName:
+            total = self.latencies.window(model_name.value, TOTAL)
+            ttft = self.latencies.window(model_name.value, TTFT)
+            if not total and model_name.value not in self._errors:
+                continue
+            models[model_name.value] = {
+                "samples": len(total),
+                "attempts": self.attempts(model_name),
+                "error_rate": round(self.error_rate(model_name), 3),
+                "p50_ms": _ms(total.percentile(50)),
+                f"p{self.percentile:g}_ms": _ms(total.percentile(self.percentile)),
+                "ttft_p50_ms": _ms(ttft.percentile(50)),
+                f"ttft_p{self.percentile:g}_ms": _ms(ttft.percentile(self.percentile)),
+            }
+        return {
+            "percentile": self.percentile,
+            "tiers": {tier: [m.value for m in tier_models] for tier, tier_models in self.tiers.items()},
+            "models": models,
+            "routed": self.routed,
+        }
+
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return round(seconds * 1000, 1) if seconds is not None else None
+
+
+_model_router: Optional[ModelRouter] = None
+
+
+def get_model_router() -> ModelRouter:
+    """Returns the process-wide model router."""
+    global _model_router
+    if _model_router is None:
+        _model_router = ModelRouter(
+            tiers=json.loads(os.getenv("AUTO_MODEL_TIERS", "{}") or "{}"),
+            percentile=float(os.getenv("AUTO_ROUTING_PERCENTILE", "90")),
+            window_size=int(os.getenv("AUTO_ROUTING_WINDOW", "200")),
+            min_samples=int(os.getenv("AUTO_ROUTING_MIN_SAMPLES", "5")),
+            explore_rate=float(os.getenv("AUTO_ROUTING_EXPLORE_RATE", "0.05")),
+            max_error_rate=float(os.getenv("AUTO_ROUTING_MAX_ERROR_RATE", "0.5")),
+        )
+    return _model_router
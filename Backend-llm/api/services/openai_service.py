@@ -3,15 +3,34 @@ OpenAI Service Module
 Encapsulates all logic for OpenAI chat, model selection, and error handling.
 """
 
-from typing import List, Dict, Any, Optional
+from typing import AsyncIterator, List, Dict, Any, Optional
+import asyncio
+import hashlib
 import os
 from dotenv import load_dotenv
-import openai
+
+from api.services.provider_clients import get_provider_clients
+from api.services.provider_errors import describe_error, parse_rate_limit_headers
+from api.services.chat_messages import leading_system_prompts
 
 load_dotenv()
 
 
-def chat_with_model(
+def prompt_cache_key(messages: List[Dict[str, str]]) -> Optional[str]:
+    """
+    Returns a key shared by every request that starts with the same system prompts.
+
+    OpenAI caches prompt prefixes automatically; the key routes requests
+    sharing a prefix to the same cache, which keeps hit rates up when many
+    sessions use the same long system prompts.
+    """
+    prompts = leading_system_prompts(messages)
+    if not prompts:
+        return None
+    return hashlib.sha256("\0".join(prompts).encode("utf-8")).hexdigest()[:32]
+
+
+async def chat_with_model(
     model_name: str,
     messages: List[Dict[str, str]],
     api_key: Optional[str] = None,
@@ -20,6 +39,10 @@ def chat_with_model(
     """
     Sends a chat request to the OpenAI API and returns the response.
 
+    Uses the async OpenAI client so the FastAPI event loop is never blocked
+    while waiting on the provider. The client comes from the shared
+    registry, so warm requests reuse pooled keep-alive connections.
+
     Args:
         model_name (str): The name of the OpenAI model to use (e.g., 'gpt-5').
         messages (List[Dict[str, str]]): List of message dicts in OpenAI format.
@@ -28,20 +51,24 @@ def chat_with_model(
 
     Returns:
         Dict[str, Any]: Standardized response dict with answer, usage, and error info.
+        Failures also carry status_code, error_type and rate_limit hints.
     """
     if api_key is None:
         api_key = os.getenv("OPENAI_API_KEY")
     if not api_key:
         return {"error": "OpenAI API key not provided."}
-    openai.api_key = api_key
 
+    cache_key = prompt_cache_key(messages)
+    if cache_key:
+        kwargs.setdefault("prompt_cache_key", cache_key)
     try:
-        # For openai>=1.0.0, use openai.chat.completions.create
-        response = openai.chat.completions.create(
+        client = get_provider_clients().openai_client(api_key)
+        raw_response = await client.chat.completions.with_raw_response.create(
             model=model_name,
             messages=messages,
             **kwargs
         )
+        response = raw_response.parse()
         answer = response.choices[0].message.content if response.choices else ""
 
         # Convert usage to dict if it exists (for Pydantic V2 serialization)
@@ -62,17 +89,78 @@ def chat_with_model(
             "answer": answer,
             "raw": response.model_dump() if hasattr(response, "model_dump") else response,
             "usage": usage_dict,
-            "error": None
+            "error": None,
+            "rate_limit": parse_rate_limit_headers(raw_response.headers),
         }
     except Exception as e:
         return {
             "answer": None,
             "raw": None,
             "usage": None,
-            "error": str(e)
+            "error": str(e),
+            **describe_error(e),
         }
 
 
+async def stream_chat_with_model(
+    model_name: str,
+    messages: List[Dict[str, str]],
+    api_key: Optional[str] = None,
+    **kwargs
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Streams a chat completion from the OpenAI API as it is generated.
+
+    Yields ``{"type": "delta", "delta": str}`` for every content fragment and
+    finishes with one ``{"type": "done", ...}`` dict carrying the same answer,
+    usage and error keys as ``chat_with_model``.
+
+    Args:
+        model_name (str): The name of the OpenAI model to use.
+        messages (List[Dict[str, str]]): List of message dicts in OpenAI format.
+        api_key (Optional[str]): OpenAI API key. If None, loads from environment.
+        **kwargs: Additional parameters for OpenAI API.
+
+    Yields:
+        Dict[str, Any]: Delta events followed by a final standardized response dict.
+    """
+    if api_key is None:
+        api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        yield {"type": "done", "answer": None, "raw": None, "usage": None,
+               "error": "OpenAI API key not provided."}
+        return
+
+    parts: List[str] = []
+    usage_dict = None
+    cache_key = prompt_cache_key(messages)
+    if cache_key:
+        kwargs.setdefault("prompt_cache_key", cache_key)
+    try:
+        client = get_provider_clients().openai_client(api_key)
+        raw_stream = await client.chat.completions.with_raw_response.create(
+            model=model_name,
+            messages=messages,
+            stream=True,
+            stream_options={"include_usage": True},
+            **kwargs
+        )
+        rate_limit = parse_rate_limit_headers(raw_stream.headers)
+        async for chunk in raw_stream.parse():
+            usage_obj = getattr(chunk, "usage", None)
+            if usage_obj:
+                usage_dict = usage_obj.model_dump()
+            if chunk.choices and chunk.choices[0].delta.content:
+                parts.append(chunk.choices[0].delta.content)
+                yield {"type": "delta", "delta": chunk.choices[0].delta.content}
+
+        yield {"type": "done", "answer": "".join(parts), "raw": None,
+               "usage": usage_dict, "error": None, "rate_limit": rate_limit}
+    except Exception as e:
+        yield {"type": "done", "answer": "".join(parts) or None, "raw": None,
+               "usage": usage_dict, "error": str(e), **describe_error(e)}
+
+
 if __name__ == "__main__":
     api_key = os.getenv("OPENAI_API_KEY")
     model_name = "gpt-5"  # Change as needed
@@ -80,7 +168,7 @@ if __name__ == "__main__":
         {"role": "system", "content": "You are a helpful assistant."},
         {"role": "user", "content": "Hello! What is the capital of France?"}
     ]
-    result = chat_with_model(model_name, messages, api_key=api_key)
+    result = asyncio.run(chat_with_model(model_name, messages, api_key=api_key))
     print("OpenAI Service Test Result:")
     print(result)
 
@@ -89,5 +177,5 @@ if __name__ == "__main__":
 #     {"role": "system", "content": "You are a helpful assistant."},
 #     {"role": "user", "content": "Hello!"}
 # ]
-# result = chat_with_model("gpt-5", messages)
+# result = await chat_with_model("gpt-5", messages)
 # print(result)
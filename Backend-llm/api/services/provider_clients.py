@@ -0,0 +1,270 @@
+"""
+Provider Clients Module
+Long-lived, pooled SDK clients shared by every chat request.
+
+The registry is created once in the FastAPI lifespan and closed on shutdown.
+Each provider gets its own keep-alive HTTP connection pool so a warm request
+reuses an open TLS connection instead of paying for client construction and
+a new handshake on every chat turn.
+
+Pool limits and timeouts are tunable per provider through environment variables:
+    {PROVIDER}_MAX_CONNECTIONS            (default 200)
+    {PROVIDER}_MAX_KEEPALIVE_CONNECTIONS  (default 50)
+    {PROVIDER}_KEEPALIVE_EXPIRY_SECONDS   (default 60)
+    {PROVIDER}_CONNECT_TIMEOUT_SECONDS    (default 10)
+    {PROVIDER}_TIMEOUT_SECONDS            (default 600)
+where {PROVIDER} is OPENAI, GROQ or GOOGLE (Google only uses the timeout).
+
+Provider SDKs are imported on first use of that provider rather than at
+startup: ``google.generativeai`` alone pulls in protobuf and gRPC and costs
+about a second of cold start. ``prewarm_sdks`` imports them in a background
+thread once the app is serving, so the first request usually finds them loaded.
+    PROVIDER_SDK_PREWARM  "false" to skip the background import (default on)
+"""
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from types import ModuleType
+from typing import TYPE_CHECKING, Dict, Iterable, Optional
+import asyncio
+import hashlib
+import importlib
+import importlib.util
+import os
+import threading
+import time
+
+import httpx
+
+if TYPE_CHECKING:
+    import google.generativeai as genai
+    import groq
+    import openai
+
+# SDK module behind each provider, imported by load_sdk on first use
+PROVIDER_SDKS = {
+    "openai": "openai",
+    "google": "google.generativeai",
+    "groq": "groq",
+}
+PROVIDER_API_KEYS = {
+    "openai": "OPENAI_API_KEY",
+    "google": "GOOGLE_API_KEY",
+    "groq": "GROQ_API_KEY",
+}
+
+# Gemini models kept per (model, system instruction); a model only holds its configuration
+GEMINI_MODEL_CACHE_SIZE = 256
+
+_sdks: Dict[str, ModuleType] = {}
+_sdk_locks = {provider: threading.Lock() for provider in PROVIDER_SDKS}
+# Seconds spent importing each SDK, for startup diagnostics
+sdk_import_seconds: Dict[str, float] = {}
+
+
+def load_sdk(provider: str) -> ModuleType:
+    """
+    Returns the SDK module for ``provider``, importing it on first use.
+
+    Safe to call from the background prewarm thread and the event loop at
+    the same time; the import runs once and callers wait for it to finish.
+    Raises ImportError if the SDK is not installed.
+    """
+    module = _sdks.get(provider)
+    if module is not None:
+        return module
+    with _sdk_locks[provider]:
+        module = _sdks.get(provider)
+        if module is None:
+            started = time.perf_counter()
+            module = importlib.import_module(PROVIDER_SDKS[provider])
+            sdk_import_seconds[provider] = time.perf_counter() - started
+            _sdks[provider] = module
+    return module
+
+
+def sdk_available(provider: str) -> bool:
+    """True if the provider's SDK is installed, checked without importing it."""
+    if provider in _sdks:
+        return True
+    try:
+        return importlib.util.find_spec(PROVIDER_SDKS[provider]) is not None
+    except ModuleNotFoundError:
+        return False
+
+
+async def prewarm_sdks(providers: Optional[Iterable[str]] = None):
+    """
+    Imports provider SDKs in a worker thread so the event loop keeps serving.
+
+    Defaults to the providers whose API key is configured. Missing SDKs are
+    skipped; the request that needs one reports the error.
+    """
+    if providers is None:
+        providers = [provider for provider, key in PROVIDER_API_KEYS.items() if os.getenv(key)]
+    for provider in providers:
+        if provider not in _sdks and sdk_available(provider):
+            await asyncio.to_thread(load_sdk, provider)
+
+
+@dataclass(frozen=True)
+class PoolSettings:
+    """Connection pool limits and timeouts for one provider."""
+    max_connections: int = 200
+    max_keepalive_connections: int = 50
+    keepalive_expiry: float = 60.0
+    connect_timeout: float = 10.0
+    timeout: float = 600.0
+
+    @classmethod
+    def from_env(cls, provider: str) -> "PoolSettings":
+        """Reads ``{PROVIDER}_*`` overrides from the environment."""
+        prefix = provider.upper()
+        defaults = cls()
+        return cls(
+            max_connections=int(os.getenv(
+                f"{prefix}_MAX_CONNECTIONS", defaults.max_connections)),
+            max_keepalive_connections=int(os.getenv(
+                f"{prefix}_MAX_KEEPALIVE_CONNECTIONS", defaults.max_keepalive_connections)),
+            keepalive_expiry=float(os.getenv(
+                f"{prefix}_KEEPALIVE_EXPIRY_SECONDS", defaults.keepalive_expiry)),
+            connect_timeout=float(os.getenv(
+                f"{prefix}_CONNECT_TIMEOUT_SECONDS", defaults.connect_timeout)),
+            timeout=float(os.getenv(
+                f"{prefix}_TIMEOUT_SECONDS", defaults.timeout)),
+        )
+
+    def limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+
+    def timeouts(self) -> httpx.Timeout:
+        return httpx.Timeout(self.timeout, connect=self.connect_timeout)
+
+
+class ProviderClients:
+    """
+    Registry of long-lived provider clients.
+
+    Clients are created on first use per API key and kept for the lifetime of
+    the registry. Gemini ``GenerativeModel`` instances are cached per model name.
+    """
+
+    def __init__(self):
+        self.openai_settings = PoolSettings.from_env("openai")
+        self.groq_settings = PoolSettings.from_env("groq")
+        self.google_settings = PoolSettings.from_env("google")
+        self._openai_clients: Dict[str, "openai.AsyncOpenAI"] = {}
+        self._groq_clients: Dict[str, "groq.AsyncGroq"] = {}
+        self._gemini_api_key: Optional[str] = None
+        self._gemini_models: "OrderedDict[str, genai.GenerativeModel]" = OrderedDict()
+
+    def openai_client(self, api_key: str) -> "openai.AsyncOpenAI":
+        """Returns the pooled async OpenAI client for ``api_key``."""
+        client = self._openai_clients.get(api_key)
+        if client is None:
+            openai = load_sdk("openai")
+            client = openai.AsyncOpenAI(
+                api_key=api_key,
+                timeout=self.openai_settings.timeouts(),
+                http_client=openai.DefaultAsyncHttpxClient(
+                    limits=self.openai_settings.limits(),
+                    timeout=self.openai_settings.timeouts(),
+                ),
+            )
+            self._openai_clients[api_key] = client
+        return client
+
+    def groq_client(self, api_key: str) -> "groq.AsyncGroq":
+        """Returns the pooled async Groq client for ``api_key``."""
+        client = self._groq_clients.get(api_key)
+        if client is None:
+            if not sdk_available("groq"):
+                raise RuntimeError(
+                    "Groq SDK not installed. Please install the 'groq' package.")
+            groq = load_sdk("groq")
+            client = groq.AsyncGroq(
+                api_key=api_key,
+                timeout=self.groq_settings.timeouts(),
+                http_client=groq.DefaultAsyncHttpxClient(
+                    limits=self.groq_settings.limits(),
+                    timeout=self.groq_settings.timeouts(),
+                ),
+            )
+            self._groq_clients[api_key] = client
+        return client
+
+    def gemini_model(self, model_name: str, api_key: str,
+                     system_instruction: Optional[str] = None) -> "genai.GenerativeModel":
+        """
+        Returns a cached ``GenerativeModel`` for ``model_name`` and ``system_instruction``.
+
+        ``genai.configure`` is global to the SDK, so it only runs when the API
+        key changes rather than on every request. Models with a system
+        instruction are kept in a bounded LRU keyed by a hash of it.
+        """
+        genai = load_sdk("google")
+        if api_key != self._gemini_api_key:
+            genai.configure(api_key=api_key)
+            self._gemini_api_key = api_key
+            self._gemini_models.clear()
+
+        key = model_name
+        if system_instruction:
+            key += ":" + hashlib.sha256(system_instruction.encode("utf-8")).hexdigest()
+        model = self._gemini_models.get(key)
+        if model is None:
+            model = genai.GenerativeModel(model_name, system_instruction=system_instruction or None)
+            self._gemini_models[key] = model
+            while len(self._gemini_models) > GEMINI_MODEL_CACHE_SIZE:
+                self._gemini_models.popitem(last=False)
+        else:
+            self._gemini_models.move_to_end(key)
+        return model
+
+    @property
+    def gemini_request_options(self) -> Dict[str, float]:
+        """Per-request options applied to every Gemini generation call."""
+        return {"timeout": self.google_settings.timeout}
+
+    async def aclose(self):
+        """Closes every pooled HTTP client."""
+        for client in list(self._openai_clients.values()) + list(self._groq_clients.values()):
+            await client.close()
+        self._openai_clients.clear()
+        self._groq_clients.clear()
+        self._gemini_models.clear()
+
+
+_provider_clients: Optional[ProviderClients] = None
+
+
+def get_provider_clients() -> ProviderClients:
+    """
+    Returns the process-wide client registry.
+
+    The registry is normally created by the app lifespan; it is created lazily
+    here so the service modules still work when called directly (e.g. scripts).
+    """
+    global _provider_clients
+    if _provider_clients is None:
+        _provider_clients = ProviderClients()
+    return _provider_clients
+
+
+def init_provider_clients() -> ProviderClients:
+    """Creates a fresh registry. Called once at application startup."""
+    global _provider_clients
+    _provider_clients = ProviderClients()
+    return _provider_clients
+
+
+async def close_provider_clients():
+    """Closes the registry's connection pools. Called at application shutdown."""
+    global _provider_clients
+    if _provider_clients is not None:
+        await _provider_clients.aclose()
+        _provider_clients = None
@@ -0,0 +1,105 @@
+"""
+Provider Errors Module
+Classifies provider failures and reads rate-limit headers.
+
+The service modules still report failures as an ``error`` string, but also
+attach the HTTP status, an error class and any rate-limit hints so that the
+rate limiter (and anything else on the call path) can react to them.
+"""
+
+from typing import Any, Dict, Optional
+import asyncio
+import re
+
+# Error classes attached to failed results as ``error_type``
+TIMEOUT = "timeout"
+RATE_LIMIT = "rate_limit"
+AUTH = "auth"
+CONNECTION = "connection"
+OTHER = "other"
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_SECONDS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """
+    Parses a reset duration such as ``"1s"``, ``"6m0s"`` or ``"20ms"`` into seconds.
+
+    Bare numbers are treated as seconds (``Retry-After`` style).
+    """
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * _DURATION_SECONDS[unit] for amount, unit in parts)
+
+
+def parse_rate_limit_headers(headers: Any) -> Optional[Dict[str, Optional[float]]]:
+    """
+    Extracts OpenAI/Groq style ``x-ratelimit-*`` and ``retry-after`` headers.
+
+    Returns:
+        Dict with remaining_requests, remaining_tokens, reset_requests_s,
+        reset_tokens_s and retry_after_s (any may be None), or None if the
+        response carried no rate-limit headers.
+    """
+    if headers is None:
+        return None
+
+    def number(name: str) -> Optional[float]:
+        value = headers.get(name)
+        try:
+            return float(value) if value is not None else None
+        except ValueError:
+            return None
+
+    info = {
+        "remaining_requests": number("x-ratelimit-remaining-requests"),
+        "remaining_tokens": number("x-ratelimit-remaining-tokens"),
+        "reset_requests_s": parse_duration(headers.get("x-ratelimit-reset-requests")),
+        "reset_tokens_s": parse_duration(headers.get("x-ratelimit-reset-tokens")),
+        "retry_after_s": parse_duration(headers.get("retry-after")),
+    }
+    return info if any(value is not None for value in info.values()) else None
+
+
+def classify_error(status_code: Optional[int], exc: Optional[BaseException] = None) -> str:
+    """Maps a failure to one of TIMEOUT, RATE_LIMIT, AUTH, CONNECTION or OTHER."""
+    if status_code == 429:
+        return RATE_LIMIT
+    if status_code in (401, 403):
+        return AUTH
+    if status_code in (408, 504) or isinstance(exc, (asyncio.TimeoutError, TimeoutError)):
+        return TIMEOUT
+    if exc is not None and "timeout" in type(exc).__name__.lower():
+        return TIMEOUT  # openai.APITimeoutError, groq.APITimeoutError
+    if exc is not None and (isinstance(exc, ConnectionError) or any(
+            name in cls.__name__.lower() for cls in type(exc).__mro__ for name in ("connect", "transport"))):
+        return CONNECTION  # openai/groq APIConnectionError, httpx.ConnectError and other transport errors
+    return OTHER
+
+
+def describe_error(exc: BaseException) -> Dict[str, Any]:
+    """
+    Returns the extra result keys describing a provider exception.
+
+    Returns:
+        Dict with ``status_code``, ``error_type`` and ``rate_limit``.
+    """
+    status_code = getattr(exc, "status_code", None)
+    if status_code is None:
+        code = getattr(exc, "code", None)  # google.api_core exceptions (HTTPStatus)
+        status_code = int(code) if isinstance(code, int) else None
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    return {
+        "status_code": status_code,
+        "error_type": classify_error(status_code, exc),
+        "rate_limit": parse_rate_limit_headers(headers),
+    }
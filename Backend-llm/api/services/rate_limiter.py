@@ -0,0 +1,436 @@
+"""
+Rate Limiter Module
+Per-model request governor: RPM/TPM token buckets, a concurrency cap and 429 backoff.
+
+Every provider call goes through the limiter for its model. Provider-wide
+RPM/TPM limits are one budget that every model of that provider draws from,
+so calls spread over several models cannot exceed it; a model entry adds its
+own, tighter, budget on top. A request that
+finds no capacity is queued until capacity frees up instead of being sent
+to the provider (and rejected there). It only fails if it cannot start
+within the queue timeout.
+
+The limiter adapts to the provider:
+    * ``x-ratelimit-remaining-*`` headers at zero block the model until the
+      matching ``x-ratelimit-reset-*`` time, and remaining counts shrink the
+      local buckets so several replicas do not overshoot together.
+    * A 429 blocks the model for ``Retry-After`` (or a jittered exponential
+      backoff) and the request is retried while its deadline allows.
+
+Token reservations use the prompt token estimate and are corrected with the
+reported usage once the call completes.
+
+Configuration (environment variables):
+    RATE_LIMITER_ENABLED              "false" to disable (default on)
+    RATE_LIMITS                       JSON limits keyed by model, provider or "default", e.g.
+                                      '{"openai": {"rpm": 500, "tpm": 200000, "concurrency": 32},
+                                        "gpt-5": {"tpm": 30000}}'
+                                      Provider rpm/tpm (or "default" for providers without an
+                                      entry) are shared by all of the provider's models; model
+                                      rpm/tpm apply to that model only. Concurrency is per model,
+                                      looked up by model, then provider, then "default".
+                                      Unset rpm/tpm means unlimited.
+    RATE_LIMIT_QUEUE_TIMEOUT_SECONDS  Longest a request waits for capacity (default 30)
+    RATE_LIMIT_MAX_RETRIES            Retries after a 429 within the deadline (default 3)
+"""
+
+from contextlib import aclosing
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional
+import asyncio
+import json
+import os
+import random
+import time
+
+from api.services.provider_errors import RATE_LIMIT
+
+DEFAULT_CONCURRENCY = 200  # Matches the default provider connection pool size
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_MAX_SECONDS = 60.0
+
+
+@dataclass
+class RateLimits:
+    """Configured limits for one model. ``None`` means unlimited."""
+    rpm: Optional[float] = None
+    tpm: Optional[float] = None
+    concurrency: int = DEFAULT_CONCURRENCY
+
+
+class TokenBucket:
+    """
+    A per-minute token bucket that hands out reservations.
+
+    ``reserve`` always succeeds and returns how long the caller must wait for
+    its reservation to be covered; the balance may go negative meanwhile, so
+    queued callers are served in arrival order.
+    """
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self._updated: Optional[float] = None
+
+    def _refill(self, now: float):
+        if self._updated is not None:
+            self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, amount: float, now: float) -> float:
+        """Takes ``amount`` tokens and returns the seconds until they are available."""
+        self._refill(now)
+        self.tokens -= min(amount, self.capacity)
+        return max(0.0, -self.tokens / self.rate)
+
+    def refund(self, amount: float):
+        """Returns tokens taken by a reservation that was not used (or was over-estimated)."""
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+    def limit_to(self, remaining: float, now: float):
+        """Lowers the balance to a provider-reported remaining count."""
+        self._refill(now)
+        self.tokens = min(self.tokens, remaining)
+
+
+class RequestBudget:
+    """RPM and TPM buckets for one model or one provider. ``None`` limits are unlimited."""
+
+    def __init__(self, rpm: Optional[float] = None, tpm: Optional[float] = None):
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+
+    def reserve(self, token_cost: float, now: float) -> float:
+        """Reserves one request and ``token_cost`` tokens; returns the seconds until both are covered."""
+        wait = 0.0
+        if self.requests is not None:
+            wait = max(wait, self.requests.reserve(1, now))
+        if self.tokens is not None:
+            wait = max(wait, self.tokens.reserve(token_cost, now))
+        return wait
+
+    def refund(self, requests: float, tokens: float):
+        if self.requests is not None:
+            self.requests.refund(requests)
+        if self.tokens is not None:
+            self.tokens.refund(tokens)
+
+
+class QueueTimeout(Exception):
+    """Raised internally when a request cannot start before its deadline."""
+
+
+class ModelLimiter:
+    """Buckets, concurrency cap, backoff window and counters for one model."""
+
+    def __init__(self, limits: RateLimits, provider_budget: Optional[RequestBudget] = None):
+        self.limits = limits
+        self.budget = RequestBudget(limits.rpm, limits.tpm)
+        self.provider_budget = provider_budget
+        self._budgets = [self.budget] + ([provider_budget] if provider_budget is not None else [])
+        self.semaphore = asyncio.Semaphore(limits.concurrency)
+        self.blocked_until = 0.0
+        self.queue_depth = 0
+        self.in_flight = 0
+        self.started = 0
+        self.queued = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.rate_limited = 0
+        self.retries = 0
+        self.rejected = 0
+
+    async def acquire(self, estimated_tokens: int, deadline: float):
+        """
+        Waits for the backoff window, model and provider bucket reservations and a concurrency slot.
+
+        Raises:
+            QueueTimeout: If the request cannot start before ``deadline``.
+        """
+        start = time.monotonic()
+        token_cost = float(estimated_tokens)
+        reserved = False
+        self.queue_depth += 1
+        try:
+            while self.blocked_until > time.monotonic():
+                if self.blocked_until > deadline:
+                    raise QueueTimeout
+                await asyncio.sleep(self.blocked_until - time.monotonic())
+
+            now = time.monotonic()
+            wait = max(budget.reserve(token_cost, now) for budget in self._budgets)
+            reserved = True
+            if now + wait > deadline:
+                raise QueueTimeout
+            if wait > 0:
+                await asyncio.sleep(wait)
+
+            if self.semaphore.locked():
+                try:
+                    await asyncio.wait_for(self.semaphore.acquire(), max(0.0, deadline - time.monotonic()))
+                except asyncio.TimeoutError:
+                    raise QueueTimeout from None
+            else:
+                await self.semaphore.acquire()
+        except BaseException as e:
+            if reserved:
+                self._refund(token_cost)
+            if isinstance(e, QueueTimeout):
+                self.rejected += 1
+            raise
+        finally:
+            self.queue_depth -= 1
+
+        waited = time.monotonic() - start
+        self.started += 1
+        self.in_flight += 1
+        if waited > 0.001:
+            self.queued += 1
+        self.total_wait += waited
+        self.max_wait = max(self.max_wait, waited)
+
+    def release(self):
+        self.in_flight -= 1
+        self.semaphore.release()
+
+    def observe(self, result: Dict[str, Any], estimated_tokens: int):
+        """Corrects token reservations with reported usage and applies rate-limit hints."""
+        now = time.monotonic()
+        usage = result.get("usage") or {}
+        used_tokens = usage.get("total_tokens", usage.get("total_token_count"))  # OpenAI/Groq, Gemini
+        for budget in self._budgets:
+            if result.get("error"):
+                budget.refund(0, estimated_tokens)
+            elif used_tokens is not None:
+                budget.refund(0, estimated_tokens - used_tokens)
+
+        # Reported remaining counts tighten the model's own buckets, or the provider's if it has none
+        hints = result.get("rate_limit") or {}
+        shared = self.provider_budget or RequestBudget()
+        for remaining_key, reset_key, bucket in (
+                ("remaining_requests", "reset_requests_s", self.budget.requests or shared.requests),
+                ("remaining_tokens", "reset_tokens_s", self.budget.tokens or shared.tokens)):
+            remaining = hints.get(remaining_key)
+            if remaining is None:
+                continue
+            if bucket is not None:
+                bucket.limit_to(remaining, now)
+            if remaining <= 0 and hints.get(reset_key):
+                self.blocked_until = max(self.blocked_until, now + hints[reset_key])
+
+    def back_off(self, result: Dict[str, Any], attempt: int) -> float:
+        """Blocks the model after a 429 and returns the delay applied."""
+        self.rate_limited += 1
+        retry_after = (result.get("rate_limit") or {}).get("retry_after_s")
+        if retry_after:
+            delay = retry_after
+        else:
+            ceiling = min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt)
+            delay = ceiling / 2 + random.uniform(0, ceiling / 2)
+        now = time.monotonic()
+        self.blocked_until = max(self.blocked_until, now + delay)
+        return delay
+
+    def _refund(self, token_cost: float):
+        for budget in self._budgets:
+            budget.refund(1, token_cost)
+
+    def stats(self) -> Dict[str, Any]:
+        blocked_for = self.blocked_until - time.monotonic()
+        return {
+            "rpm": self.limits.rpm,
+            "tpm": self.limits.tpm,
+            "concurrency": self.limits.concurrency,
+            "queue_depth": self.queue_depth,
+            "in_flight": self.in_flight,
+            "requests": self.started,
+            "queued_requests": self.queued,
+            "avg_wait_ms": round(self.total_wait / self.started * 1000, 2) if self.started else 0.0,
+            "max_wait_ms": round(self.max_wait * 1000, 2),
+            "rate_limited": self.rate_limited,
+            "retries": self.retries,
+            "rejected": self.rejected,
+            "blocked_for_s": round(max(0.0, blocked_for), 3),
+        }
+
+
+class RateLimiter:
+    """Routes provider calls through per-model limiters."""
+
+    def __init__(
+        self,
+        limits_config: Optional[Dict[str, Dict[str, Any]]] = None,
+        queue_timeout: float = 30.0,
+        max_retries: int = 3,
+    ):
+        self.limits_config = limits_config or {}
+        self.queue_timeout = queue_timeout
+        self.max_retries = max_retries
+        self._limiters: Dict[str, Dict[str, ModelLimiter]] = {}
+        self._provider_budgets: Dict[str, RequestBudget] = {}
+
+    def provider_limits(self, provider: str) -> RateLimits:
+        """The provider's shared rpm/tpm: its own entry, or "default" if it has none."""
+        entry = self.limits_config.get(provider, self.limits_config.get("default", {}))
+        return RateLimits(rpm=entry.get("rpm"), tpm=entry.get("tpm"))
+
+    def limits_for(self, provider: str, model_name: str) -> RateLimits:
+        """The model's own rpm/tpm, and its concurrency merged from "default", provider and model entries."""
+        model_entry = self.limits_config.get(model_name, {})
+        merged = {
+            **self.limits_config.get("default", {}),
+            **self.limits_config.get(provider, {}),
+            **model_entry,
+        }
+        return RateLimits(
+            rpm=model_entry.get("rpm"),
+            tpm=model_entry.get("tpm"),
+            concurrency=int(merged.get("concurrency", DEFAULT_CONCURRENCY)),
+        )
+
+    def limiter(self, provider: str, model_name: str) -> ModelLimiter:
+        models = self._limiters.setdefault(provider, {})
+        if model_name not in models:
+            if provider not in self._provider_budgets:
+                limits = self.provider_limits(provider)
+                self._provider_budgets[provider] = RequestBudget(limits.rpm, limits.tpm)
+            models[model_name] = ModelLimiter(
+                self.limits_for(provider, model_name), self._provider_budgets[provider])
+        return models[model_name]
+
+    async def call(
+        self,
+        provider: str,
+        model_name: str,
+        call: Callable[[], Awaitable[Dict[str, Any]]],
+        estimated_tokens: int = 0,
+    ) -> Dict[str, Any]:
+        """
+        Runs ``call`` once the model has capacity, retrying after 429 responses.
+
+        Args:
+            provider (str): Provider name, e.g. "openai".
+            model_name (str): Model name, e.g. "gpt-5".
+            call (Callable): Starts the provider call and returns its result dict.
+            estimated_tokens (int): Prompt tokens to reserve from the TPM bucket.
+
+        Returns:
+            Dict[str, Any]: The provider result, or a rate-limit error result if
+            the request could not start within the queue timeout.
+        """
+        limiter = self.limiter(provider, model_name)
+        deadline = time.monotonic() + self.queue_timeout
+        attempt = 0
+        while True:
+            try:
+                await limiter.acquire(estimated_tokens, deadline)
+            except QueueTimeout:
+                return self._queue_timeout_result(model_name)
+            try:
+                result = await call()
+            finally:
+                limiter.release()
+            limiter.observe(result, estimated_tokens)
+            if not self._should_retry(limiter, result, attempt, deadline):
+                return result
+            attempt += 1
+
+    async def stream(
+        self,
+        provider: str,
+        model_name: str,
+        open_stream: Callable[[], AsyncIterator[Dict[str, Any]]],
+        estimated_tokens: int = 0,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streaming counterpart of ``call``.
+
+        The concurrency slot is held until the stream ends. A stream is only
+        retried after a 429 if it failed before producing any text.
+        """
+        limiter = self.limiter(provider, model_name)
+        deadline = time.monotonic() + self.queue_timeout
+        attempt = 0
+        while True:
+            try:
+                await limiter.acquire(estimated_tokens, deadline)
+            except QueueTimeout:
+                yield {"type": "done", **self._queue_timeout_result(model_name)}
+                return
+            result: Dict[str, Any] = {}
+            produced_text = False
+            try:
+                async with aclosing(open_stream()) as source:
+                    async for chunk in source:
+                        if chunk["type"] == "delta":
+                            produced_text = True
+                            yield chunk
+                        else:
+                            result = chunk
+            finally:
+                limiter.release()
+            limiter.observe(result, estimated_tokens)
+            if produced_text or not self._should_retry(limiter, result, attempt, deadline):
+                yield result
+                return
+            attempt += 1
+
+    def _should_retry(self, limiter: ModelLimiter, result: Dict[str, Any], attempt: int,
+                      deadline: float) -> bool:
+        if result.get("error_type") != RATE_LIMIT:
+            return False
+        delay = limiter.back_off(result, attempt)
+        if attempt >= self.max_retries or time.monotonic() + delay > deadline:
+            return False
+        limiter.retries += 1
+        return True
+
+    def _queue_timeout_result(self, model_name: str) -> Dict[str, Any]:
+        return {
+            "answer": None,
+            "raw": None,
+            "usage": None,
+            "error": f"Model {model_name} is rate limited; no capacity within {self.queue_timeout:g} seconds.",
+            "status_code": 429,
+            "error_type": RATE_LIMIT,
+            "rate_limit": None,
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-provider queue depth and wait times, with a per-model breakdown."""
+        providers = {}
+        for provider, models in self._limiters.items():
+            model_stats = {name: limiter.stats() for name, limiter in models.items()}
+            started = sum(limiter.started for limiter in models.values())
+            limits = self.provider_limits(provider)
+            providers[provider] = {
+                "rpm": limits.rpm,
+                "tpm": limits.tpm,
+                "queue_depth": sum(limiter.queue_depth for limiter in models.values()),
+                "in_flight": sum(limiter.in_flight for limiter in models.values()),
+                "requests": started,
+                "avg_wait_ms": round(sum(limiter.total_wait for limiter in models.values())
+                                     / started * 1000, 2) if started else 0.0,
+                "max_wait_ms": max(stats["max_wait_ms"] for stats in model_stats.values()),
+                "rate_limited": sum(limiter.rate_limited for limiter in models.values()),
+                "rejected": sum(limiter.rejected for limiter in models.values()),
+                "models": model_stats,
+            }
+        return {"queue_timeout_s": self.queue_timeout, "providers": providers}
+
+
+_rate_limiter: Optional[RateLimiter] = None
+
+
+def get_rate_limiter() -> Optional[RateLimiter]:
+    """Returns the process-wide rate limiter, or None when it is disabled."""
+    global _rate_limiter
+    if (_rate_limiter is None
+            and os.getenv("RATE_LIMITER_ENABLED", "true").lower() != "false"):
+        _rate_limiter = RateLimiter(
+            limits_config=json.loads(os.getenv("RATE_LIMITS", "{}") or "{}"),
+            queue_timeout=float(os.getenv("RATE_LIMIT_QUEUE_TIMEOUT_SECONDS", "30")),
+            max_retries=int(os.getenv("RATE_LIMIT_MAX_RETRIES", "3")),
+        )
+    return _rate_limiter
@@ -0,0 +1,247 @@
+"""
+Response Cache Module
+Opt-in exact-match cache for successful chat answers.
+
+Requests are keyed on a canonical SHA-256 hash of (model, system_prompts,
+chat_history, question, extra params). Entries expire after a TTL and the
+in-memory tier evicts least-recently-used entries once its byte budget
+(UTF-8 size of the stored JSON) is exceeded. An optional SQLite file keeps
+entries across restarts; its reads and writes run on one dedicated thread so
+they never block the event loop, and writes do not delay the response.
+
+Configuration (environment variables):
+    RESPONSE_CACHE_ENABLED            "true" to enable the cache (default off)
+    RESPONSE_CACHE_TTL_SECONDS        Entry lifetime (default 3600)
+    RESPONSE_CACHE_MAX_BYTES          In-memory budget in bytes (default 64 MiB)
+    RESPONSE_CACHE_PATH               SQLite file for the on-disk tier (default none)
+    RESPONSE_CACHE_DISK_MAX_ENTRIES   Row cap for the on-disk tier (default 100000)
+"""
+
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+def canonical_request_key(
+    model_name: str,
+    system_prompts: Optional[List[str]],
+    chat_history: Optional[List[Dict[str, str]]],
+    question: str,
+    extra_params: Optional[Dict[str, Any]] = None,
+) -> str:
+    """
+    Returns a stable hash identifying a chat request.
+
+    Two requests share a key only if every input that can change the answer
+    is identical. JSON with sorted keys keeps the hash independent of dict order.
+    """
+    payload = {
+        "model": model_name,
+        "system_prompts": list(system_prompts or []),
+        "chat_history": [[message["role"], message["content"]] for message in (chat_history or [])],
+        "question": question,
+        "extra_params": extra_params or {},
+    }
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class _DiskTier:
+    """
+    SQLite-backed persistent tier. Expired rows are dropped lazily and on writes.
+
+    Every statement runs on the tier's single worker thread, in submission
+    order, so a read always sees earlier writes.
+    """
+
+    def __init__(self, path: str, max_entries: int):
+        self.max_entries = max_entries
+        self._worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="response-cache")
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS response_cache ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)")
+        self._conn.commit()
+
+    async def get(self, key: str) -> Optional[Tuple[str, float]]:
+        return await asyncio.get_running_loop().run_in_executor(self._worker, self._get, key)
+
+    def set(self, key: str, value: str, expires_at: float):
+        """Queues the write and returns immediately."""
+        self._worker.submit(self._set, key, value, expires_at)
+
+    def clear(self):
+        self._worker.submit(self._clear)
+
+    def close(self):
+        self._worker.submit(self._close)
+        self._worker.shutdown(wait=True)  # Pending writes are flushed first
+
+    def _get(self, key: str) -> Optional[Tuple[str, float]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM response_cache WHERE key = ?", (key,)).fetchone()
+            if row and row[1] <= time.time():
+                self._conn.execute("DELETE FROM response_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+        return row
+
+    def _set(self, key: str, value: str, expires_at: float):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO response_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, expires_at))
+            self._conn.execute("DELETE FROM response_cache WHERE expires_at <= ?", (time.time(),))
+            self._conn.execute(
+                "DELETE FROM response_cache WHERE key IN (SELECT key FROM response_cache"
+                " ORDER BY expires_at DESC LIMIT -1 OFFSET ?)", (self.max_entries,))
+            self._conn.commit()
+
+    def _clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM response_cache")
+            self._conn.commit()
+
+    def _close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class ResponseCache:
+    """
+    TTL + byte-bounded LRU cache of standardized service result dicts.
+
+    Only the ``answer``, ``raw`` and ``usage`` keys are stored. Values are kept
+    as JSON strings so their size is known exactly and the disk tier can store
+    them unchanged. ``get`` is a coroutine because a memory miss may read the
+    disk tier; ``set`` only queues the disk write.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = 3600.0,
+        max_bytes: int = 64 * 1024 * 1024,
+        disk_path: Optional[str] = None,
+        disk_max_entries: int = 100_000,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[str, float, int]]" = OrderedDict()  # value, expiry, bytes
+        self._bytes = 0
+        self._disk = _DiskTier(disk_path, disk_max_entries) if disk_path else None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Returns the cached result for ``key`` or None, updating hit/miss counters."""
+        entry = self._entries.get(key)
+        if entry is not None and entry[1] <= time.time():
+            self._remove(key)
+            entry = None
+
+        if entry is None and self._disk is not None:
+            entry = await self._disk.get(key)
+            if entry is not None:
+                self._store(key, *entry)  # Promote to the memory tier
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        if key in self._entries:  # An oversize disk row is served without being promoted
+            self._entries.move_to_end(key)
+        self.hits += 1
+        return json.loads(entry[0])
+
+    def set(self, key: str, result: Dict[str, Any]):
+        """Caches a successful result. Results with an error are ignored."""
+        if result.get("error") or result.get("answer") is None:
+            return
+        value = json.dumps(
+            {"answer": result.get("answer"), "raw": result.get("raw"), "usage": result.get("usage")},
+            default=str, ensure_ascii=False)
+        expires_at = time.time() + self.ttl_seconds
+        if self._store(key, value, expires_at) and self._disk is not None:
+            self._disk.set(key, value, expires_at)
+
+    def clear(self):
+        self._entries.clear()
+        self._bytes = 0
+        if self._disk is not None:
+            self._disk.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl_seconds,
+            "persistent": self._disk is not None,
+        }
+
+    def close(self):
+        if self._disk is not None:
+            self._disk.close()
+
+    def _store(self, key: str, value: str, expires_at: float) -> bool:
+        """Adds an entry to the memory tier. Returns False if it is larger than the whole budget."""
+        size = len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return False
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (value, expires_at, size)
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+        return True
+
+    def _remove(self, key: str):
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+
+_response_cache: Optional[ResponseCache] = None
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """
+    Returns the process-wide response cache, or None when caching is disabled.
+
+    The cache is created on first use from the ``RESPONSE_CACHE_*`` settings.
+    """
+    global _response_cache
+    if _response_cache is None and os.getenv("RESPONSE_CACHE_ENABLED", "false").lower() == "true":
+        _response_cache = ResponseCache(
+            ttl_seconds=float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "3600")),
+            max_bytes=int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+            disk_path=os.getenv("RESPONSE_CACHE_PATH") or None,
+            disk_max_entries=int(os.getenv("RESPONSE_CACHE_DISK_MAX_ENTRIES", "100000")),
+        )
+    return _response_cache
+
+
+def close_response_cache():
+    """Closes the on-disk tier. Called at application shutdown."""
+    global _response_cache
+    if _response_cache is not None:
+        _response_cache.close()
+        _response_cache = None
@@ -0,0 +1,241 @@
+"""
+Session Store Module
+Server-side chat history per ``session_id``, so clients send only the new turn.
+
+Every answered request appends its question and answer to the session's
+stored history, and the response's ``history_version`` identifies the result.
+On the next turn the client sends that version with an empty
+``chat_history`` and the stored history is used instead of a resent one.
+
+A version is a hash chained over the history's messages, so the same
+history has the same version however it was built. If the stored history is
+not at the version the client sent (evicted, expired, lost in a restart
+without the disk tier, or moved on by a concurrent turn), the request fails
+with ``StaleHistoryError`` (HTTP 409). The client then resends its full
+``chat_history`` without a version, which replaces the stored copy.
+
+Sessions are kept in an LRU; an optional SQLite file keeps them across
+restarts and between instances sharing a disk.
+
+Configuration (environment variables):
+    SESSION_STORE_ENABLED         "true" to enable (default off)
+    SESSION_STORE_MAX_SESSIONS    Sessions kept in memory (default 10000)
+    SESSION_STORE_TTL_SECONDS     Lifetime of an idle session (default 86400)
+    SESSION_STORE_PATH            SQLite file for the persistent tier (default none)
+"""
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from api.pydantic_models import ChatMessageAPI
+
+EMPTY_HISTORY_VERSION = ""
+
+
+def extend_version(version: str, messages: Sequence[ChatMessageAPI]) -> str:
+    """Returns the version of a history at ``version`` once ``messages`` are appended."""
+    for message in messages:
+        digest = hashlib.sha256(f"{version}\0{message.role}\0".encode("utf-8"))
+        digest.update(message.content.encode("utf-8"))
+        version = digest.hexdigest()[:32]
+    return version
+
+
+def history_version(history: Sequence[ChatMessageAPI]) -> str:
+    """Returns the version identifying ``history``."""
+    return extend_version(EMPTY_HISTORY_VERSION, history)
+
+
+class StaleHistoryError(LookupError):
+    """The session's stored history is not at the version the client sent."""
+
+    def __init__(self, session_id: str, history_version: Optional[str], current_version: Optional[str]):
+        super().__init__(
+            f"Session {session_id} has no stored history at version {history_version}; "
+            "resend the full chat_history.")
+        self.session_id = session_id
+        self.history_version = history_version
+        self.current_version = current_version
+
+
+@dataclass
+class SessionHistory:
+    """A session's stored history, its version and when it expires."""
+    version: str
+    messages: List[ChatMessageAPI]
+    expires_at: float
+
+
+class _DiskTier:
+    """SQLite-backed persistent tier. Expired rows are dropped lazily and on writes."""
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            " session_id TEXT PRIMARY KEY, version TEXT NOT NULL, history TEXT NOT NULL,"
+            " expires_at REAL NOT NULL)")
+        self._conn.commit()
+
+    def get(self, session_id: str) -> Optional[SessionHistory]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT version, history, expires_at FROM sessions WHERE session_id = ?",
+                (session_id,)).fetchone()
+        if row is None or row[2] <= time.time():
+            return None
+        messages = [ChatMessageAPI.model_construct(role=role, content=content)
+                    for role, content in json.loads(row[1])]
+        return SessionHistory(row[0], messages, row[2])
+
+    def set(self, session_id: str, session: SessionHistory):
+        history = json.dumps([[message.role, message.content] for message in session.messages])
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sessions (session_id, version, history, expires_at)"
+                " VALUES (?, ?, ?, ?)", (session_id, session.version, history, session.expires_at))
+            self._conn.execute("DELETE FROM sessions WHERE expires_at <= ?", (time.time(),))
+            self._conn.commit()
+
+    def delete(self, session_id: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class SessionStore:
+    """LRU of session histories with an optional SQLite tier."""
+
+    def __init__(self, max_sessions: int = 10_000, ttl_seconds: float = 86_400.0,
+                 disk_path: Optional[str] = None):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self._sessions: "OrderedDict[str, SessionHistory]" = OrderedDict()
+        self._disk = _DiskTier(disk_path) if disk_path else None
+        self.hits = 0
+        self.misses = 0
+        self.resyncs = 0
+        self.conflicts = 0
+
+    def history(self, session_id: str, version: str) -> List[ChatMessageAPI]:
+        """
+        Returns the stored history of ``session_id`` if it is at ``version``.
+
+        Raises:
+            StaleHistoryError: The session is unknown or at another version.
+        """
+        session = self._get(session_id)
+        if session is None or session.version != version:
+            self.misses += 1
+            raise StaleHistoryError(session_id, version, session.version if session else None)
+        self.hits += 1
+        return session.messages
+
+    def append_turn(
+        self,
+        session_id: str,
+        history: Sequence[ChatMessageAPI],
+        question: str,
+        answer: str,
+        base_version: Optional[str] = None,
+    ) -> Optional[str]:
+        """
+        Stores ``history`` plus the new question and answer, returning the new version.
+
+        With ``base_version`` (the history came from this store) the turn is
+        only stored if the session is still at that version; otherwise a
+        concurrent turn got there first and None is returned. Without it,
+        ``history`` came from the client and replaces whatever is stored.
+        """
+        turn = [ChatMessageAPI.model_construct(role="user", content=question),
+                ChatMessageAPI.model_construct(role="assistant", content=answer)]
+        if base_version is not None:
+            current = self._get(session_id)
+            if current is None or current.version != base_version:
+                self.conflicts += 1
+                return None
+        else:
+            base_version = history_version(history)
+            self.resyncs += 1
+        session = SessionHistory(extend_version(base_version, turn), [*history, *turn],
+                                 time.time() + self.ttl_seconds)
+        self._store(session_id, session)
+        if self._disk is not None:
+            self._disk.set(session_id, session)
+        return session.version
+
+    def delete(self, session_id: str):
+        self._sessions.pop(session_id, None)
+        if self._disk is not None:
+            self._disk.delete(session_id)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "sessions": len(self._sessions),
+            "hits": self.hits,
+            "misses": self.misses,
+            "resyncs": self.resyncs,
+            "conflicts": self.conflicts,
+            "max_sessions": self.max_sessions,
+            "ttl_seconds": self.ttl_seconds,
+            "persistent": self._disk is not None,
+        }
+
+    def close(self):
+        if self._disk is not None:
+            self._disk.close()
+
+    def _get(self, session_id: str) -> Optional[SessionHistory]:
+        session = self._sessions.get(session_id)
+        if session is not None and session.expires_at <= time.time():
+            del self._sessions[session_id]
+            session = None
+        if session is None and self._disk is not None:
+            session = self._disk.get(session_id)
+            if session is not None:
+                self._store(session_id, session)  # Promote to the memory tier
+        if session is not None:
+            self._sessions.move_to_end(session_id)
+        return session
+
+    def _store(self, session_id: str, session: SessionHistory):
+        self._sessions[session_id] = session
+        self._sessions.move_to_end(session_id)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+
+
+_session_store: Optional[SessionStore] = None
+
+
+def get_session_store() -> Optional[SessionStore]:
+    """Returns the process-wide session store, or None when it is disabled."""
+    global _session_store
+    if _session_store is None and os.getenv("SESSION_STORE_ENABLED", "false").lower() == "true":
+        _session_store = SessionStore(
+            max_sessions=int(os.getenv("SESSION_STORE_MAX_SESSIONS", "10000")),
+            ttl_seconds=float(os.getenv("SESSION_STORE_TTL_SECONDS", "86400")),
+            disk_path=os.getenv("SESSION_STORE_PATH") or None,
+        )
+    return _session_store
+
+
+def close_session_store():
+    """Closes the on-disk tier. Called at application shutdown."""
+    global _session_store
+    if _session_store is not None:
+        _session_store.close()
+        _session_store = None
@@ -0,0 +1,145 @@
+"""
+Similar Question Cache Module
+Opt-in cache that answers trivially reworded questions without a provider call.
+
+The exact-match response cache misses questions that differ only in casing,
+punctuation, contractions, articles or non-directional prepositions
+("what's the capital of france" vs "What is the capital of France?"). This
+tier reduces each question to a key: it normalizes case, punctuation and
+contractions, then drops only articles and prepositions such as "of" and
+"in". Two questions asked in the same scope (same model, system prompts,
+chat history and extra params) share a cached answer only if their keys are
+identical, word for word and in order.
+
+Matching is exact on that key rather than a similarity score above a
+threshold, so there is no threshold setting. Near-identical strings often
+have different answers ("is X safe" / "is X unsafe", "sort ascending" /
+"sort descending", "string to int" / "int to string"), and no overlap score
+high enough to catch rewordings kept them apart. For the same reason
+negations, numbers, operators, pronouns, auxiliaries, modals and direction
+words such as "to" and "from" stay in the key: "my name" and "your name",
+"who was" and "who is", or "can I" and "should I" ask different things.
+Everything is computed locally: no embedding model or extra dependency is
+involved.
+
+Entries are held in memory only, expire after a TTL and are evicted least
+recently used first.
+
+Configuration (environment variables):
+    SIMILAR_QUESTION_CACHE_ENABLED      "true" to enable (default off)
+    SIMILAR_QUESTION_CACHE_TTL_SECONDS  Entry lifetime (default 3600)
+    SIMILAR_QUESTION_CACHE_MAX_ENTRIES  Questions kept (default 10000)
+"""
+
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+import json
+import os
+import re
+import time
+import unicodedata
+
+CONTRACTIONS = {
+    "what's": "what is", "who's": "who is", "where's": "where is", "when's": "when is", "how's": "how is",
+    "it's": "it is", "that's": "that is", "there's": "there is", "i'm": "i am", "can't": "cannot",
+    "won't": "will not",
+}
+CONTRACTION_SUFFIXES = {"n't": " not", "'re": " are", "'ve": " have", "'ll": " will", "'d": " would"}
+_EXPANSIONS = {**CONTRACTIONS, **CONTRACTION_SUFFIXES}
+_CONTRACTION_PATTERN = re.compile(
+    r"\b(?:" + "|".join(map(re.escape, CONTRACTIONS)) + r")\b|" + "|".join(map(re.escape, CONTRACTION_SUFFIXES)))
+_OPERATORS = "+-*/="
+
+# Articles and prepositions that can be added or dropped without changing what is asked.
+# Prepositions that carry direction or exclusion ("to", "from", "into", "without") are kept.
+STOPWORDS = frozenset({"a", "an", "the", "of", "in", "on", "at", "for", "with", "about"})
+
+
+def normalize_question(question: str) -> str:
+    """Lowercases, expands contractions, drops punctuation except operators and collapses whitespace."""
+    text = unicodedata.normalize("NFKC", question).lower().replace("’", "'")
+    text = _CONTRACTION_PATTERN.sub(lambda match: _EXPANSIONS[match.group(0)], text)
+    text = "".join(char if char.isalnum() or char == "." else f" {char} " if char in _OPERATORS else " "
+                   for char in text)
+    text = re.sub(r"(?<!\d)[.](?!\d)", " ", text)  # Keep decimal points only
+    return " ".join(text.split())
+
+
+def question_key(question: str) -> str:
+    """Returns the question's words in order without stopwords; questions with the same key share an answer."""
+    words = normalize_question(question).split()
+    content = [word for word in words if word not in STOPWORDS]
+    return " ".join(content or words)
+
+
+class SimilarQuestionCache:
+    """
+    TTL + LRU cache of standardized service result dicts, keyed by scope and ``question_key``.
+
+    Like the response cache, only ``answer``, ``raw`` and ``usage`` are stored.
+    """
+
+    def __init__(self, ttl_seconds: float = 3600.0, max_entries: int = 10_000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[str, float]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, scope: str, question: str) -> Optional[Dict[str, Any]]:
+        """Returns the cached result of an equivalent question in ``scope``, or None."""
+        key = (scope, question_key(question))
+        entry = self._entries.get(key)
+        if entry is not None and entry[1] <= time.time():
+            del self._entries[key]
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return json.loads(entry[0])
+
+    def set(self, scope: str, question: str, result: Dict[str, Any]):
+        """Caches a successful result. Results with an error are ignored."""
+        if result.get("error") or result.get("answer") is None:
+            return
+        key = (scope, question_key(question))
+        value = json.dumps(
+            {"answer": result.get("answer"), "raw": result.get("raw"), "usage": result.get("usage")},
+            default=str)
+        self._entries[key] = (value, time.time() + self.ttl_seconds)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+        }
+
+
+_similar_question_cache: Optional[SimilarQuestionCache] = None
+
+
+def get_similar_question_cache() -> Optional[SimilarQuestionCache]:
+    """Returns the process-wide similar question cache, or None when it is disabled."""
+    global _similar_question_cache
+    if _similar_question_cache is None and os.getenv("SIMILAR_QUESTION_CACHE_ENABLED", "false").lower() == "true":
+        _similar_question_cache = SimilarQuestionCache(
+            ttl_seconds=float(os.getenv("SIMILAR_QUESTION_CACHE_TTL_SECONDS", "3600")),
+            max_entries=int(os.getenv("SIMILAR_QUESTION_CACHE_MAX_ENTRIES", "10000")),
+        )
+    return _similar_question_cache
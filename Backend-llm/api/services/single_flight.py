@@ -0,0 +1,188 @@
+"""
+Single-Flight Module
+Coalesces identical in-flight chat requests into one upstream provider call.
+
+Concurrent requests with the same canonical request key share one provider
+call: the first arrival (the leader) starts it and every later arrival waits
+on the same task. Streaming requests share one provider stream whose events
+are fanned out to every subscriber; late subscribers first receive the events
+already produced.
+
+The shared call is cancelled only when every waiter has gone away, so one
+disconnecting client never fails the others. Its deadline is the latest of
+its waiters' deadlines (none if any waiter has none), which the upstream call
+reads through ``call_deadline``/``stream_deadline`` when it starts. A waiter
+that joins later with a longer deadline cannot extend an attempt already sent.
+
+Configuration (environment variables):
+    SINGLE_FLIGHT_ENABLED   "false" to disable coalescing (default on)
+"""
+
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+from contextlib import aclosing
+import asyncio
+import math
+import os
+
+
+class _Flight:
+    """One shared provider call and the number of requests waiting on it."""
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+        self.deadline = -math.inf
+
+
+class _StreamFlight:
+    """One shared provider stream, its replay buffer and its subscriber queues."""
+
+    def __init__(self):
+        self.task: Optional[asyncio.Task] = None
+        self.buffer: List[Any] = []
+        self.subscribers: List[asyncio.Queue] = []
+        self.finished = False
+        self.deadline = -math.inf
+
+
+_END = object()
+
+
+class _Failure:
+    def __init__(self, exc: BaseException):
+        self.exc = exc
+
+
+class SingleFlight:
+    """Deduplicates concurrent calls and streams by key."""
+
+    def __init__(self):
+        self._flights: Dict[str, _Flight] = {}
+        self._streams: Dict[str, _StreamFlight] = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    async def run(self, key: str, factory: Callable[[], Awaitable[Any]],
+                  deadline: Optional[float] = None) -> Any:
+        """
+        Returns the result of ``factory()``, sharing one call per ``key``.
+
+        Args:
+            key (str): Canonical request key.
+            factory (Callable): Starts the upstream call; only invoked by the leader.
+            deadline (Optional[float]): This waiter's deadline (event loop time), or None.
+        """
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(factory()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _: self._forget(self._flights, key, flight))
+            self.leaders += 1
+        else:
+            self.coalesced += 1
+
+        flight.deadline = self._latest(flight.deadline, deadline)
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                flight.task.cancel()
+
+    async def stream(self, key: str, factory: Callable[[], AsyncIterator[Any]],
+                     deadline: Optional[float] = None) -> AsyncIterator[Any]:
+        """
+        Yields the events of ``factory()``, sharing one stream per ``key``.
+
+        Args:
+            key (str): Canonical request key.
+            factory (Callable): Opens the upstream stream; only invoked by the leader.
+            deadline (Optional[float]): This subscriber's deadline (event loop time), or None.
+        """
+        flight = self._streams.get(key)
+        if flight is None:
+            flight = _StreamFlight()
+            self._streams[key] = flight
+            flight.task = asyncio.create_task(self._pump(key, flight, factory()))
+            self.leaders += 1
+        else:
+            self.coalesced += 1
+
+        flight.deadline = self._latest(flight.deadline, deadline)
+        queue: asyncio.Queue = asyncio.Queue()
+        for event in flight.buffer:
+            queue.put_nowait(event)
+        if flight.finished:
+            queue.put_nowait(_END)
+        flight.subscribers.append(queue)
+
+        try:
+            while True:
+                item = await queue.get()
+                if item is _END:
+                    return
+                if isinstance(item, _Failure):
+                    raise item.exc
+                yield item
+        finally:
+            flight.subscribers.remove(queue)
+            if not flight.subscribers and not flight.task.done():
+                flight.task.cancel()
+
+    def call_deadline(self, key: str) -> Optional[float]:
+        """The latest deadline among the waiters on the shared call for ``key``; None if unbounded."""
+        return self._bound(self._flights.get(key))
+
+    def stream_deadline(self, key: str) -> Optional[float]:
+        """The latest deadline among the subscribers to the shared stream for ``key``; None if unbounded."""
+        return self._bound(self._streams.get(key))
+
+    @staticmethod
+    def _latest(current: float, deadline: Optional[float]) -> float:
+        return max(current, math.inf if deadline is None else deadline)
+
+    @staticmethod
+    def _bound(flight: Any) -> Optional[float]:
+        if flight is None or math.isinf(flight.deadline):
+            return None
+        return flight.deadline
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._flights) + len(self._streams),
+        }
+
+    async def _pump(self, key: str, flight: _StreamFlight, source: AsyncIterator[Any]):
+        try:
+            async with aclosing(source):
+                async for event in source:
+                    flight.buffer.append(event)
+                    for queue in flight.subscribers:
+                        queue.put_nowait(event)
+        except Exception as exc:
+            for queue in flight.subscribers:
+                queue.put_nowait(_Failure(exc))
+        finally:
+            flight.finished = True
+            for queue in flight.subscribers:
+                queue.put_nowait(_END)
+            self._forget(self._streams, key, flight)
+
+    @staticmethod
+    def _forget(flights: Dict[str, Any], key: str, flight: Any):
+        if flights.get(key) is flight:
+            del flights[key]
+
+
+_single_flight: Optional[SingleFlight] = None
+
+
+def get_single_flight() -> Optional[SingleFlight]:
+    """Returns the process-wide single-flight group, or None when disabled."""
+    global _single_flight
+    if _single_flight is None and os.getenv("SINGLE_FLIGHT_ENABLED", "true").lower() != "false":
+        _single_flight = SingleFlight()
+    return _single_flight
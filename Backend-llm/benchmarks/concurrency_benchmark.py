@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Concurrency benchmark for the Backend-llm chat endpoints.
+
+This script:
+1. Starts a local fake OpenAI-compatible provider (``/v1/chat/completions``)
+   that sleeps for a fixed latency before answering
+2. Points the OpenAI service at it through ``OPENAI_BASE_URL``
+3. Drives ``POST /chat/openai/gpt-5`` in-process at increasing concurrency
+4. Prints throughput per concurrency level
+
+With non-blocking provider calls, throughput should grow roughly linearly
+with concurrency (about ``concurrency / latency`` requests per second) until
+the worker runs out of CPU.
+
+Usage:
+    python benchmarks/concurrency_benchmark.py [--latency-ms 200] [--requests 400]
+                                               [--levels 1,10,50,100,200]
+
+Run from the Backend-llm directory so ``api`` is importable.
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import socket
+import sys
+import time
+import uuid
+
+import httpx
+import uvicorn
+from fastapi import FastAPI, Body
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.harness import drive, free_port
+
+
+def build_fake_provider(latency_ms: float) -> FastAPI:
+    """
+    Builds a minimal OpenAI-compatible chat completions server.
+
+    Args:
+        latency_ms: Simulated provider latency for every completion
+
+    Returns:
+        FastAPI app serving ``POST /v1/chat/completions``
+    """
+    fake_app = FastAPI()
+
+    @fake_app.post("/v1/chat/completions")
+    async def chat_completions(payload: dict = Body(...)):
+        await asyncio.sleep(latency_ms / 1000)
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": payload.get("model"),
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": "Paris."},
+                    "finish_reason": "stop",
+                }
+            ],
+            "usage": {"prompt_tokens": 12, "completion_tokens": 2, "total_tokens": 14},
+        }
+
+    return fake_app
+
+
+def serve_fake_provider(port: int, latency_ms: float):
+    """Process target: serves the fake provider until terminated."""
+    uvicorn.run(build_fake_provider(latency_ms),
+                host="127.0.0.1", port=port, log_level="warning")
+
+
+def start_fake_provider(latency_ms: float) -> str:
+    """
+    Runs the fake provider on a free localhost port in a separate process,
+    so it does not compete with Backend-llm for the GIL.
+
+    Returns:
+        Base URL of the fake provider (including ``/v1``)
+    """
+    port = free_port()
+    process = multiprocessing.Process(
+        target=serve_fake_provider, args=(port, latency_ms), daemon=True)
+    process.start()
+
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                break
+        except OSError:
+            time.sleep(0.1)
+    else:
+        raise RuntimeError("Fake provider did not start within 30 seconds")
+    return f"http://127.0.0.1:{port}/v1"
+
+
+async def run_level(app, concurrency: int, total_requests: int) -> float:
+    """
+    Sends ``total_requests`` chat requests with at most ``concurrency`` in flight.
+
+    Returns:
+        Observed throughput in requests per second
+    """
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://backend-llm", timeout=120) as client:
+        result = await drive(client, "/chat/openai/gpt-5", total_requests, concurrency,
+                             lambda index: "What is the capital of France?")
+    if result.errors:
+        raise RuntimeError(f"{result.errors} of {total_requests} requests failed")
+    return result.throughput
+
+
+async def main(latency_ms: float, total_requests: int, levels: list):
+    os.environ["OPENAI_BASE_URL"] = start_fake_provider(latency_ms)
+    os.environ["OPENAI_API_KEY"] = "sk-benchmark"
+
+    from api.main import app
+
+    print(f"Fake provider latency: {latency_ms:.0f} ms, {total_requests} requests per level")
+    print(f"{'concurrency':>12} {'req/s':>10} {'ideal req/s':>12}")
+    async with app.router.lifespan_context(app):
+        for concurrency in levels:
+            requests = max(total_requests, concurrency)
+            throughput = await run_level(app, concurrency, requests)
+            ideal = concurrency / (latency_ms / 1000)
+            print(f"{concurrency:>12} {throughput:>10.1f} {ideal:>12.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--latency-ms", type=float, default=200.0)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--levels", default="1,10,50,100,200")
+    args = parser.parse_args()
+
+    asyncio.run(main(args.latency_ms, args.requests,
+                     [int(level) for level in args.levels.split(",")]))
@@ -0,0 +1,93 @@
+"""
+Shared load-driving helpers for the Backend-llm benchmarks.
+
+Drives one ``/chat/...`` endpoint with a fixed number of requests in flight
+and records per-request latency (and time to first token for streams), so
+every benchmark measures and reports requests the same way.
+"""
+
+import asyncio
+import json
+import math
+import socket
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+import httpx
+
+
+@dataclass
+class LoadResult:
+    """What one run of ``drive`` observed."""
+    requests: int
+    elapsed: float = 0.0
+    errors: int = 0
+    latencies: List[float] = field(default_factory=list)
+    ttfts: List[float] = field(default_factory=list)
+
+    @property
+    def throughput(self) -> float:
+        return self.requests / self.elapsed if self.elapsed else 0.0
+
+
+def free_port() -> int:
+    """Returns a localhost port that is free right now."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile of ``values``, or None if there are none."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+async def one_request(client: httpx.AsyncClient, path: str, body: Dict, stream: bool,
+                      result: LoadResult) -> bool:
+    """Sends one chat request and records its latency. Returns True on success."""
+    started = time.perf_counter()
+    if not stream:
+        response = await client.post(path, json=body)
+        result.latencies.append(time.perf_counter() - started)
+        return response.status_code == 200 and not response.json().get("error_message")
+
+    ok = False
+    async with client.stream("POST", path, json=body) as response:
+        first = None
+        async for line in response.aiter_lines():
+            if first is None and line.startswith("event: delta"):
+                first = time.perf_counter() - started
+            if line.startswith("data: ") and '"error_message"' in line:
+                ok = json.loads(line[len("data: "):]).get("error_message") is None
+    result.latencies.append(time.perf_counter() - started)
+    if first is not None:
+        result.ttfts.append(first)
+    return ok and response.status_code == 200
+
+
+async def drive(client: httpx.AsyncClient, path: str, total_requests: int, concurrency: int,
+                question_for: Callable[[int], str], stream: bool = False) -> LoadResult:
+    """
+    Sends ``total_requests`` chat requests to ``path`` with ``concurrency`` in flight.
+
+    Args:
+        client: Client bound to the server under test (HTTP or ASGI transport)
+        question_for: Returns the question for the request with a given index
+        stream: Read the response as a stream and record time to first token
+    """
+    result = LoadResult(requests=total_requests)
+    counter = iter(range(total_requests))
+
+    async def worker():
+        for index in counter:  # Workers share one iterator
+            if not await one_request(client, path, {"question": question_for(index)}, stream, result):
+                result.errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    result.elapsed = time.perf_counter() - started
+    return result
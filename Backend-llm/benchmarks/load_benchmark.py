@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Load benchmark for the Backend-llm chat endpoints.
+
+This script:
+1. Answers every provider call with the built-in fake provider
+   (``FAKE_PROVIDER_ENABLED``), shaped by ``--fake-settings``, or replays
+   recorded provider traffic from ``--cassette`` (``CASSETTE_MODE=replay``)
+2. Serves Backend-llm with uvicorn in this process (or uses a running
+   server given by ``--url``) and drives one ``/chat/...`` endpoint over
+   HTTP at a fixed concurrency
+3. Prints throughput and p50/p95/p99 latency (and time to first token for
+   ``--stream``), so performance changes can be measured offline
+
+Questions are unique per request so the response cache and request
+coalescing do not short-circuit the run; pass ``--repeat`` to measure them.
+
+Usage:
+    python benchmarks/load_benchmark.py [--endpoint /chat/openai/gpt-5] [--concurrency 50]
+                                        [--requests 1000] [--stream] [--repeat]
+                                        [--fake-settings '{"default": {"ttft_ms": 200}}']
+                                        [--cassette cassettes/traffic.jsonl.gz] [--time-scale 1]
+                                        [--url http://localhost:8001] [--json]
+
+Run from the Backend-llm directory so ``api`` is importable.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+from typing import Dict, Optional, Tuple
+
+import httpx
+import uvicorn
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.harness import drive, free_port, percentile
+
+DEFAULT_FAKE_SETTINGS = {"default": {"ttft_ms": 200, "tokens_per_second": 200, "completion_tokens": 40}}
+
+
+async def start_server() -> Tuple[uvicorn.Server, asyncio.Task, str]:
+    """
+    Serves Backend-llm on a free localhost port in this event loop.
+
+    A real HTTP server (rather than an in-memory ASGI transport) is needed
+    for streamed deltas to reach the client as they are produced.
+    """
+    from api.main import app
+
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        if task.done():
+            task.result()  # Surfaces startup errors
+        await asyncio.sleep(0.05)
+    return server, task, f"http://127.0.0.1:{port}"
+
+
+async def run(endpoint: str, concurrency: int, total_requests: int, stream: bool,
+              repeat: bool, url: Optional[str]) -> Dict:
+    """Runs the benchmark and returns its summary."""
+    server = None
+    if url is None:
+        server, server_task, url = await start_server()
+    path = endpoint.rstrip("/") + ("/stream" if stream else "")
+
+    def question_for(index: int) -> str:
+        return "What is the capital of France?" if repeat else f"Question {index}: capital of France?"
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, timeout=300, limits=limits) as client:
+        result = await drive(client, path, total_requests, concurrency, question_for, stream)
+
+    cassette_stats = None
+    if server is not None:
+        from api.services.cassette import get_cassette
+        cassette_stats = get_cassette().stats() if get_cassette() is not None else None
+        server.should_exit = True
+        await server_task
+
+    def ms(value):
+        return round(value * 1000, 1) if value is not None else None
+
+    summary = {
+        "endpoint": path,
+        "concurrency": concurrency,
+        "requests": total_requests,
+        "errors": result.errors,
+        "elapsed_s": round(result.elapsed, 3),
+        "throughput_rps": round(result.throughput, 1),
+        "p50_ms": ms(percentile(result.latencies, 50)),
+        "p95_ms": ms(percentile(result.latencies, 95)),
+        "p99_ms": ms(percentile(result.latencies, 99)),
+    }
+    if cassette_stats is not None:
+        summary["cassette"] = cassette_stats
+    if stream:
+        summary.update({
+            "ttft_p50_ms": ms(percentile(result.ttfts, 50)),
+            "ttft_p95_ms": ms(percentile(result.ttfts, 95)),
+            "ttft_p99_ms": ms(percentile(result.ttfts, 99)),
+        })
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--endpoint", default="/chat/openai/gpt-5")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--stream", action="store_true", help="Use the /stream variant and report TTFT")
+    parser.add_argument("--repeat", action="store_true", help="Send the same question every time")
+    parser.add_argument("--fake-settings", default=json.dumps(DEFAULT_FAKE_SETTINGS),
+                        help="FAKE_PROVIDER_SETTINGS JSON for the in-process server")
+    parser.add_argument("--cassette", help="Replay provider traffic recorded with CASSETTE_MODE=record")
+    parser.add_argument("--time-scale", default="1", help="Replay timing multiplier (0 is instant)")
+    parser.add_argument("--url", help="Benchmark a running server instead (configure its fake provider there)")
+    parser.add_argument("--json", action="store_true", help="Print the summary as JSON")
+    args = parser.parse_args()
+
+    if args.url:
+        pass  # The server under test is configured by its own environment
+    elif args.cassette:
+        os.environ.update(CASSETTE_MODE="replay", CASSETTE_PATH=args.cassette, CASSETTE_TIME_SCALE=args.time_scale)
+    else:
+        os.environ["FAKE_PROVIDER_ENABLED"] = "true"
+        os.environ["FAKE_PROVIDER_SETTINGS"] = args.fake_settings
+
+    result = asyncio.run(run(args.endpoint, args.concurrency, args.requests,
+                             args.stream, args.repeat, args.url))
+    if args.json:
+        print(json.dumps(result))
+    else:
+        for key, value in result.items():
+            print(f"{key:>16} {value}")
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Cold-start measurement for Backend-llm.
+
+This script runs each measurement in a fresh interpreter so nothing is
+already imported:
+1. ``import api.main`` under ``python -X importtime``, reporting the total
+   and the packages that took longest (self time summed per top-level
+   package, per module for our own ``api`` modules)
+2. Wall time from interpreter start until the app has finished its startup
+   lifespan, i.e. when Cloud Run would consider the instance ready
+3. The import cost of each provider SDK, paid on first use (or by the
+   background prewarm) rather than at startup
+
+Usage:
+    python benchmarks/startup_time.py [--runs 3] [--top 15] [--json]
+
+Run from the Backend-llm directory so ``api`` is importable.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+READY_SCRIPT = """
+import asyncio, time
+started = time.perf_counter()
+from api.main import app
+imported = time.perf_counter()
+async def ready():
+    async with app.router.lifespan_context(app):
+        return time.perf_counter()
+ready_at = asyncio.run(ready())
+print(imported - started, ready_at - started)
+"""
+
+SDK_SCRIPT = """
+import json
+from api.services.provider_clients import PROVIDER_SDKS, load_sdk, sdk_available, sdk_import_seconds
+for provider in PROVIDER_SDKS:
+    if sdk_available(provider):
+        load_sdk(provider)
+print(json.dumps(sdk_import_seconds))
+"""
+
+
+def run_python(args: List[str]) -> subprocess.CompletedProcess:
+    env = {**os.environ, "PROVIDER_SDK_PREWARM": "false", "PYTHONDONTWRITEBYTECODE": "1"}
+    return subprocess.run([sys.executable, *args], cwd=BACKEND_DIR, env=env,
+                          capture_output=True, text=True, check=True)
+
+
+def import_breakdown() -> Tuple[float, Dict[str, float]]:
+    """Returns the total ``import api.main`` time and import time per package, in seconds."""
+    stderr = run_python(["-X", "importtime", "-c", "import api.main"]).stderr
+    packages: Dict[str, float] = defaultdict(float)
+    total = 0.0
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        name = name.strip()
+        package = name if name.split(".")[0] == "api" else name.split(".")[0]
+        packages[package] += int(self_us) / 1e6
+        if name == "api.main":
+            total = int(cumulative_us) / 1e6
+    return total, dict(packages)
+
+
+def main(runs: int, top: int, as_json: bool):
+    ready = [tuple(map(float, run_python(["-c", READY_SCRIPT]).stdout.split()[-2:])) for _ in range(runs)]
+    total, packages = import_breakdown()
+    sdk_seconds = json.loads(run_python(["-c", SDK_SCRIPT]).stdout.strip().splitlines()[-1])
+
+    summary = {
+        "import_api_main_s": round(statistics.median(r[0] for r in ready), 3),
+        "ready_s": round(statistics.median(r[1] for r in ready), 3),
+        "importtime_total_s": round(total, 3),
+        "slowest_packages_s": {name: round(seconds, 3) for name, seconds in
+                               sorted(packages.items(), key=lambda item: -item[1])[:top]},
+        "provider_sdk_first_use_s": {name: round(seconds, 3) for name, seconds in sdk_seconds.items()},
+    }
+    if as_json:
+        print(json.dumps(summary))
+        return
+
+    print(f"import api.main      {summary['import_api_main_s']:.3f} s (median of {runs})")
+    print(f"startup complete     {summary['ready_s']:.3f} s")
+    print(f"\nSlowest imports (-X importtime, total {summary['importtime_total_s']:.3f} s):")
+    for name, seconds in summary["slowest_packages_s"].items():
+        print(f"  {name:<30} {seconds:.3f} s")
+    print("\nProvider SDK import on first use:")
+    for name, seconds in summary["provider_sdk_first_use_s"].items():
+        print(f"  {name:<30} {seconds:.3f} s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--json", action="store_true", help="Print the summary as JSON")
+    args = parser.parse_args()
+    main(args.runs, args.top, args.json)
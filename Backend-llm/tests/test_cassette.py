@@ -0,0 +1,112 @@
+# test_cassette.py
+import asyncio
+import gzip
+import time
+
+from api.pydantic_models import ModelName, ModelProvider, SingleModelChatRequest
+from api.services import chat_service, google_gemini_service
+from api.services.cassette import Cassette, load_cassette
+
+MESSAGES = [{"role": "user", "content": "Capital of France?"}]
+GEMINI_RAW = {"candidates": [{"content": {"parts": [{"text": "Paris."}], "role": "model"},
+                              "finish_reason": 1, "safety_ratings": [{"category": 9, "probability": 1}]}]}
+
+
+async def slow_chat(model_name, messages, **kwargs):
+    await asyncio.sleep(0.1)
+    return {"answer": "Paris.", "raw": GEMINI_RAW, "usage": {"prompt_token_count": 5}, "error": None}
+
+
+async def slow_stream(model_name, messages, **kwargs):
+    for delta in ("Pa", "ris."):
+        await asyncio.sleep(0.05)
+        yield {"type": "delta", "delta": delta}
+    yield {"type": "done", "answer": "Paris.", "raw": None, "usage": None, "error": None}
+
+# --- Test Cases for Cassette ---
+
+
+def test_recorded_calls_replay_with_original_payload_and_timing(tmp_path):
+    path = str(tmp_path / "traffic.jsonl.gz")
+
+    async def record():
+        cassette = Cassette("record", path)
+        await cassette.chat_function(ModelProvider.GOOGLE, slow_chat)("gemini-2.5-pro", MESSAGES)
+        cassette.close()
+
+    async def replay():
+        cassette = Cassette("replay", path)
+        started = time.perf_counter()
+        result = await cassette.chat_function(ModelProvider.GOOGLE, None)("gemini-2.5-pro", MESSAGES)
+        return result, time.perf_counter() - started
+
+    asyncio.run(record())
+    with gzip.open(path, "rt") as file:
+        assert "safety_ratings" in file.read()  # Stored compressed, raw payload included
+    result, elapsed = asyncio.run(replay())
+    assert result["raw"] == GEMINI_RAW
+    assert 0.09 <= elapsed < 0.3
+
+
+def test_stream_timing_replays_scaled(tmp_path):
+    path = str(tmp_path / "traffic.jsonl.gz")
+
+    async def record():
+        cassette = Cassette("record", path)
+        events = [event async for event in cassette.stream_function(ModelProvider.OPENAI, slow_stream)(
+            "gpt-5", MESSAGES)]
+        cassette.close()
+        return events
+
+    async def replay(time_scale):
+        cassette = Cassette("replay", path, time_scale=time_scale)
+        started = time.perf_counter()
+        timed = [(time.perf_counter() - started, event) async for event in cassette.stream_function(
+            ModelProvider.OPENAI, None)("gpt-5", MESSAGES)]
+        return timed
+
+    recorded = asyncio.run(record())
+    original = asyncio.run(replay(1.0))
+    instant = asyncio.run(replay(0.0))
+    assert [event for _, event in original] == recorded
+    assert original[1][0] >= 0.09      # The second delta arrived ~100 ms in
+    assert instant[-1][0] < 0.05
+    assert len(load_cassette(path)[0]["events"]) == 3
+
+
+def test_replay_falls_back_to_the_models_recordings_unless_strict(tmp_path):
+    path = str(tmp_path / "traffic.jsonl.gz")
+
+    async def record():
+        cassette = Cassette("record", path)
+        await cassette.chat_function(ModelProvider.GOOGLE, slow_chat)("gemini-2.5-pro", MESSAGES)
+        cassette.close()
+
+    async def replay(strict):
+        cassette = Cassette("replay", path, time_scale=0, strict=strict)
+        other = [{"role": "user", "content": "Something else"}]
+        return await cassette.chat_function(ModelProvider.GOOGLE, None)("gemini-2.5-pro", other)
+
+    asyncio.run(record())
+    assert asyncio.run(replay(strict=False))["answer"] == "Paris."
+    assert "No recorded interaction" in asyncio.run(replay(strict=True))["error"]
+
+
+def test_chat_service_replays_without_calling_the_provider(tmp_path, monkeypatch):
+    path = str(tmp_path / "traffic.jsonl.gz")
+    request = SingleModelChatRequest(question="Capital of France?")
+    monkeypatch.setattr(google_gemini_service, "chat_with_model", slow_chat)
+    monkeypatch.setattr(chat_service, "get_cassette", lambda: recorder)
+    recorder = Cassette("record", path)
+    asyncio.run(chat_service.execute_chat(ModelName.GEMINI_2_5_PRO, request))
+    recorder.close()
+
+    async def unreachable(model_name, messages, **kwargs):
+        raise AssertionError("provider must not be called")
+
+    monkeypatch.setattr(google_gemini_service, "chat_with_model", unreachable)
+    player = Cassette("replay", path, time_scale=0)
+    monkeypatch.setattr(chat_service, "get_cassette", lambda: player)
+    response = asyncio.run(chat_service.execute_chat(ModelName.GEMINI_2_5_PRO, request))
+    assert response.answer == "Paris." and response.raw_response == GEMINI_RAW
+    assert player.stats()["replayed"] == 1
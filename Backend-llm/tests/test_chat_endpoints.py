@@ -0,0 +1,287 @@
+# test_chat_endpoints.py
+import asyncio
+import json
+import time
+
+import httpx
+import pytest
+
+from api import main
+from api.pydantic_models import SingleModelChatRequest
+from api.services import chat_service, openai_service, google_gemini_service, groq_service
+
+
+async def fake_chat_with_model(model_name, messages, **kwargs):
+    await asyncio.sleep(0.2)
+    return {
+        "answer": f"echo: {messages[-1]['content']}",
+        "raw": None,
+        "usage": {"prompt_tokens": 3, "completion_tokens": 2, "total_tokens": 5},
+        "error": None,
+    }
+
+
+@pytest.fixture
+def fake_providers(monkeypatch):
+    for service in (openai_service, google_gemini_service, groq_service):
+        monkeypatch.setattr(service, "chat_with_model", fake_chat_with_model)
+
+
+async def post_many(path: str, count: int):
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return await asyncio.gather(*(
+            client.post(path, json={"question": f"question {i}"}) for i in range(count)
+        ))
+
+# --- Test Cases for build_messages ---
+
+
+def test_build_messages_orders_history_and_question():
+    request = SingleModelChatRequest(
+        question="And now?",
+        chat_history=[{"role": "user", "content": "My name is Bob."},
+                      {"role": "assistant", "content": "Hi Bob."}],
+        system_prompts=["Be brief."],
+    )
+    messages = chat_service.build_messages(request)
+    assert messages[0] == {"role": "system", "content": "Be brief."}
+    assert messages[1:3] == [{"role": "user", "content": "My name is Bob."},
+                             {"role": "assistant", "content": "Hi Bob."}]
+    assert messages[-1] == {"role": "user", "content": "And now?"}
+    assert all(isinstance(message, dict) for message in messages)
+
+
+def test_build_messages_keeps_a_stable_prefix_across_turns():
+    prompts = ["You are TellMeMore.", "Answer in English."]
+    first = SingleModelChatRequest(question="Hi?", system_prompts=prompts)
+    second = SingleModelChatRequest(
+        question="And now?", system_prompts=prompts,
+        chat_history=[{"role": "human", "content": "Hi?"}, {"role": "ai", "content": "Hello."}])
+    first_messages = chat_service.build_messages(first)
+    second_messages = chat_service.build_messages(second)
+    assert [message["content"] for message in first_messages[:2]] == prompts  # Given order, not reversed
+    assert second_messages[:3] == first_messages
+    assert [message["role"] for message in second_messages[2:4]] == ["user", "assistant"]
+
+# --- Test Cases for non-blocking provider calls ---
+
+
+@pytest.mark.parametrize("path", [
+    "/chat/openai/gpt-5",
+    "/chat/google/gemini-2.5-flash",
+    "/chat/groq/llama-3.1-8b-instant",
+])
+def test_concurrent_requests_do_not_serialize(fake_providers, path):
+    started = time.perf_counter()
+    responses = asyncio.run(post_many(path, 20))
+    elapsed = time.perf_counter() - started
+
+    assert all(response.status_code == 200 for response in responses)
+    assert responses[3].json()["answer"] == "echo: question 3"
+    # 20 sequential calls would take 4 seconds; concurrent calls overlap.
+    assert elapsed < 2.0
+
+
+def test_wrong_provider_is_rejected(fake_providers):
+    responses = asyncio.run(post_many("/chat/openai/gemini-2.5-flash", 1))
+    assert responses[0].status_code == 400
+
+# --- Test Cases for SSE streaming ---
+
+
+async def fake_stream_chat_with_model(model_name, messages, **kwargs):
+    for word in ["Par", "is", "."]:
+        await asyncio.sleep(0.01)
+        yield {"type": "delta", "delta": word}
+    yield {"type": "done", "answer": "Paris.", "raw": None,
+           "usage": {"prompt_tokens": 3, "completion_tokens": 3, "total_tokens": 6},
+           "error": None}
+
+
+def parse_sse(body: str):
+    events = []
+    for frame in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in frame.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def test_stream_emits_deltas_then_done(monkeypatch):
+    monkeypatch.setattr(groq_service, "stream_chat_with_model", fake_stream_chat_with_model)
+    responses = asyncio.run(post_many("/chat/groq/llama-3.1-8b-instant/stream", 1))
+
+    assert responses[0].status_code == 200
+    assert responses[0].headers["content-type"].startswith("text/event-stream")
+    events = parse_sse(responses[0].text)
+    assert [data["content"] for event, data in events if event == "delta"] == ["Par", "is", "."]
+
+    event, final = events[-1]
+    assert event == "done"
+    assert final["answer"] == "Paris."
+    assert final["usage"]["total_tokens"] == 6
+    assert 0 < final["time_to_first_token_ms"] <= final["latency_ms"]
+
+
+def test_stream_rejects_model_from_other_provider():
+    responses = asyncio.run(post_many("/chat/groq/gpt-5/stream", 1))
+    assert responses[0].status_code == 400
+
+# --- Test Cases for /compare ---
+
+
+def test_compare_runs_models_concurrently_with_partial_failures(monkeypatch):
+    async def slow_chat(model_name, messages, **kwargs):
+        await asyncio.sleep(5)
+
+    async def failing_chat(model_name, messages, **kwargs):
+        return {"answer": None, "raw": None, "usage": None, "error": "Rate limit exceeded"}
+
+    monkeypatch.setattr(openai_service, "chat_with_model", fake_chat_with_model)
+    monkeypatch.setattr(google_gemini_service, "chat_with_model", slow_chat)
+    monkeypatch.setattr(groq_service, "chat_with_model", failing_chat)
+
+    async def compare():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post("/compare", json={
+                "question": "Capital of France?",
+                "models": ["gpt-5", "gpt-5-mini", "gemini-2.5-flash", "llama-3.1-8b-instant"],
+                "timeout_seconds": 0.5,
+            })
+
+    started = time.perf_counter()
+    response = asyncio.run(compare())
+    elapsed = time.perf_counter() - started
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["original_question"] == "Capital of France?"
+    by_model = {item["model"]: item for item in body["responses"]}
+    assert list(by_model) == ["gpt-5", "gpt-5-mini", "gemini-2.5-flash", "llama-3.1-8b-instant"]
+    assert by_model["gpt-5"]["answer"] == "echo: Capital of France?"
+    assert by_model["gpt-5-mini"]["error_message"] is None
+    assert "timed out" in by_model["gemini-2.5-flash"]["error_message"]
+    assert by_model["llama-3.1-8b-instant"]["error_message"] == "Rate limit exceeded"
+    # Slowest model bounds the wall clock: two 0.2s calls + one 0.5s timeout, not their sum.
+    assert elapsed < 1.5
+
+
+def test_compare_stream_interleaves_models_without_head_of_line_blocking(monkeypatch):
+    async def slow_stream(model_name, messages, **kwargs):
+        await asyncio.sleep(0.3)
+        yield {"type": "delta", "delta": "slow"}
+        yield {"type": "done", "answer": "slow", "raw": None, "usage": None, "error": None}
+
+    monkeypatch.setattr(openai_service, "stream_chat_with_model", slow_stream)
+    monkeypatch.setattr(groq_service, "stream_chat_with_model", fake_stream_chat_with_model)
+
+    async def compare_stream():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post("/compare/stream?format=ndjson", json={
+                "question": "Capital of France?",
+                "models": ["gpt-5", "llama-3.1-8b-instant"],
+            })
+
+    response = asyncio.run(compare_stream())
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    events = [json.loads(line) for line in response.text.splitlines()]
+
+    # The fast model streams and finishes before the slow model's first token.
+    fast_done = next(i for i, e in enumerate(events)
+                     if e["event"] == "done" and e["model"] == "llama-3.1-8b-instant")
+    slow_first = next(i for i, e in enumerate(events)
+                      if e["event"] == "delta" and e["model"] == "gpt-5")
+    assert fast_done < slow_first
+
+    done = {e["model"]: e["response"] for e in events if e["event"] == "done"}
+    assert done["llama-3.1-8b-instant"]["answer"] == "Paris."
+    assert done["gpt-5"]["answer"] == "slow"
+    assert events[-1]["event"] == "end"
+
+# --- Test Cases for response shaping ---
+
+
+def test_raw_response_omitted_by_default_and_fields_selectable(monkeypatch):
+    async def fake_chat(model_name, messages, **kwargs):
+        return {"answer": "lean", "raw": {"id": "chatcmpl-1", "choices": []},
+                "usage": {"total_tokens": 5}, "error": None}
+
+    monkeypatch.setattr(openai_service, "chat_with_model", fake_chat)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            default = await client.post("/chat/openai/gpt-nano", json={"question": "Lean default"})
+            selected = await client.post("/chat/openai/gpt-nano?fields=answer,usage",
+                                         json={"question": "Lean fields"})
+            everything = await client.post("/chat/openai/gpt-nano", json={"question": "Lean all"},
+                                           headers={"X-Response-Fields": "all"})
+            unknown = await client.post("/chat/openai/gpt-nano?fields=answer,bogus",
+                                        json={"question": "Lean unknown"})
+            return default, selected, everything, unknown
+
+    default, selected, everything, unknown = asyncio.run(scenario())
+    assert "raw_response" not in default.json()
+    assert default.json()["answer"] == "lean" and "latency_ms" in default.json()
+    assert selected.json() == {"answer": "lean", "usage": {"total_tokens": 5}}
+    assert everything.json()["raw_response"] == {"id": "chatcmpl-1", "choices": []}
+    assert unknown.status_code == 400
+
+
+def test_compare_applies_fields_to_each_response(fake_providers):
+    async def scenario():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post("/compare?fields=model,answer", json={
+                "question": "Lean compare", "models": ["gpt-5", "gemini-2.5-flash"]})
+
+    body = asyncio.run(scenario()).json()
+    assert body["original_question"] == "Lean compare"
+    assert body["responses"] == [{"model": "gpt-5", "answer": "echo: Lean compare"},
+                                 {"model": "gemini-2.5-flash", "answer": "echo: Lean compare"}]
+
+# --- Test Cases for /chat/{provider}/{model}/batch ---
+
+
+def test_batch_streams_results_in_completion_order_with_bounded_concurrency(monkeypatch):
+    active = []
+    peak = []
+    delays = {"q0": 0.15, "q1": 0.01, "q2": 0.05, "q3": 0.01, "q4": 0.02}
+
+    async def fake_chat(model_name, messages, **kwargs):
+        active.append(1)
+        peak.append(len(active))
+        await asyncio.sleep(delays[messages[-1]["content"]])
+        active.pop()
+        if messages[-1]["content"] == "q3":
+            return {"answer": None, "raw": None, "usage": None, "error": "bad request", "status_code": 400}
+        return {"answer": messages[-1]["content"].upper(), "raw": None, "usage": None, "error": None}
+
+    monkeypatch.setattr(groq_service, "chat_with_model", fake_chat)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post("/chat/groq/llama-3.3-70b-versatile/batch?fields=answer,error_message", json={
+                "requests": [{"question": f"q{i}"} for i in range(5)], "concurrency": 2})
+
+    response = asyncio.run(scenario())
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    results = lines[:-1]
+    assert sorted(line["index"] for line in results) == [0, 1, 2, 3, 4]
+    assert results[-1]["index"] == 0  # The slowest request finishes last
+    assert {line["index"]: line["response"]["answer"] for line in results}[2] == "Q2"
+    assert lines[-1] == {"event": "end", "model": "llama-3.3-70b-versatile", "count": 5, "errors": 1}
+    assert max(peak) == 2
+
+
+def test_batch_rejects_model_from_other_provider():
+    async def scenario():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post("/chat/openai/gemini-2.5-pro/batch", json={"requests": [{"question": "x"}]})
+
+    assert asyncio.run(scenario()).status_code == 400
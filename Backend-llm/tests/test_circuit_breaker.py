@@ -0,0 +1,181 @@
+# test_circuit_breaker.py
+import asyncio
+
+import httpx
+
+from api import main
+from api.pydantic_models import ModelName
+from api.services import chat_service, google_gemini_service, groq_service, openai_service
+from api.services.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitBreakers
+from api.services.provider_errors import describe_error
+
+
+def ok(answer):
+    return {"answer": answer, "raw": None, "usage": None, "error": None}
+
+
+def failure(status_code=None, error_type="other", **extra):
+    return {"answer": None, "raw": None, "usage": None, "error": "upstream failed",
+            "status_code": status_code, "error_type": error_type, **extra}
+
+# --- Test Cases for CircuitBreaker ---
+
+
+def test_breaker_opens_on_error_rate_and_recovers_after_probe():
+    breaker = CircuitBreaker(window_size=4, min_requests=4, error_rate_threshold=0.5, open_seconds=0.05)
+    for failed in (False, True, False, True):
+        breaker.record(failed, 0.1)
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+
+    asyncio.run(asyncio.sleep(0.06))
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()       # One probe
+    assert not breaker.allow()   # Others wait for its outcome
+    breaker.record(False, 0.1)
+    assert breaker.state == CLOSED and breaker.allow()
+
+
+def test_breaker_opens_on_slow_calls_and_failed_probe_reopens():
+    breaker = CircuitBreaker(min_requests=2, slow_call_seconds=1.0, slow_call_rate_threshold=0.5,
+                             open_seconds=0.01)
+    breaker.record(False, 2.0)
+    breaker.record(False, 2.5)
+    assert breaker.state == OPEN
+    asyncio.run(asyncio.sleep(0.02))
+    assert breaker.allow()
+    breaker.record(True, 0.1)
+    assert breaker.state == OPEN and breaker.opened == 2
+
+
+def test_client_errors_do_not_count_against_the_provider():
+    async def scenario():
+        breakers = CircuitBreakers(min_requests=2)
+        for _ in range(3):
+            await breakers.track("openai", asyncio.sleep(0, failure(status_code=400)))
+        for _ in range(2):
+            await breakers.track("groq", asyncio.sleep(0, failure(status_code=503)))
+        return breakers
+
+    breakers = asyncio.run(scenario())
+    assert breakers.breaker("openai").state == CLOSED
+    assert breakers.breaker("groq").state == OPEN
+
+
+def test_transport_errors_count_and_unsent_requests_do_not():
+    class APIConnectionError(Exception):
+        pass
+
+    async def scenario():
+        breakers = CircuitBreakers(min_requests=2)
+        for _ in range(3):  # Missing key or SDK: no status, nothing was sent
+            await breakers.track("openai", asyncio.sleep(0, {"answer": None, "error": "OpenAI API key not provided."}))
+        for _ in range(2):
+            await breakers.track("groq", asyncio.sleep(0, failure(**describe_error(APIConnectionError()))))
+        return breakers
+
+    breakers = asyncio.run(scenario())
+    assert breakers.breaker("openai").state == CLOSED
+    assert breakers.breaker("groq").state == OPEN
+
+# --- Test Cases for failover ---
+
+
+def test_open_breaker_fails_over_along_the_chain():
+    calls = []
+
+    async def start(model_name):
+        calls.append(model_name)
+        return ok(model_name.value)
+
+    async def scenario():
+        breakers = CircuitBreakers(
+            fallbacks={"gpt-5-mini": ["gemini-2.5-flash", "llama-3.3-70b-versatile"]}, open_seconds=60)
+        breakers.breaker("openai")._open()
+        breakers.breaker("google")._open()
+        return breakers, await breakers.call(ModelName.GPT_5_MINI, start)
+
+    breakers, result = asyncio.run(scenario())
+    assert calls == [ModelName.LLAMA_3_3_70B_VERSATILE]
+    assert result["served_by"] == "llama-3.3-70b-versatile"
+    assert breakers.stats()["failovers"] == {"gpt-5-mini": 1}
+
+
+def test_open_breaker_without_fallback_fails_fast():
+    async def start(model_name):
+        raise AssertionError("provider must not be called")
+
+    async def scenario():
+        breakers = CircuitBreakers(open_seconds=60)
+        breakers.breaker("openai")._open()
+        return await breakers.call(ModelName.GPT_5, start)
+
+    result = asyncio.run(scenario())
+    assert result["status_code"] == 503 and "circuit open" in result["error"]
+
+
+def test_chat_fails_over_after_provider_error(monkeypatch):
+    async def failing_openai(model_name, messages, **kwargs):
+        return failure(status_code=500)
+
+    async def gemini(model_name, messages, **kwargs):
+        return ok("from gemini")
+
+    monkeypatch.setattr(openai_service, "chat_with_model", failing_openai)
+    monkeypatch.setattr(google_gemini_service, "chat_with_model", gemini)
+    breakers = CircuitBreakers(fallbacks={"gpt-5-mini": ["gemini-2.5-flash"]})
+    monkeypatch.setattr(chat_service, "get_circuit_breakers", lambda: breakers)
+
+    async def ask():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post("/chat/openai/gpt-5-mini", json={"question": "Failover?"})
+
+    body = asyncio.run(ask()).json()
+    assert body["answer"] == "from gemini"
+    assert body["model"] == "gpt-5-mini"
+    assert body["served_by"] == "gemini-2.5-flash"
+    assert breakers.breaker("openai").stats()["error_rate"] == 1.0
+
+
+def test_missing_api_key_is_reported_instead_of_failing_over(monkeypatch):
+    async def gemini(model_name, messages, **kwargs):
+        raise AssertionError("a configuration error must not fail over")
+
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    monkeypatch.setattr(google_gemini_service, "chat_with_model", gemini)
+    breakers = CircuitBreakers(fallbacks={"gpt-5-mini": ["gemini-2.5-flash"]}, min_requests=1)
+    monkeypatch.setattr(chat_service, "get_circuit_breakers", lambda: breakers)
+
+    async def ask():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post("/chat/openai/gpt-5-mini", json={"question": "Key?"})
+
+    body = asyncio.run(ask()).json()
+    assert body["error_message"] == "OpenAI API key not provided."
+    assert body["served_by"] is None
+    assert breakers.breaker("openai").state == CLOSED
+    assert breakers.breaker("openai").stats()["error_rate"] == 0.0
+
+
+def test_stream_fails_over_before_first_token(monkeypatch):
+    async def failing_groq(model_name, messages, **kwargs):
+        yield {"type": "done", **failure(error_type="timeout")}
+
+    async def openai_stream(model_name, messages, **kwargs):
+        yield {"type": "delta", "delta": "Hi"}
+        yield {"type": "done", **ok("Hi")}
+
+    monkeypatch.setattr(groq_service, "stream_chat_with_model", failing_groq)
+    monkeypatch.setattr(openai_service, "stream_chat_with_model", openai_stream)
+    breakers = CircuitBreakers(fallbacks={"llama-3.1-8b-instant": ["gpt-nano"]})
+    monkeypatch.setattr(chat_service, "get_circuit_breakers", lambda: breakers)
+
+    async def collect():
+        return [event async for event in chat_service.stream_chat(
+            ModelName.LLAMA_3_1_8B_INSTANT, chat_service.SingleModelChatRequest(question="Stream failover?"))]
+
+    events = asyncio.run(collect())
+    assert events[0] == {"type": "delta", "delta": "Hi"}
+    assert events[-1]["response"].served_by == ModelName.GPT_NANO
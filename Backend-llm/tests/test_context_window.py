@@ -0,0 +1,108 @@
+# test_context_window.py
+import asyncio
+
+import httpx
+
+from api import main
+from api.services import context_window, openai_service
+from api.services.context_window import count_message_tokens, fit_to_budget, get_token_budget
+
+
+def message(role: str, words: int):
+    return {"role": role, "content": " ".join(["word"] * words)}
+
+# --- Test Cases for token counting ---
+
+
+def test_message_token_counts_are_memoized(monkeypatch):
+    counted = []
+    original = context_window.count_text_tokens
+    monkeypatch.setattr(context_window, "count_text_tokens",
+                        lambda text: counted.append(text) or original(text))
+    msg = {"role": "user", "content": "A fairly unique message for memoization"}
+    first = count_message_tokens(msg)
+    assert count_message_tokens(dict(msg)) == first
+    assert len(counted) == 1
+    assert first > context_window.MESSAGE_OVERHEAD_TOKENS
+
+# --- Test Cases for fit_to_budget ---
+
+
+def test_everything_kept_within_budget():
+    messages = [message("system", 5), message("user", 5), message("assistant", 5), message("user", 5)]
+    kept, used, dropped, dropped_tokens = fit_to_budget(messages, 10_000)
+    assert kept == messages
+    assert dropped == dropped_tokens == 0
+    assert used == sum(count_message_tokens(m) for m in messages)
+
+
+def test_oldest_history_dropped_system_and_question_kept():
+    system = message("system", 20)
+    history = []
+    for turn in range(10):
+        history += [message("user", 50 + turn), message("assistant", 50 + turn)]
+    question = message("user", 10)
+    messages = [system] + history + [question]
+
+    budget = sum(count_message_tokens(m) for m in [system, question] + history[-4:]) + 1
+    kept, used, dropped, dropped_tokens = fit_to_budget(messages, budget)
+
+    assert kept[0] == system and kept[-1] == question
+    assert kept[1:-1] == history[-4:]
+    assert kept[1]["role"] == "user"
+    assert dropped == 16
+    assert dropped_tokens == sum(count_message_tokens(m) for m in history[:16])
+    assert used <= budget
+
+
+def test_window_never_starts_with_orphaned_assistant_reply():
+    messages = [message("user", 100), message("assistant", 10), message("user", 10)]
+    budget = count_message_tokens(messages[1]) + count_message_tokens(messages[2])
+    kept, _, dropped, _ = fit_to_budget(messages, budget)
+    assert kept == [messages[2]]
+    assert dropped == 2
+
+
+def test_budget_overrides_from_env(monkeypatch):
+    monkeypatch.setenv("CONTEXT_TOKEN_BUDGETS", '{"gpt-5": 1234}')
+    assert get_token_budget("gpt-5") == 1234
+    assert get_token_budget("gemini-2.5-pro") == context_window.DEFAULT_TOKEN_BUDGETS["gemini-2.5-pro"]
+    monkeypatch.setenv("CONTEXT_TOKEN_BUDGET", "999")
+    assert get_token_budget("gemini-2.5-pro") == 999
+
+# --- Test Cases for trimmed chat requests ---
+
+
+def test_chat_response_reports_dropped_tokens(monkeypatch):
+    sent = []
+
+    async def fake_chat(model_name, messages, **kwargs):
+        sent.append(messages)
+        return {"answer": "ok", "raw": None, "usage": None, "error": None}
+
+    monkeypatch.setattr(openai_service, "chat_with_model", fake_chat)
+    monkeypatch.setenv("CONTEXT_TOKEN_BUDGETS", '{"gpt-nano": 200}')
+
+    history = []
+    for turn in range(20):
+        history += [{"role": "user", "content": f"question {turn} " + "pad " * 30},
+                    {"role": "assistant", "content": f"answer {turn} " + "pad " * 30}]
+
+    async def ask():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post("/chat/openai/gpt-nano", json={
+                "question": "Latest?", "chat_history": history, "system_prompts": ["Be brief."]})
+
+    body = asyncio.run(ask()).json()
+    messages = sent[0]
+    assert messages[0] == {"role": "system", "content": "Be brief."}
+    assert messages[-1] == {"role": "user", "content": "Latest?"}
+    assert messages[-2]["content"].startswith("answer 19")
+    assert len(messages) < len(history) + 2
+
+    context = body["context"]
+    assert context["token_budget"] == 200
+    assert context["prompt_tokens"] <= 200
+    assert context["dropped_messages"] == len(history) + 2 - len(messages)
+    assert context["dropped_tokens"] > 0
@@ -0,0 +1,113 @@
+# test_conversation_summary.py
+import asyncio
+
+from api.pydantic_models import ModelProvider
+from api.services import chat_service, groq_service
+from api.services.conversation_summary import ConversationSummarizer, SUMMARY_PREFIX
+from api.services.rate_limiter import RateLimiter
+
+
+def build_messages(turns: int):
+    history = []
+    for turn in range(turns):
+        history += [{"role": "user", "content": f"question {turn}"},
+                    {"role": "assistant", "content": f"answer {turn}"}]
+    return [{"role": "system", "content": "Be brief."}] + history + [{"role": "user", "content": "Now?"}]
+
+
+class FakeSummarizerModel:
+    def __init__(self):
+        self.prompts = []
+
+    async def summarize(self, model_name, messages):
+        assert model_name.get_provider() == ModelProvider.GROQ
+        self.prompts.append(messages[-1]["content"])
+        return {"answer": f"summary v{len(self.prompts)}", "raw": None, "usage": None, "error": None}
+
+
+async def settle(summarizer):
+    await asyncio.gather(*summarizer._tasks)
+
+
+def test_summary_replaces_old_turns_and_updates_incrementally():
+    async def scenario():
+        model = FakeSummarizerModel()
+        summarizer = ConversationSummarizer(keep_recent=4, min_new_messages=4)
+
+        # First long request: sent in full, summary built in the background.
+        messages = build_messages(6)
+        sent, summarized = summarizer.apply("s1", messages, model.summarize)
+        assert sent == messages and summarized == 0
+        await settle(summarizer)
+        assert "question 0" in model.prompts[0] and "question 4" not in model.prompts[0]
+
+        # Next turn: summary + recent turns only.
+        messages = build_messages(7)
+        sent, summarized = summarizer.apply("s1", messages, model.summarize)
+        assert summarized == 8
+        assert sent[0] == {"role": "system", "content": "Be brief."}
+        assert sent[1] == {"role": "system", "content": SUMMARY_PREFIX + "summary v1"}
+        assert sent[2:] == messages[9:]
+        assert not summarizer._pending  # Only 2 new aged-out messages; below the threshold
+
+        # Two turns later the newly aged-out turns are folded into the existing summary.
+        messages = build_messages(9)
+        summarizer.apply("s1", messages, model.summarize)
+        await settle(summarizer)
+        assert "summary v1" in model.prompts[1]
+        assert "question 3" not in model.prompts[1] and "question 4" in model.prompts[1]
+        sent, summarized = summarizer.apply("s1", build_messages(9), model.summarize)
+        assert summarized == 14
+        assert sent[1]["content"].endswith("summary v2")
+
+    asyncio.run(scenario())
+
+
+def test_edited_history_discards_summary():
+    async def scenario():
+        model = FakeSummarizerModel()
+        summarizer = ConversationSummarizer(keep_recent=4, min_new_messages=4)
+        summarizer.apply("s1", build_messages(6), model.summarize)
+        await settle(summarizer)
+
+        edited = build_messages(7)
+        edited[1] = {"role": "user", "content": "a different first question"}
+        sent, summarized = summarizer.apply("s1", edited, model.summarize)
+        assert summarized == 0
+        assert sent == edited
+        await settle(summarizer)
+
+    asyncio.run(scenario())
+
+
+def test_failed_summary_is_not_stored():
+    async def failing(model_name, messages):
+        return {"answer": None, "raw": None, "usage": None, "error": "rate limited"}
+
+    async def scenario():
+        summarizer = ConversationSummarizer(keep_recent=4, min_new_messages=4)
+        summarizer.apply("s1", build_messages(6), failing)
+        await settle(summarizer)
+        return summarizer
+
+    summarizer = asyncio.run(scenario())
+    assert summarizer.stats()["failures"] == 1
+    assert summarizer.stats()["sessions"] == 0
+
+
+def test_summary_updates_go_through_the_rate_limiter(monkeypatch):
+    model = FakeSummarizerModel()
+    limiter = RateLimiter()
+    monkeypatch.setattr(groq_service, "chat_with_model", lambda model_name, messages, **kwargs:
+                        model.summarize(chat_service.ModelName(model_name), messages))
+    monkeypatch.setattr(chat_service, "get_rate_limiter", lambda: limiter)
+
+    async def scenario():
+        summarizer = ConversationSummarizer(keep_recent=4, min_new_messages=4)
+        summarizer.apply("s1", build_messages(6), chat_service.summarize)
+        await settle(summarizer)
+        return summarizer
+
+    summarizer = asyncio.run(scenario())
+    assert summarizer.stats()["updates"] == 1
+    assert limiter.stats()["providers"]["groq"]["models"]["llama-3.1-8b-instant"]["requests"] == 1
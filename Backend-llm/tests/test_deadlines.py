@@ -0,0 +1,217 @@
+# test_deadlines.py
+import asyncio
+import json
+import time
+
+import httpx
+
+from api import main
+from api.pydantic_models import ModelName, SingleModelChatRequest
+from api.services import chat_service, google_gemini_service, openai_service
+from api.services.metrics import ChatMetrics
+from api.services.single_flight import SingleFlight
+
+
+def cancelled_count(metrics: ChatMetrics, reason: str, model: str = "gpt-5") -> float:
+    return metrics.registry.get_sample_value(
+        "backend_llm_cancelled_requests_total", {"provider": "openai", "model": model, "reason": reason}) or 0
+
+
+class SlowProvider:
+    """A provider that never answers in time and records how its calls ended."""
+
+    def __init__(self):
+        self.calls = []
+        self.cancelled = 0
+        self.closed = 0
+
+    async def chat_with_model(self, model_name, messages, **kwargs):
+        self.calls.append(kwargs)
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return {"answer": "late", "raw": None, "usage": None, "error": None}
+
+    async def stream_chat_with_model(self, model_name, messages, **kwargs):
+        self.calls.append(kwargs)
+        try:
+            yield {"type": "delta", "delta": "Par"}
+            await asyncio.sleep(10)
+            yield {"type": "done", "answer": "Paris", "raw": None, "usage": None, "error": None}
+        finally:
+            self.closed += 1
+
+
+def use_slow_provider(monkeypatch) -> tuple:
+    provider, metrics = SlowProvider(), ChatMetrics()
+    monkeypatch.setattr(openai_service, "chat_with_model", provider.chat_with_model)
+    monkeypatch.setattr(openai_service, "stream_chat_with_model", provider.stream_chat_with_model)
+    monkeypatch.setattr(chat_service, "get_metrics", lambda: metrics)
+    return provider, metrics
+
+
+async def post_then_disconnect(path: str, body: dict, disconnect_after: float) -> list:
+    """Calls the app over raw ASGI with a client that goes away after ``disconnect_after`` seconds."""
+    messages = [{"type": "http.request", "body": json.dumps(body).encode(), "more_body": False}]
+    sent = []
+
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        await asyncio.sleep(disconnect_after)
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+             "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"", "root_path": "",
+             "headers": [(b"host", b"test"), (b"content-type", b"application/json")],
+             "client": ("127.0.0.1", 50000), "server": ("test", 80)}
+    await main.app(scope, receive, send)
+    return sent
+
+# --- Test Cases for Request Deadlines ---
+
+
+def test_timeout_header_cancels_the_provider_call(monkeypatch):
+    provider, metrics = use_slow_provider(monkeypatch)
+
+    async def ask():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            started = time.perf_counter()
+            response = await client.post("/chat/openai/gpt-5", json={"question": "Deadline header?"},
+                                         headers={"X-Request-Timeout": "0.2"})
+            return response, time.perf_counter() - started
+
+    response, elapsed = asyncio.run(ask())
+    assert elapsed < 2
+    assert "timed out after 0.2 seconds" in response.json()["error_message"]
+    assert provider.cancelled == 1
+    assert cancelled_count(metrics, "deadline") == 1
+
+
+def test_expired_deadline_never_calls_the_provider(monkeypatch):
+    provider, metrics = use_slow_provider(monkeypatch)
+
+    async def ask():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post("/chat/openai/gpt-5", json={"question": "Too late?"},
+                                     headers={"X-Request-Deadline": str(time.time() - 1)})
+
+    body = asyncio.run(ask()).json()
+    assert "deadline passed" in body["error_message"]
+    assert provider.calls == []
+    assert cancelled_count(metrics, "deadline") == 1
+
+
+def test_remaining_time_is_passed_to_the_provider(monkeypatch):
+    calls = []
+
+    async def fake_chat(model_name, messages, **kwargs):
+        calls.append(kwargs)
+        return {"answer": "ok", "raw": None, "usage": None, "error": None}
+
+    monkeypatch.setattr(openai_service, "chat_with_model", fake_chat)
+    monkeypatch.setattr(chat_service, "get_single_flight", lambda: SingleFlight())
+    request = SingleModelChatRequest(question="Remaining time?", timeout_seconds=30)
+    asyncio.run(chat_service.execute_chat(ModelName.GPT_5, request, timeout=5))
+    assert 4 < calls[0]["timeout"] <= 5
+
+    class Clients:
+        gemini_request_options = {"timeout": 600.0}
+
+    assert google_gemini_service.gemini_request_options(Clients(), 2.5) == {"timeout": 2.5}
+    assert google_gemini_service.gemini_request_options(Clients()) == {"timeout": 600.0}
+
+def test_a_shared_call_gets_the_latest_waiter_deadline(monkeypatch):
+    calls = []
+
+    async def fake_chat(model_name, messages, **kwargs):
+        calls.append(kwargs)
+        await asyncio.sleep(0.01)
+        return {"answer": "ok", "raw": None, "usage": None, "error": None}
+
+    async def fake_stream(model_name, messages, **kwargs):
+        calls.append(kwargs)
+        await asyncio.sleep(0.01)
+        yield {"type": "done", "answer": "ok", "raw": None, "usage": None, "error": None}
+
+    async def drain(stream):
+        return [event async for event in stream]
+
+    monkeypatch.setattr(openai_service, "chat_with_model", fake_chat)
+    monkeypatch.setattr(openai_service, "stream_chat_with_model", fake_stream)
+    monkeypatch.setattr(chat_service, "get_single_flight", lambda: single_flight)
+    single_flight = SingleFlight()
+    request = SingleModelChatRequest(question="Shared deadline?")
+
+    async def ask_together():
+        await asyncio.gather(chat_service.execute_chat(ModelName.GPT_5, request, timeout=5),
+                             chat_service.execute_chat(ModelName.GPT_5, request, timeout=8))
+        await asyncio.gather(drain(chat_service.stream_chat(ModelName.GPT_5, request, timeout=5)),
+                             drain(chat_service.stream_chat(ModelName.GPT_5, request, timeout=8)))
+        await asyncio.gather(chat_service.execute_chat(ModelName.GPT_5, request, timeout=5),
+                             chat_service.execute_chat(ModelName.GPT_5, request))
+
+    asyncio.run(ask_together())
+    assert len(calls) == 3 and single_flight.stats()["coalesced"] == 3
+    assert 7 < calls[0]["timeout"] <= 8 and 7 < calls[1]["timeout"] <= 8
+    assert "timeout" not in calls[2]  # One waiter has no deadline
+
+def test_timeouts_from_the_call_path_are_not_deadlines(monkeypatch):
+    metrics = ChatMetrics()
+
+    async def timing_out_chat(model_name, messages, **kwargs):
+        raise asyncio.TimeoutError
+
+    async def timing_out_stream(model_name, messages, **kwargs):
+        raise TimeoutError
+        yield
+
+    monkeypatch.setattr(openai_service, "chat_with_model", timing_out_chat)
+    monkeypatch.setattr(openai_service, "stream_chat_with_model", timing_out_stream)
+    monkeypatch.setattr(chat_service, "get_metrics", lambda: metrics)
+    monkeypatch.setattr(chat_service, "get_circuit_breakers", lambda: None)
+    monkeypatch.setattr(chat_service, "get_rate_limiter", lambda: None)
+    request = SingleModelChatRequest(question="Stray timeout?")
+
+    async def ask():
+        response = await chat_service.execute_chat(ModelName.GPT_5, request)
+        events = [event async for event in chat_service.stream_chat(ModelName.GPT_5, request)]
+        return response, events[-1]["response"]
+
+    response, streamed = asyncio.run(ask())
+    assert response.error_message == "Model gpt-5 timed out."
+    assert streamed.error_message == "Model gpt-5 timed out."
+    assert cancelled_count(metrics, "deadline") == 0
+
+# --- Test Cases for Client Disconnects ---
+
+
+def test_disconnect_cancels_a_pending_chat_request(monkeypatch):
+    provider, metrics = use_slow_provider(monkeypatch)
+
+    started = time.perf_counter()
+    sent = asyncio.run(post_then_disconnect("/chat/openai/gpt-5", {"question": "Still there?"}, 0.2))
+    assert time.perf_counter() - started < 2
+    assert sent[0]["status"] == main.CLIENT_CLOSED_REQUEST
+    assert provider.cancelled == 1
+    assert cancelled_count(metrics, "client") == 1
+    assert metrics.registry.get_sample_value(
+        "backend_llm_requests_total", {"provider": "openai", "model": "gpt-5", "cached": "false"}) is None
+
+
+def test_disconnect_closes_the_provider_stream(monkeypatch):
+    provider, metrics = use_slow_provider(monkeypatch)
+
+    started = time.perf_counter()
+    sent = asyncio.run(post_then_disconnect("/chat/openai/gpt-5/stream", {"question": "Stream gone?"}, 0.2))
+    assert time.perf_counter() - started < 2
+    assert b"event: delta" in b"".join(message.get("body", b"") for message in sent)
+    assert provider.closed == 1
+    assert cancelled_count(metrics, "client") == 1
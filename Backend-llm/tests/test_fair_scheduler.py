@@ -0,0 +1,122 @@
+# test_fair_scheduler.py
+import asyncio
+
+import httpx
+
+from api import main
+from api.services import chat_service, openai_service
+from api.services.fair_scheduler import FairScheduler, Requester
+from api.services.provider_errors import RATE_LIMIT
+
+
+def ok():
+    return {"answer": "ok", "raw": None, "usage": None, "error": None}
+
+
+async def run_in_order(scheduler: FairScheduler, requesters: list) -> list:
+    """Queues one call per requester behind a busy slot and returns who was served in which order."""
+    served = []
+    release = asyncio.Event()
+
+    async def hold():
+        await release.wait()
+        return ok()
+
+    def call_for(requester):
+        async def call():
+            served.append(requester.user_id)
+            await asyncio.sleep(0)
+            return ok()
+        return call
+
+    busy = asyncio.create_task(scheduler.call("openai", Requester("warmup"), hold))
+    await asyncio.sleep(0)
+    tasks = []
+    for requester in requesters:
+        tasks.append(asyncio.create_task(scheduler.call("openai", requester, call_for(requester))))
+        await asyncio.sleep(0)  # Keep arrival order
+    release.set()
+    await asyncio.gather(busy, *tasks)
+    return served
+
+# --- Test Cases for FairScheduler ---
+
+
+def test_a_light_user_is_served_ahead_of_a_heavy_backlog():
+    scheduler = FairScheduler(concurrency=1)
+    heavy = [Requester("script")] * 10
+    served = asyncio.run(run_in_order(scheduler, heavy + [Requester("alice")]))
+    assert served.index("alice") <= 1
+    assert len(served) == 11
+
+
+def test_tier_weights_set_each_users_share():
+    scheduler = FairScheduler(concurrency=1, tier_weights={"free": 1, "pro": 4})
+    requesters = [Requester("free-user", "free"), Requester("pro-user", "pro")] * 12
+    served = asyncio.run(run_in_order(scheduler, requesters))
+    assert served[:10].count("pro-user") == 8
+    stats = scheduler.stats()["providers"]["openai"]
+    assert stats["tiers"]["pro"]["requests"] == 12 and stats["tiers"]["free"]["requests"] == 12
+    assert stats["in_flight"] == 0 and stats["queue_depth"] == 0
+
+
+def test_requests_give_up_after_the_max_queue_time():
+    scheduler = FairScheduler(concurrency=1, max_queue_seconds=0.05)
+
+    async def scenario():
+        async def slow():
+            await asyncio.sleep(0.2)
+            return ok()
+
+        async def fast():
+            return ok()
+
+        busy = asyncio.create_task(scheduler.call("groq", Requester("script"), slow))
+        await asyncio.sleep(0)
+        cancelled = asyncio.create_task(scheduler.call("groq", Requester("bob"), fast))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        rejected = await scheduler.call("groq", Requester("alice"), fast)
+        await busy
+        return rejected, await scheduler.call("groq", Requester("alice"), fast)
+
+    rejected, later = asyncio.run(scenario())
+    assert rejected["error_type"] == RATE_LIMIT and rejected["status_code"] == 429
+    assert later["answer"] == "ok"  # Neither the rejected nor the cancelled waiter kept a slot
+    stats = scheduler.stats()["providers"]["groq"]
+    assert stats["tiers"]["default"]["rejected"] == 1
+    assert stats["in_flight"] == 0 and stats["queue_depth"] == 0
+
+# --- Test Cases for scheduled chat requests ---
+
+
+def test_user_headers_reach_the_scheduler(monkeypatch):
+    scheduler = FairScheduler(concurrency=2, tier_weights={"pro": 4}, trust_tier_header=True)
+
+    async def fake_chat(model_name, messages, **kwargs):
+        return ok()
+
+    monkeypatch.setattr(openai_service, "chat_with_model", fake_chat)
+    monkeypatch.setattr(chat_service, "get_fair_scheduler", lambda: scheduler)
+    monkeypatch.setattr(main, "get_fair_scheduler", lambda: scheduler)
+
+    async def ask():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            chat = await client.post("/chat/openai/gpt-5", json={"question": "Scheduled?"},
+                                     headers={"X-User-Id": "user_1", "X-User-Tier": "pro"})
+            anonymous = await client.post("/chat/openai/gpt-5", json={"question": "Anyone?"})
+            return chat.json(), anonymous.json(), (await client.get("/scheduler/stats")).json()
+
+    chat, anonymous, stats = asyncio.run(ask())
+    assert chat["answer"] == "ok" and anonymous["answer"] == "ok"
+    assert stats["enabled"] is True
+    tiers = stats["providers"]["openai"]["tiers"]
+    assert tiers["pro"]["requests"] == 1 and tiers["default"]["requests"] == 1
+
+
+def test_tier_header_is_ignored_unless_trusted():
+    trusting = FairScheduler(trust_tier_header=True)
+    assert trusting.requester("user_1", "pro") == Requester("user_1", "pro")
+    assert trusting.requester(None, None) == Requester()
+    assert FairScheduler().requester("user_1", "pro") == Requester("user_1", "default")
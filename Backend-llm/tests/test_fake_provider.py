@@ -0,0 +1,98 @@
+# test_fake_provider.py
+import asyncio
+import json
+import random
+
+import httpx
+
+from api import main
+from api.pydantic_models import ModelProvider
+from api.services import fake_provider
+from api.services.fake_provider import FakeProvider, draw_latency
+
+INSTANT = {"default": {"ttft_ms": 0, "tokens_per_second": 0, "completion_tokens": 6}}
+MESSAGES = [{"role": "user", "content": "What is the capital of France?"}]
+
+# --- Test Cases for FakeProvider ---
+
+
+def test_results_mimic_each_provider_shape():
+    async def ask(provider):
+        return await FakeProvider(provider, INSTANT).chat_with_model("some-model", MESSAGES)
+
+    openai_result = asyncio.run(ask(ModelProvider.OPENAI))
+    gemini_result = asyncio.run(ask(ModelProvider.GOOGLE))
+    groq_result = asyncio.run(ask(ModelProvider.GROQ))
+
+    assert openai_result["raw"]["choices"][0]["message"]["content"] == openai_result["answer"]
+    assert openai_result["usage"]["completion_tokens"] == 6
+    assert openai_result["usage"]["total_tokens"] == openai_result["usage"]["prompt_tokens"] + 6
+    assert set(gemini_result["usage"]) == {"prompt_token_count", "candidates_token_count", "total_token_count"}
+    assert gemini_result["raw"]["candidates"][0]["content"]["parts"][0]["text"] == gemini_result["answer"]
+    assert "queue_time" in groq_result["usage"]
+    assert len(openai_result["answer"].split()) == 6
+
+
+def test_answers_and_latencies_are_deterministic():
+    async def ask():
+        provider = FakeProvider(ModelProvider.OPENAI, INSTANT)
+        return [await provider.chat_with_model("gpt-5", MESSAGES) for _ in range(2)]
+
+    first, second = asyncio.run(ask()), asyncio.run(ask())
+    assert first[0]["answer"] == first[1]["answer"] == second[0]["answer"]
+
+    def draws(seed):
+        rng = random.Random(seed)
+        return [draw_latency(rng, 0.2, "lognormal", 0.5) for _ in range(5)]
+
+    assert draws("0:gpt-5") == draws("0:gpt-5")
+    assert draw_latency(None, 0.2, "fixed", 0.5) == 0.2
+
+
+def test_error_injection_reports_rate_limits():
+    settings = {"default": {"ttft_ms": 0, "error_rate": 1.0, "error_type": "rate_limit", "retry_after_s": 2}}
+
+    async def ask():
+        provider = FakeProvider(ModelProvider.GROQ, settings)
+        result = await provider.chat_with_model("llama-3.1-8b-instant", MESSAGES)
+        events = [event async for event in provider.stream_chat_with_model("llama-3.1-8b-instant", MESSAGES)]
+        return result, events
+
+    result, events = asyncio.run(ask())
+    assert result["status_code"] == 429 and result["error_type"] == "rate_limit"
+    assert result["rate_limit"]["retry_after_s"] == 2
+    assert events == [{"type": "done", "answer": None, "raw": None, "usage": None, **result}]
+
+
+def test_stream_deltas_add_up_to_the_answer():
+    settings = {"default": {"ttft_ms": 0, "tokens_per_second": 1000, "completion_tokens": 10,
+                            "stream_chunk_tokens": 3}}
+
+    async def collect():
+        provider = FakeProvider(ModelProvider.GOOGLE, settings)
+        return [event async for event in provider.stream_chat_with_model("gemini-2.5-flash", MESSAGES)]
+
+    events = asyncio.run(collect())
+    deltas = [event["delta"] for event in events if event["type"] == "delta"]
+    assert len(deltas) == 4
+    assert "".join(deltas) == events[-1]["answer"]
+    assert events[-1]["usage"]["candidates_token_count"] == 10
+
+# --- Test Cases for FAKE_PROVIDER_ENABLED ---
+
+
+def test_enabled_fake_provider_answers_without_api_keys(monkeypatch):
+    monkeypatch.setenv("FAKE_PROVIDER_ENABLED", "true")
+    monkeypatch.setenv("FAKE_PROVIDER_SETTINGS", json.dumps(INSTANT))
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    monkeypatch.setattr(fake_provider, "_fake_providers", None)
+
+    async def ask():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post("/chat/openai/gpt-5-mini", json={"question": "Offline?"})
+
+    body = asyncio.run(ask()).json()
+    assert body["error_message"] is None
+    assert len(body["answer"].split()) == 6
+    assert body["usage"]["completion_tokens"] == 6
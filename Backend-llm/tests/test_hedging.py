@@ -0,0 +1,125 @@
+# test_hedging.py
+import asyncio
+
+import httpx
+
+from api import main
+from api.pydantic_models import ModelName
+from api.services import chat_service, google_gemini_service, openai_service
+from api.services.hedging import Hedger
+
+
+def ok(answer):
+    return {"answer": answer, "raw": None, "usage": None, "error": None}
+
+# --- Test Cases for Hedger.call ---
+
+
+def test_slow_primary_is_hedged_and_cancelled():
+    cancelled = []
+    calls = []
+
+    async def start(model_name):
+        calls.append(model_name)
+        delay = 1.0 if len(calls) == 1 else 0.01
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            cancelled.append(len(calls))
+            raise
+        return ok(f"attempt {len(calls)}")
+
+    async def scenario():
+        hedger = Hedger(budget_percent=100, initial_delay=0.02)
+        result = await hedger.call(ModelName.GPT_5, start)
+        await asyncio.sleep(0)
+        return hedger, result
+
+    hedger, result = asyncio.run(scenario())
+    assert result["answer"] == "attempt 2"
+    assert "served_by" not in result
+    assert calls == [ModelName.GPT_5, ModelName.GPT_5]
+    assert cancelled
+    assert hedger.stats()["models"]["gpt-5"] == {
+        "requests": 1, "hedges": 1, "hedge_wins": 1, "budget_denied": 0,
+        "hedge_delay_ms": 20.0, "stream_hedge_delay_ms": 20.0}
+
+
+def test_hedges_are_capped_by_the_budget():
+    calls = []
+
+    async def start(model_name):
+        calls.append(model_name)
+        await asyncio.sleep(0.03)
+        return ok("slow")
+
+    async def scenario():
+        hedger = Hedger(budget_percent=50, initial_delay=0.01)
+        for _ in range(4):
+            await hedger.call(ModelName.GPT_5, start)
+        return hedger
+
+    counters = asyncio.run(scenario()).stats()["models"]["gpt-5"]
+    assert counters["hedges"] == 2 and counters["budget_denied"] == 2
+    assert len(calls) == 6
+
+
+def test_hedge_delay_follows_recent_percentile():
+    hedger = Hedger(percentile=95, min_samples=20, min_delay=0.1)
+    for sample in range(1, 101):
+        hedger.latencies.observe("gpt-5", sample / 100)
+    assert hedger.hedge_delay(ModelName.GPT_5) == 0.95
+    assert hedger.hedge_delay(ModelName.GEMINI_2_5_PRO) == hedger.initial_delay
+
+# --- Test Cases for Hedger.stream ---
+
+
+def test_stream_hedge_wins_on_first_token():
+    closed = []
+
+    def open_stream(model_name):
+        async def events():
+            try:
+                if model_name == ModelName.GEMINI_2_5_PRO:
+                    await asyncio.sleep(1.0)
+                yield {"type": "delta", "delta": f"from {model_name.value}"}
+                yield {"type": "done", **ok(f"from {model_name.value}")}
+            finally:
+                closed.append(model_name)
+        return events()
+
+    async def scenario():
+        hedger = Hedger(budget_percent=100, initial_delay=0.02,
+                        equivalents={"gemini-2.5-pro": "gpt-5"})
+        return [event async for event in hedger.stream(ModelName.GEMINI_2_5_PRO, open_stream)]
+
+    events = asyncio.run(scenario())
+    assert events[0] == {"type": "delta", "delta": "from gpt-5"}
+    assert events[-1]["served_by"] == "gpt-5"
+    assert ModelName.GEMINI_2_5_PRO in closed
+
+# --- Test Cases for hedged chat requests ---
+
+
+def test_response_reports_equivalent_model_that_served_it(monkeypatch):
+    async def slow_gemini(model_name, messages, **kwargs):
+        await asyncio.sleep(1.0)
+        return ok("gemini")
+
+    async def fast_openai(model_name, messages, **kwargs):
+        return ok("openai")
+
+    monkeypatch.setattr(google_gemini_service, "chat_with_model", slow_gemini)
+    monkeypatch.setattr(openai_service, "chat_with_model", fast_openai)
+    hedger = Hedger(budget_percent=100, initial_delay=0.02, equivalents={"gemini-2.5-pro": "gpt-5-mini"})
+    monkeypatch.setattr(chat_service, "get_hedger", lambda: hedger)
+
+    async def ask():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post("/chat/google/gemini-2.5-pro", json={"question": "Hedge me"})
+
+    body = asyncio.run(ask()).json()
+    assert body["answer"] == "openai"
+    assert body["model"] == "gemini-2.5-pro"
+    assert body["served_by"] == "gpt-5-mini"
@@ -0,0 +1,138 @@
+# test_job_queue.py
+from datetime import datetime, timezone
+import asyncio
+
+import httpx
+
+from api import main
+from api.pydantic_models import JobStatus, ModelName, SingleModelChatRequest
+from api.services import groq_service
+from api.services.chat_service import build_query_response
+from api.services.job_queue import JobQueue, JobStore
+
+
+def fake_answer(delay=0.0):
+    async def fake_chat(model_name, messages, **kwargs):
+        await asyncio.sleep(delay)
+        return {"answer": f"answer to {messages[-1]['content']}", "raw": None, "usage": None, "error": None}
+    return fake_chat
+
+# --- Test Cases for JobQueue ---
+
+
+def test_cancel_stops_a_running_job():
+    started = asyncio.Event()
+    cancelled = []
+
+    async def runner(model_name, request_body, timeout):
+        started.set()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(request_body.question)
+            raise
+
+    async def scenario():
+        queue = JobQueue(workers=1, runner=runner)
+        job = await queue.submit(ModelName.GPT_5, SingleModelChatRequest(question="Long one"))
+        queued = await queue.submit(ModelName.GPT_5, SingleModelChatRequest(question="Never runs"))
+        await started.wait()
+        running = await queue.get(job.job_id)
+        # Queued job first: once the running one stops, the free worker claims the next job
+        queued_result = await queue.cancel(queued.job_id)
+        result = await queue.cancel(job.job_id)
+        await asyncio.sleep(0.01)
+        await queue.stop()
+        return running, result, queued_result
+
+    running, result, queued_result = asyncio.run(scenario())
+    assert running.status == JobStatus.RUNNING
+    assert result.status == JobStatus.CANCELLED and result.response is None
+    assert queued_result.status == JobStatus.CANCELLED
+    assert cancelled == ["Long one"]
+
+
+def test_interrupted_jobs_resume_from_the_queue_file(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    store = JobStore(path)
+    store.add("job-1", ModelName.GPT_5, SingleModelChatRequest(question="Survive a restart"))
+    assert store.claim_next()["id"] == "job-1"  # Running when the process stopped
+    store.close()
+
+    async def runner(model_name, request_body, timeout):
+        now = datetime.now(timezone.utc)
+        return build_query_response(model_name, request_body, {"answer": "resumed"}, now, now)
+
+    async def scenario():
+        queue = JobQueue(store=JobStore(path), runner=runner)
+        resumed = await queue.start()
+        job = await queue.wait("job-1", timeout=1)
+        await queue.stop()
+        return resumed, job
+
+    resumed, job = asyncio.run(scenario())
+    assert resumed == 1
+    assert job.status == JobStatus.COMPLETED and job.response.answer == "resumed"
+
+
+def test_finished_results_expire():
+    async def runner(model_name, request_body, timeout):
+        raise RuntimeError("provider exploded")
+
+    async def scenario():
+        queue = JobQueue(result_ttl_seconds=0.05, runner=runner)
+        job = await queue.submit(ModelName.GPT_5, SingleModelChatRequest(question="Short-lived"))
+        finished = await queue.wait(job.job_id, timeout=1)
+        await asyncio.sleep(0.06)
+        expired = await queue.get(job.job_id)
+        await queue.stop()
+        return finished, expired
+
+    finished, expired = asyncio.run(scenario())
+    assert finished.status == JobStatus.COMPLETED
+    assert finished.response.error_message == "provider exploded"
+    assert expired is None
+
+def test_timed_out_long_polls_are_forgotten():
+    async def runner(model_name, request_body, timeout):
+        await asyncio.sleep(10)
+
+    async def scenario():
+        queue = JobQueue(workers=1, runner=runner)
+        job = await queue.submit(ModelName.GPT_5, SingleModelChatRequest(question="Slow one"))
+        polls = await asyncio.gather(*(queue.wait(job.job_id, timeout=0.02) for _ in range(3)))
+        waiting = dict(queue._finished)
+        await queue.stop()
+        return polls, waiting
+
+    polls, waiting = asyncio.run(scenario())
+    assert [poll.status for poll in polls] == [JobStatus.RUNNING] * 3
+    assert waiting == {}
+
+# --- Test Cases for /jobs ---
+
+
+def test_submit_then_long_poll_for_the_result(monkeypatch):
+    monkeypatch.setattr(groq_service, "chat_with_model", fake_answer(delay=0.1))
+
+    async def scenario():
+        queue = JobQueue()
+        monkeypatch.setattr(main, "get_job_queue", lambda: queue)
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            submitted = await client.post("/chat/groq/llama-3.1-8b-instant/jobs", json={"question": "Slow?"})
+            job_id = submitted.json()["job_id"]
+            polled = await client.get(f"/jobs/{job_id}")
+            waited = await client.get(f"/jobs/{job_id}?wait=5&fields=answer")
+            missing = await client.get("/jobs/unknown")
+            stats = await client.get("/jobs/stats")
+        await queue.stop()
+        return submitted, polled, waited, missing, stats
+
+    submitted, polled, waited, missing, stats = asyncio.run(scenario())
+    assert submitted.status_code == 202 and submitted.json()["status"] == "queued"
+    assert polled.json()["status"] in ("queued", "running")
+    assert waited.json()["status"] == "completed"
+    assert waited.json()["response"] == {"answer": "answer to Slow?"}
+    assert missing.status_code == 404
+    assert stats.json()["jobs"]["completed"] == 1
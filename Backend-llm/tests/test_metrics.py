@@ -0,0 +1,73 @@
+# test_metrics.py
+import asyncio
+
+import httpx
+
+from api import main
+from api.services import chat_service, groq_service, openai_service
+from api.services.metrics import ChatMetrics, usage_tokens
+
+
+def sample(text: str, name: str, **labels) -> float:
+    """Reads one sample value from Prometheus exposition text."""
+    for line in text.splitlines():
+        series, _, value = line.rpartition(" ")
+        metric, _, label_text = series.partition("{")
+        found = dict(pair.split("=", 1) for pair in label_text.rstrip("}").split(",") if pair)
+        if metric == name and found == {key: f'"{value_}"' for key, value_ in labels.items()}:
+            return float(value)
+    raise AssertionError(f"{name} {labels} not found")
+
+# --- Test Cases for /metrics ---
+
+
+def test_metrics_endpoint_counts_requests_errors_and_tokens(monkeypatch):
+    async def fake_openai(model_name, messages, **kwargs):
+        return {"answer": "ok", "raw": None, "error": None,
+                "usage": {"prompt_tokens": 12, "completion_tokens": 5, "total_tokens": 17}}
+
+    async def limited_groq(model_name, messages, **kwargs):
+        return {"answer": None, "raw": None, "usage": None, "error": "429",
+                "status_code": 400, "error_type": "rate_limit"}  # 400 keeps the breaker closed
+
+    async def fake_stream(model_name, messages, **kwargs):
+        yield {"type": "delta", "delta": "Hi"}
+        yield {"type": "done", "answer": "Hi", "raw": None, "error": None,
+               "usage": {"prompt_tokens": 3, "completion_tokens": 1}}
+
+    metrics = ChatMetrics()
+    monkeypatch.setattr(chat_service, "get_metrics", lambda: metrics)
+    monkeypatch.setattr(main, "get_metrics", lambda: metrics)
+    monkeypatch.setattr(openai_service, "chat_with_model", fake_openai)
+    monkeypatch.setattr(openai_service, "stream_chat_with_model", fake_stream)
+    monkeypatch.setattr(groq_service, "chat_with_model", limited_groq)
+    monkeypatch.setattr(chat_service, "get_rate_limiter", lambda: None)  # No 429 retries
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            await client.post("/chat/openai/gpt-5", json={"question": "Metrics one"})
+            await client.post("/chat/openai/gpt-5", json={"question": "Metrics two"})
+            await client.post("/chat/openai/gpt-5/stream", json={"question": "Metrics stream"})
+            await client.post("/chat/groq/llama-3.1-8b-instant", json={"question": "Metrics error"})
+            return await client.get("/metrics")
+
+    response = asyncio.run(scenario())
+    assert response.headers["content-type"].startswith("text/plain")
+    text = response.text
+    gpt5 = {"provider": "openai", "model": "gpt-5"}
+    assert sample(text, "backend_llm_requests_total", **gpt5, cached="false") == 3
+    assert sample(text, "backend_llm_prompt_tokens_total", **gpt5) == 27
+    assert sample(text, "backend_llm_completion_tokens_total", **gpt5) == 11
+    assert sample(text, "backend_llm_request_latency_seconds_count", **gpt5) == 3
+    assert sample(text, "backend_llm_time_to_first_token_seconds_count", **gpt5) == 1
+    assert sample(text, "backend_llm_provider_call_latency_seconds_count", **gpt5) == 2
+    assert sample(text, "backend_llm_in_flight_requests", **gpt5) == 0
+    assert sample(text, "backend_llm_request_errors_total", provider="groq",
+                  model="llama-3.1-8b-instant", error_class="rate_limit") >= 1
+
+
+def test_usage_tokens_reads_every_provider_shape():
+    assert usage_tokens({"prompt_tokens": 3, "completion_tokens": 4}) == (3, 4)
+    assert usage_tokens({"prompt_token_count": 5, "candidates_token_count": 6}) == (5, 6)
+    assert usage_tokens(None) == (None, None)
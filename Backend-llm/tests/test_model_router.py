@@ -0,0 +1,87 @@
+# test_model_router.py
+import asyncio
+
+import httpx
+
+from api import main
+from api.pydantic_models import AutoModel, ModelName
+from api.services import chat_service, google_gemini_service, groq_service, openai_service
+from api.services.model_router import ModelRouter
+
+# --- Test Cases for ModelRouter ---
+
+
+def test_auto_tier_picks_lowest_recent_latency():
+    router = ModelRouter(tiers={"fast": ["gpt-nano", "llama-3.1-8b-instant"]}, min_samples=3, explore_rate=0)
+    for _ in range(3):
+        router.observe(ModelName.GPT_NANO, 0.8, failed=False)
+        router.observe(ModelName.LLAMA_3_1_8B_INSTANT, 0.3, failed=False)
+    assert router.choose(AutoModel.AUTO_FAST) == ModelName.LLAMA_3_1_8B_INSTANT
+    assert router.stats()["routed"] == {"auto-fast": {"llama-3.1-8b-instant": 1}}
+
+
+def test_error_rate_steers_traffic_away():
+    router = ModelRouter(tiers={"fast": ["gpt-nano", "llama-3.1-8b-instant"]}, min_samples=3, explore_rate=0)
+    for _ in range(4):
+        router.observe(ModelName.GPT_NANO, 0.5, failed=False)
+        router.observe(ModelName.LLAMA_3_1_8B_INSTANT, 0.3, failed=False)
+    for _ in range(4):
+        router.observe(ModelName.LLAMA_3_1_8B_INSTANT, 5.0, failed=True)
+    assert router.error_rate(ModelName.LLAMA_3_1_8B_INSTANT) == 0.5
+    assert router.choose(AutoModel.AUTO_FAST) == ModelName.GPT_NANO
+
+
+def test_streams_are_routed_on_time_to_first_token():
+    router = ModelRouter(tiers={"quality": ["gpt-5", "gemini-2.5-pro"]}, min_samples=2, explore_rate=0)
+    for _ in range(2):
+        router.observe(ModelName.GPT_5, 4.0, failed=False, time_to_first_token=0.4)
+        router.observe(ModelName.GEMINI_2_5_PRO, 3.0, failed=False, time_to_first_token=1.5)
+    assert router.choose(AutoModel.AUTO_QUALITY) == ModelName.GEMINI_2_5_PRO
+    assert router.choose(AutoModel.AUTO_QUALITY, streaming=True) == ModelName.GPT_5
+
+
+def test_unmeasured_models_are_tried_first():
+    router = ModelRouter(tiers={"fast": ["gpt-nano", "llama-3.1-8b-instant"]}, min_samples=1, explore_rate=0)
+    router.observe(ModelName.GPT_NANO, 0.1, failed=False)
+    assert router.choose(AutoModel.AUTO_FAST) == ModelName.LLAMA_3_1_8B_INSTANT
+    assert len(router.candidates(AutoModel.AUTO)) == len(ModelName)
+
+def test_always_failing_model_is_measured_and_avoided():
+    router = ModelRouter(tiers={"fast": ["gpt-nano", "llama-3.1-8b-instant"]}, min_samples=3, explore_rate=0)
+    for _ in range(3):
+        router.observe(ModelName.GPT_NANO, 0.05, failed=True)  # e.g. a 404 the breaker ignores
+        router.observe(ModelName.LLAMA_3_1_8B_INSTANT, 2.0, failed=False)
+    assert router.expected_latency(ModelName.GPT_NANO) == float("inf")
+    assert all(router.choose(AutoModel.AUTO_FAST) == ModelName.LLAMA_3_1_8B_INSTANT for _ in range(50))
+
+    for _ in range(3):
+        router.observe(ModelName.LLAMA_3_1_8B_INSTANT, 2.0, failed=True)
+    router.observe(ModelName.LLAMA_3_1_8B_INSTANT, 2.0, failed=True)
+    assert router.error_rate(ModelName.LLAMA_3_1_8B_INSTANT) > router.max_error_rate
+    assert router.choose(AutoModel.AUTO_FAST) == ModelName.LLAMA_3_1_8B_INSTANT  # Both failing: still ranked
+    assert router.stats()["models"]["gpt-nano"]["attempts"] == 3
+
+# --- Test Cases for /chat/auto ---
+
+
+def test_auto_endpoint_reports_chosen_model(monkeypatch):
+    async def fake_chat(model_name, messages, **kwargs):
+        return {"answer": f"from {model_name}", "raw": None, "usage": None, "error": None}
+
+    for service in (openai_service, google_gemini_service, groq_service):
+        monkeypatch.setattr(service, "chat_with_model", fake_chat)
+    router = ModelRouter(min_samples=1, explore_rate=0)
+    for model_name in router.tiers["quality"]:
+        router.observe(model_name, 0.2 if model_name == ModelName.GEMINI_2_5_PRO else 2.0, failed=False)
+    monkeypatch.setattr(chat_service, "get_model_router", lambda: router)
+
+    async def ask():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post("/chat/auto/auto-quality", json={"question": "Anyone fast?"})
+
+    body = asyncio.run(ask()).json()
+    assert body["model"] == "gemini-2.5-pro"
+    assert body["routed_from"] == "auto-quality"
+    assert body["answer"] == "from gemini-2.5-pro"
+    assert len(router.latencies.window("gemini-2.5-pro")) == 2  # The request itself was recorded
@@ -0,0 +1,115 @@
+# test_prompt_caching.py
+import asyncio
+import time
+
+from api.pydantic_models import ModelName
+from api.services import gemini_context_cache
+from api.services.chat_messages import SUMMARY_PREFIX
+from api.services.gemini_context_cache import CacheHandle, GeminiContextCache
+from api.services.google_gemini_service import to_gemini_contents
+from api.services.metrics import ChatMetrics, cached_prompt_tokens
+from api.services.openai_service import prompt_cache_key
+
+LONG_PROMPT = "You are TellMeMore, a patient tutor. " * 200
+
+
+class FakeCreator:
+    """Stands in for the cached-content API, counting creations."""
+
+    def __init__(self, fail=False, ttl_seconds=None):
+        self.created = []
+        self.fail = fail
+        self.ttl_seconds = ttl_seconds
+
+    def __call__(self, model_name, system_instruction, ttl_seconds):
+        time.sleep(0.05)  # Runs in a worker thread, like the real network call
+        if self.fail:
+            raise RuntimeError("Cached content is too small")
+        self.created.append(model_name)
+        ttl = self.ttl_seconds if self.ttl_seconds is not None else ttl_seconds
+        return CacheHandle(f"cachedContents/{len(self.created)}", f"model-{len(self.created)}",
+                           time.monotonic() + ttl)
+
+# --- Test Cases for Gemini message conversion ---
+
+
+def test_system_prompts_become_the_gemini_system_instruction():
+    messages = [
+        {"role": "system", "content": "Be brief."},
+        {"role": "system", "content": "Answer in English."},
+        {"role": "system", "content": SUMMARY_PREFIX + "Bob likes maps."},
+        {"role": "user", "content": "My name is Bob."},
+        {"role": "assistant", "content": "Hi Bob."},
+        {"role": "user", "content": "And now?"},
+    ]
+    instruction, contents = to_gemini_contents(messages)
+    assert instruction == "Be brief.\n\nAnswer in English."
+    assert [content["role"] for content in contents] == ["user", "user", "model", "user"]
+    assert contents[0]["parts"] == [SUMMARY_PREFIX + "Bob likes maps."]
+    assert to_gemini_contents([{"role": "user", "content": "Hi"}])[0] is None
+
+# --- Test Cases for GeminiContextCache ---
+
+
+def test_long_instructions_are_cached_once_and_reused():
+    creator = FakeCreator()
+    cache = GeminiContextCache(min_tokens=100, create=creator)
+
+    async def scenario():
+        concurrent = await asyncio.gather(*(cache.model("gemini-2.5-pro", LONG_PROMPT) for _ in range(5)))
+        return concurrent, await cache.model("gemini-2.5-pro", LONG_PROMPT), await cache.model(
+            "gemini-2.5-pro", "Be brief.")
+
+    concurrent, later, short = asyncio.run(scenario())
+    assert creator.created == ["gemini-2.5-pro"]
+    assert set(concurrent) == {later} == {"model-1"}
+    assert short is None  # Too short to cache; sent inline
+    assert cache.stats()["hits"] == 5
+
+
+def test_expiring_caches_are_recreated_and_failures_back_off():
+    expiring = FakeCreator(ttl_seconds=gemini_context_cache.REFRESH_MARGIN_SECONDS + 0.05)
+    cache = GeminiContextCache(min_tokens=100, create=expiring)
+
+    async def twice(cache):
+        first = await cache.model("gemini-2.5-flash", LONG_PROMPT)
+        await asyncio.sleep(0.1)
+        return first, await cache.model("gemini-2.5-flash", LONG_PROMPT)
+
+    assert asyncio.run(twice(cache)) == ("model-1", "model-2")
+
+    failing = FakeCreator(fail=True)
+    cache = GeminiContextCache(min_tokens=100, create=failing)
+    assert asyncio.run(twice(cache)) == (None, None)
+    assert cache.stats()["failures"] == 1  # Not retried within the backoff
+
+# --- Test Cases for OpenAI prompt cache keys and cached-token usage ---
+
+
+def test_prompt_cache_key_follows_the_system_prompts():
+    def messages(system, question):
+        return [{"role": "system", "content": prompt} for prompt in system] + [
+            {"role": "user", "content": question}]
+
+    key = prompt_cache_key(messages(["Be brief."], "Hi"))
+    assert key == prompt_cache_key(messages(["Be brief."], "Another question"))
+    assert key != prompt_cache_key(messages(["Be verbose."], "Hi"))
+    assert prompt_cache_key(messages([], "Hi")) is None
+
+
+def test_cached_prompt_tokens_are_counted_for_every_provider_shape():
+    openai_usage = {"prompt_tokens": 2000, "completion_tokens": 10,
+                    "prompt_tokens_details": {"cached_tokens": 1536}}
+    gemini_usage = {"prompt_token_count": 5000, "candidates_token_count": 10,
+                    "cached_content_token_count": 4096}
+    assert cached_prompt_tokens(openai_usage) == 1536
+    assert cached_prompt_tokens(gemini_usage) == 4096
+    assert cached_prompt_tokens({"prompt_tokens": 5, "prompt_tokens_details": None}) == 0
+
+    metrics = ChatMetrics()
+    metrics.observe_request(ModelName.GPT_5, {"answer": "ok", "usage": openai_usage}, 1.0)
+    metrics.observe_request(ModelName.GEMINI_2_5_PRO, {"answer": "ok", "usage": gemini_usage}, 1.0)
+    sample = metrics.registry.get_sample_value
+    assert sample("backend_llm_cached_prompt_tokens_total", {"provider": "openai", "model": "gpt-5"}) == 1536
+    assert sample("backend_llm_cached_prompt_tokens_total",
+                  {"provider": "google", "model": "gemini-2.5-pro"}) == 4096
@@ -0,0 +1,56 @@
+# test_provider_clients.py
+import asyncio
+import os
+import subprocess
+import sys
+
+from api.services import provider_clients
+from api.services.provider_clients import PoolSettings, ProviderClients
+
+
+def test_pool_settings_from_env(monkeypatch):
+    monkeypatch.setenv("GROQ_MAX_CONNECTIONS", "12")
+    monkeypatch.setenv("GROQ_TIMEOUT_SECONDS", "30")
+    settings = PoolSettings.from_env("groq")
+    assert settings.max_connections == 12
+    assert settings.timeout == 30.0
+    assert settings.max_keepalive_connections == PoolSettings().max_keepalive_connections
+
+
+def test_clients_are_reused_per_api_key():
+    clients = ProviderClients()
+    first = clients.openai_client("sk-one")
+    assert clients.openai_client("sk-one") is first
+    assert clients.openai_client("sk-two") is not first
+    assert clients.groq_client("gsk-one") is clients.groq_client("gsk-one")
+    asyncio.run(clients.aclose())
+
+
+def test_gemini_models_are_cached_and_configured_once(monkeypatch):
+    configured = []
+    monkeypatch.setattr(provider_clients.load_sdk("google"), "configure",
+                        lambda api_key: configured.append(api_key))
+    clients = ProviderClients()
+
+    model = clients.gemini_model("gemini-2.5-flash", "key-a")
+    assert clients.gemini_model("gemini-2.5-flash", "key-a") is model
+    assert clients.gemini_model("gemini-2.5-pro", "key-a") is not model
+    assert configured == ["key-a"]
+
+    clients.gemini_model("gemini-2.5-flash", "key-b")
+    assert configured == ["key-a", "key-b"]
+
+
+def test_importing_the_app_does_not_import_provider_sdks():
+    check = ("import sys, api.main; "
+             "print(sorted(m for m in ('openai', 'groq', 'google.generativeai') if m in sys.modules))")
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.run([sys.executable, "-c", check], cwd=backend_dir,
+                            capture_output=True, text=True, check=True).stdout
+    assert output.strip().splitlines()[-1] == "[]"
+
+
+def test_prewarm_imports_sdks_in_the_background():
+    asyncio.run(provider_clients.prewarm_sdks(["groq"]))
+    assert "groq" in provider_clients._sdks
+    assert provider_clients.load_sdk("groq") is sys.modules["groq"]
@@ -0,0 +1,176 @@
+# test_rate_limiter.py
+import asyncio
+
+import httpx
+
+from api import main
+from api.services import openai_service
+from api.services.provider_errors import RATE_LIMIT, parse_duration, parse_rate_limit_headers
+from api.services.rate_limiter import RateLimiter
+
+
+def ok(total_tokens=10, rate_limit=None):
+    return {"answer": "ok", "raw": None, "usage": {"total_tokens": total_tokens},
+            "error": None, "rate_limit": rate_limit}
+
+
+def rate_limited(retry_after=None):
+    return {"answer": None, "raw": None, "usage": None, "error": "429 Too Many Requests",
+            "status_code": 429, "error_type": RATE_LIMIT,
+            "rate_limit": {"retry_after_s": retry_after} if retry_after else None}
+
+# --- Test Cases for header parsing ---
+
+
+def test_rate_limit_headers_are_parsed():
+    assert parse_duration("6m0.5s") == 360.5
+    assert parse_duration("20ms") == 0.02
+    assert parse_duration("2") == 2.0
+    hints = parse_rate_limit_headers(httpx.Headers({
+        "x-ratelimit-remaining-requests": "0", "x-ratelimit-reset-requests": "1s"}))
+    assert hints["remaining_requests"] == 0 and hints["reset_requests_s"] == 1.0
+    assert parse_rate_limit_headers(httpx.Headers({"content-type": "application/json"})) is None
+
+# --- Test Cases for RateLimiter ---
+
+
+def test_excess_requests_queue_behind_the_concurrency_cap():
+    active = []
+    peak = []
+
+    async def provider():
+        active.append(1)
+        peak.append(len(active))
+        await asyncio.sleep(0.02)
+        active.pop()
+        return ok()
+
+    async def scenario():
+        limiter = RateLimiter({"openai": {"concurrency": 2}})
+        results = await asyncio.gather(*(limiter.call("openai", "gpt-5", provider) for _ in range(6)))
+        return limiter, results
+
+    limiter, results = asyncio.run(scenario())
+    assert all(result["error"] is None for result in results)
+    assert max(peak) == 2
+    stats = limiter.stats()["providers"]["openai"]
+    assert stats["requests"] == 6 and stats["queue_depth"] == 0 and stats["in_flight"] == 0
+    assert stats["models"]["gpt-5"]["queued_requests"] >= 4
+    assert stats["max_wait_ms"] > 0
+
+
+def test_429_backs_off_and_retries():
+    responses = [rate_limited(retry_after=0.05), ok()]
+
+    async def provider():
+        return responses.pop(0)
+
+    async def scenario():
+        limiter = RateLimiter()
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        result = await limiter.call("groq", "llama-3.1-8b-instant", provider)
+        return limiter, result, loop.time() - start
+
+    limiter, result, elapsed = asyncio.run(scenario())
+    assert result["answer"] == "ok"
+    assert elapsed >= 0.05
+    model_stats = limiter.stats()["providers"]["groq"]["models"]["llama-3.1-8b-instant"]
+    assert model_stats["rate_limited"] == 1 and model_stats["retries"] == 1
+
+
+def test_request_fails_only_when_capacity_is_beyond_the_deadline():
+    calls = []
+
+    async def provider():
+        calls.append(1)
+        return ok()
+
+    async def scenario():
+        limiter = RateLimiter({"gpt-5": {"rpm": 1}}, queue_timeout=0.1)
+        first = await limiter.call("openai", "gpt-5", provider)
+        second = await limiter.call("openai", "gpt-5", provider)
+        return limiter, first, second
+
+    limiter, first, second = asyncio.run(scenario())
+    assert first["error"] is None
+    assert second["error_type"] == RATE_LIMIT and "rate limited" in second["error"]
+    assert len(calls) == 1
+    assert limiter.stats()["providers"]["openai"]["rejected"] == 1
+
+
+def test_models_of_one_provider_share_its_budget():
+    calls = []
+
+    async def provider():
+        calls.append(1)
+        return ok()
+
+    async def scenario():
+        limiter = RateLimiter({"openai": {"rpm": 2}, "gpt-5": {"rpm": 10}}, queue_timeout=0.1)
+        results = [await limiter.call("openai", model, provider) for model in ("gpt-5", "gpt-5-mini", "gpt-nano")]
+        other_provider = await limiter.call("groq", "llama-3.1-8b-instant", provider)
+        return limiter, results, other_provider
+
+    limiter, results, other_provider = asyncio.run(scenario())
+    assert [result["error"] is None for result in results] == [True, True, False]
+    assert other_provider["error"] is None
+    assert len(calls) == 3
+    stats = limiter.stats()["providers"]["openai"]
+    assert stats["rpm"] == 2 and stats["rejected"] == 1
+    assert stats["models"]["gpt-5"]["rpm"] == 10 and stats["models"]["gpt-nano"]["rpm"] is None
+
+
+def test_exhausted_headers_block_the_model_until_reset():
+    async def scenario():
+        limiter = RateLimiter()
+        exhausted = {"remaining_requests": 0, "reset_requests_s": 0.05}
+        await limiter.call("openai", "gpt-5-mini", lambda: asyncio.sleep(0, ok(rate_limit=exhausted)))
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        await limiter.call("openai", "gpt-5-mini", lambda: asyncio.sleep(0, ok()))
+        return loop.time() - start
+
+    assert asyncio.run(scenario()) >= 0.04
+
+
+def test_streams_hold_a_slot_and_retry_only_before_text():
+    attempts = []
+
+    async def provider_stream():
+        attempts.append(1)
+        if len(attempts) == 1:
+            yield {"type": "done", **rate_limited(retry_after=0.01)}
+            return
+        yield {"type": "delta", "delta": "Hi"}
+        yield {"type": "done", **ok()}
+
+    async def scenario():
+        limiter = RateLimiter()
+        events = [event async for event in limiter.stream("openai", "gpt-5", provider_stream)]
+        return limiter, events
+
+    limiter, events = asyncio.run(scenario())
+    assert [event["type"] for event in events] == ["delta", "done"]
+    assert events[-1]["error"] is None
+    assert len(attempts) == 2
+    assert limiter.stats()["providers"]["openai"]["in_flight"] == 0
+
+# --- Test Cases for /rate_limits ---
+
+
+def test_rate_limit_stats_endpoint(monkeypatch):
+    async def fake_chat(model_name, messages, **kwargs):
+        return ok()
+
+    monkeypatch.setattr(openai_service, "chat_with_model", fake_chat)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            await client.post("/chat/openai/gpt-nano", json={"question": "Rate limit stats?"})
+            return (await client.get("/rate_limits")).json()
+
+    stats = asyncio.run(scenario())
+    assert stats["enabled"] is True
+    assert stats["providers"]["openai"]["models"]["gpt-nano"]["requests"] >= 1
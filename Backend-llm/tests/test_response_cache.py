@@ -0,0 +1,141 @@
+# test_response_cache.py
+import asyncio
+
+import httpx
+import pytest
+
+from api import main
+from api.services import response_cache, groq_service
+from api.services.response_cache import ResponseCache, canonical_request_key
+
+
+def result(answer: str):
+    return {"answer": answer, "raw": None, "usage": {"total_tokens": 5}, "error": None}
+
+
+def lookup(cache: ResponseCache, key: str):
+    return asyncio.run(cache.get(key))
+
+# --- Test Cases for canonical_request_key ---
+
+
+def test_key_is_stable_and_sensitive_to_every_input():
+    history = [{"role": "user", "content": "Hi"}]
+    base = canonical_request_key("gpt-5", ["Be brief."], history, "Q?", {"temperature": 0})
+    assert base == canonical_request_key("gpt-5", ["Be brief."], history, "Q?", {"temperature": 0})
+    assert base != canonical_request_key("gpt-5-mini", ["Be brief."], history, "Q?", {"temperature": 0})
+    assert base != canonical_request_key("gpt-5", ["Be verbose."], history, "Q?", {"temperature": 0})
+    assert base != canonical_request_key("gpt-5", ["Be brief."], [], "Q?", {"temperature": 0})
+    assert base != canonical_request_key("gpt-5", ["Be brief."], history, "Q!", {"temperature": 0})
+    assert base != canonical_request_key("gpt-5", ["Be brief."], history, "Q?", {"temperature": 1})
+
+# --- Test Cases for ResponseCache ---
+
+
+def test_hit_miss_counters_and_errors_not_cached():
+    cache = ResponseCache()
+    assert lookup(cache, "k") is None
+    cache.set("k", result("Paris"))
+    cache.set("bad", {"answer": None, "error": "boom"})
+    assert lookup(cache, "k")["answer"] == "Paris"
+    assert lookup(cache, "bad") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 2
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(response_cache.time, "time", lambda: now[0])
+    cache = ResponseCache(ttl_seconds=10)
+    cache.set("k", result("Paris"))
+    now[0] += 11
+    assert lookup(cache, "k") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_lru_eviction_respects_byte_budget():
+    entry_size = len(response_cache.json.dumps(
+        {"answer": "a", "raw": None, "usage": {"total_tokens": 5}}))
+    cache = ResponseCache(max_bytes=entry_size * 2)
+    cache.set("a", result("a"))
+    cache.set("b", result("b"))
+    lookup(cache, "a")  # "b" is now least recently used
+    cache.set("c", result("c"))
+    assert lookup(cache, "b") is None
+    assert lookup(cache, "a") is not None and lookup(cache, "c") is not None
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["bytes"] <= cache.max_bytes
+
+
+def test_byte_budget_counts_utf8_bytes():
+    cache = ResponseCache()
+    cache.set("k", result("日本"))
+    value = response_cache.json.dumps({"answer": "日本", "raw": None, "usage": {"total_tokens": 5}},
+                                       ensure_ascii=False)
+    assert cache.stats()["bytes"] == len(value.encode("utf-8")) > len(value)
+
+
+def test_disk_tier_survives_restart(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    first = ResponseCache(disk_path=path)
+    first.set("k", result("Paris"))
+    first.close()
+
+    second = ResponseCache(disk_path=path)
+    assert lookup(second, "k")["answer"] == "Paris"
+    second.close()
+
+def test_oversize_entries_are_not_cached_in_either_tier(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    cache = ResponseCache(max_bytes=100, disk_path=path)
+    cache.set("big", result("x" * 200))
+    cache.set("small", result("y"))
+    assert lookup(cache, "big") is None
+    assert lookup(cache, "small")["answer"] == "y"
+    cache.close()
+
+    # A row written to disk under a larger budget is served without being promoted
+    larger = ResponseCache(disk_path=path)
+    larger.set("big", result("x" * 200))
+    larger.close()
+    smaller = ResponseCache(max_bytes=100, disk_path=path)
+    assert lookup(smaller, "big")["answer"] == "x" * 200
+    assert smaller.stats()["entries"] == 0
+    smaller.close()
+
+# --- Test Cases for cached chat responses ---
+
+
+@pytest.fixture
+def enabled_cache(monkeypatch):
+    cache = ResponseCache()
+    monkeypatch.setattr(response_cache, "_response_cache", cache)
+    return cache
+
+
+def test_identical_requests_are_served_from_cache(monkeypatch, enabled_cache):
+    calls = []
+
+    async def fake_chat(model_name, messages, **kwargs):
+        calls.append(model_name)
+        await asyncio.sleep(0.05)
+        return result("Paris.")
+
+    monkeypatch.setattr(groq_service, "chat_with_model", fake_chat)
+
+    async def ask_twice():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            body = {"question": "Capital of France?", "system_prompts": ["Be brief."]}
+            first = await client.post("/chat/groq/llama-3.1-8b-instant", json=body)
+            second = await client.post("/chat/groq/llama-3.1-8b-instant", json=body)
+            stats = await client.get("/cache/stats")
+            return first.json(), second.json(), stats.json()
+
+    first, second, stats = asyncio.run(ask_twice())
+    assert calls == ["llama-3.1-8b-instant"]
+    assert first["cached"] is False
+    assert second["cached"] is True
+    assert second["answer"] == "Paris."
+    assert second["latency_ms"] < 5
+    assert stats["hits"] == 1 and stats["misses"] == 1
@@ -0,0 +1,109 @@
+# test_session_store.py
+import asyncio
+
+import httpx
+import pytest
+
+from api import main
+from api.pydantic_models import ChatMessageAPI
+from api.services import chat_service, openai_service
+from api.services.session_store import SessionStore, StaleHistoryError, history_version
+
+
+class RecordingProvider:
+    """Answers every question and records the messages each call was sent."""
+
+    def __init__(self):
+        self.messages = []
+
+    async def chat_with_model(self, model_name, messages, **kwargs):
+        self.messages.append(messages)
+        return {"answer": f"Answer {len(self.messages)}", "raw": None, "usage": None, "error": None}
+
+
+def use_session_store(monkeypatch, store: SessionStore) -> RecordingProvider:
+    provider = RecordingProvider()
+    monkeypatch.setattr(openai_service, "chat_with_model", provider.chat_with_model)
+    monkeypatch.setattr(chat_service, "get_session_store", lambda: store)
+    monkeypatch.setattr(main, "get_session_store", lambda: store)
+    monkeypatch.setattr(chat_service, "get_response_cache", lambda: None)
+    return provider
+
+
+async def ask(*bodies) -> list:
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return [await client.post("/chat/openai/gpt-5", json=body) for body in bodies]
+
+# --- Test Cases for History Versions ---
+
+
+def test_history_version_identifies_the_history():
+    history = [ChatMessageAPI(role="user", content="Hi"), ChatMessageAPI(role="assistant", content="Hello")]
+    assert history_version(history) == history_version([message.model_copy() for message in history])
+    assert history_version(history) != history_version(history[:1])
+    assert history_version(history) != history_version(
+        [ChatMessageAPI(role="assistant", content="Hi"), ChatMessageAPI(role="user", content="Hello")])
+
+# --- Test Cases for Session Turns ---
+
+
+def test_follow_up_sends_only_the_version(monkeypatch):
+    provider = use_session_store(monkeypatch, SessionStore())
+
+    async def conversation():
+        first, = await ask({"question": "My name is Ada.", "session_id": "s1"})
+        second, = await ask({"question": "What is my name?", "session_id": "s1",
+                             "history_version": first.json()["history_version"]})
+        return first.json(), second.json()
+
+    first, second = asyncio.run(conversation())
+    assert first["history_version"] and second["history_version"] != first["history_version"]
+    assert [(m["role"], m["content"]) for m in provider.messages[1]] == [
+        ("user", "My name is Ada."), ("assistant", "Answer 1"), ("user", "What is my name?")]
+
+
+def test_stale_version_answers_409_and_a_full_resend_resyncs(monkeypatch):
+    store = SessionStore()
+    provider = use_session_store(monkeypatch, store)
+    history = [{"role": "user", "content": "My name is Ada."}, {"role": "assistant", "content": "Hi Ada."}]
+
+    stale, resync = asyncio.run(ask(
+        {"question": "What is my name?", "session_id": "s2", "history_version": "unknown"},
+        {"question": "What is my name?", "session_id": "s2", "chat_history": history}))
+    assert stale.status_code == 409
+    assert stale.json()["history_version"] is None
+    assert len(provider.messages) == 1  # Only the resync reached the provider
+    stored = store.history("s2", resync.json()["history_version"])
+    assert [m.content for m in stored] == ["My name is Ada.", "Hi Ada.", "What is my name?", "Answer 1"]
+    assert store.stats()["misses"] == 1 and store.stats()["resyncs"] == 1
+
+
+def test_concurrent_turns_on_one_version_keep_the_first(monkeypatch):
+    store = SessionStore()
+    version = store.append_turn("s3", [], "Hi", "Hello")
+    history = store.history("s3", version)
+    assert store.append_turn("s3", history, "A", "1", base_version=version)
+    assert store.append_turn("s3", history, "B", "2", base_version=version) is None
+    assert store.stats()["conflicts"] == 1
+    with pytest.raises(StaleHistoryError) as stale:
+        store.history("s3", version)
+    assert stale.value.current_version not in (None, version)
+
+
+def test_disk_tier_survives_a_restart(tmp_path):
+    path = str(tmp_path / "sessions.sqlite3")
+    store = SessionStore(disk_path=path)
+    version = store.append_turn("s4", [], "Hi", "Hello")
+    store.close()
+
+    restarted = SessionStore(disk_path=path)
+    assert [m.content for m in restarted.history("s4", version)] == ["Hi", "Hello"]
+    restarted.close()
+
+    expired = SessionStore(ttl_seconds=-1, disk_path=path)
+    version = expired.append_turn("s5", [], "Hi", "Hello")
+    expired.close()
+    with pytest.raises(StaleHistoryError) as stale:
+        SessionStore(disk_path=path).history("s5", version)
+    assert stale.value.current_version is None
@@ -0,0 +1,114 @@
+# test_similar_question_cache.py
+import asyncio
+
+import httpx
+import pytest
+
+from api import main
+from api.services import groq_service, similar_question_cache
+from api.services.similar_question_cache import SimilarQuestionCache, normalize_question, question_key
+
+
+def result(answer: str):
+    return {"answer": answer, "raw": None, "usage": {"total_tokens": 5}, "error": None}
+
+# --- Test Cases for normalize_question ---
+
+
+def test_normalization_ignores_case_punctuation_and_contractions():
+    assert normalize_question("what's the capital of france") == "what is the capital of france"
+    assert normalize_question("  What is the CAPITAL of France?! ") == "what is the capital of france"
+    assert normalize_question("Why don’t cats swim?") == "why do not cats swim"
+    assert normalize_question("What is 2.5+2?") == "what is 2.5 + 2"
+
+# --- Test Cases for SimilarQuestionCache ---
+
+
+def test_near_duplicates_hit_and_different_questions_miss():
+    cache = SimilarQuestionCache()
+    cache.set("scope", "What is the capital of France?", result("Paris."))
+    cache.set("scope", "How do I reset my password?", result("Use the reset link."))
+
+    assert cache.get("scope", "what's the capital of france")["answer"] == "Paris."
+    assert cache.get("scope", "How do I reset my password")["answer"] == "Use the reset link."
+    assert cache.get("scope", "What is the capital of Spain?") is None
+    assert cache.get("scope", "How do I reset my username?") is None
+    assert cache.get("other scope", "What is the capital of France?") is None
+    assert cache.stats()["hits"] == 2 and cache.stats()["misses"] == 3
+
+
+@pytest.mark.parametrize("cached, asked", [
+    ("Is it safe to eat raw eggs?", "Is it unsafe to eat raw eggs?"),
+    ("Is it safe to eat raw eggs?", "Is it not safe to eat raw eggs?"),
+    ("How do I sort a list in ascending order?", "How do I sort a list in descending order?"),
+    ("How do I convert a string to an int?", "How do I convert an int to a string?"),
+    ("What is the difference between a list and a tuple?", "What is the difference between a tuple and a list?"),
+    ("What is 2 + 2?", "What is 2 + 3?"),
+    ("What is my name?", "What is your name?"),
+    ("Who was the president of France?", "Who is the president of France?"),
+    ("Can I mix bleach and ammonia?", "Should I mix bleach and ammonia?"),
+    ("Did it rain?", "Will it rain?"),
+    ("How do I reset my password?", "How can I reset my password?"),
+])
+def test_questions_with_different_meanings_miss(cached, asked):
+    cache = SimilarQuestionCache()
+    cache.set("scope", cached, result("Cached."))
+    assert cache.get("scope", asked) is None
+
+
+def test_numbers_and_operators_are_content_words():
+    cache = SimilarQuestionCache()
+    cache.set("scope", "What is 2 + 2?", result("4"))
+    assert question_key("What is 2+2?") == "what is 2 + 2"
+    assert cache.get("scope", "what's 2+2")["answer"] == "4"
+
+
+def test_expiry_and_eviction(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(similar_question_cache.time, "time", lambda: now[0])
+    cache = SimilarQuestionCache(ttl_seconds=10, max_entries=2)
+    cache.set("scope", "Who wrote Hamlet?", result("Shakespeare."))
+    cache.set("scope", "Who painted the Mona Lisa?", result("Leonardo."))
+    cache.set("scope", "Who discovered penicillin?", result("Fleming."))
+    assert cache.get("scope", "Who wrote Hamlet?") is None  # Least recently used
+    assert cache.stats()["evictions"] == 1
+    now[0] += 11
+    assert cache.get("scope", "Who discovered penicillin?") is None
+    assert cache.stats()["entries"] == 1
+
+# --- Test Cases for near-duplicate chat requests ---
+
+
+@pytest.fixture
+def enabled_cache(monkeypatch):
+    cache = SimilarQuestionCache()
+    monkeypatch.setattr(similar_question_cache, "_similar_question_cache", cache)
+    return cache
+
+
+def test_rephrased_requests_are_served_from_cache(monkeypatch, enabled_cache):
+    calls = []
+
+    async def fake_chat(model_name, messages, **kwargs):
+        calls.append(model_name)
+        return result("Paris.")
+
+    monkeypatch.setattr(groq_service, "chat_with_model", fake_chat)
+
+    async def ask():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            first = await client.post("/chat/groq/llama-3.1-8b-instant", json={
+                "question": "What is the capital of France?", "system_prompts": ["Be brief."]})
+            second = await client.post("/chat/groq/llama-3.1-8b-instant", json={
+                "question": "what's the capital of france", "system_prompts": ["Be brief."]})
+            other_prompt = await client.post("/chat/groq/llama-3.1-8b-instant", json={
+                "question": "what's the capital of france", "system_prompts": ["Be verbose."]})
+            stats = await client.get("/cache/stats")
+            return first.json(), second.json(), other_prompt.json(), stats.json()
+
+    first, second, other_prompt, stats = asyncio.run(ask())
+    assert len(calls) == 2  # The rephrased question did not reach the provider
+    assert first["cached"] is False and other_prompt["cached"] is False
+    assert second["cached"] is True and second["answer"] == "Paris."
+    assert stats["similar_questions"]["hits"] == 1
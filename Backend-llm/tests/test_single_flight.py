@@ -0,0 +1,128 @@
+# test_single_flight.py
+import asyncio
+
+import httpx
+
+from api import main
+from api.services import openai_service, groq_service
+from api.services.single_flight import SingleFlight
+
+# --- Test Cases for SingleFlight.run ---
+
+
+def test_concurrent_calls_share_one_upstream_call():
+    calls = []
+
+    async def upstream():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {"answer": "Paris."}
+
+    async def scenario():
+        flight = SingleFlight()
+        results = await asyncio.gather(*(flight.run("k", upstream) for _ in range(10)))
+        return flight, results
+
+    flight, results = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert all(result == {"answer": "Paris."} for result in results)
+    assert flight.stats() == {"leaders": 1, "coalesced": 9, "in_flight": 0}
+
+
+def test_cancelled_waiter_does_not_cancel_others():
+    async def upstream():
+        await asyncio.sleep(0.1)
+        return "done"
+
+    async def scenario():
+        flight = SingleFlight()
+        leader = asyncio.create_task(flight.run("k", upstream))
+        follower = asyncio.create_task(flight.run("k", upstream))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        return await follower
+
+    assert asyncio.run(scenario()) == "done"
+
+
+def test_upstream_cancelled_when_every_waiter_leaves():
+    cancelled = []
+
+    async def upstream():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    async def scenario():
+        flight = SingleFlight()
+        waiters = [asyncio.create_task(flight.run("k", upstream)) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        for waiter in waiters:
+            waiter.cancel()
+        await asyncio.sleep(0.01)
+
+    asyncio.run(scenario())
+    assert cancelled == [True]
+
+# --- Test Cases for SingleFlight.stream ---
+
+
+def test_stream_fans_out_to_late_subscribers():
+    opened = []
+
+    async def upstream():
+        opened.append(1)
+        for word in ["a", "b", "c"]:
+            await asyncio.sleep(0.02)
+            yield word
+
+    async def collect(flight, delay):
+        await asyncio.sleep(delay)
+        return [event async for event in flight.stream("k", upstream)]
+
+    async def scenario():
+        flight = SingleFlight()
+        return await asyncio.gather(collect(flight, 0), collect(flight, 0.03))
+
+    first, late = asyncio.run(scenario())
+    assert len(opened) == 1
+    assert first == late == ["a", "b", "c"]
+
+# --- Test Cases for coalesced chat requests ---
+
+
+def test_identical_chat_requests_make_one_provider_call(monkeypatch):
+    calls = []
+
+    async def fake_chat(model_name, messages, **kwargs):
+        calls.append(model_name)
+        await asyncio.sleep(0.1)
+        return {"answer": "Paris.", "raw": None, "usage": None, "error": None}
+
+    async def fake_stream(model_name, messages, **kwargs):
+        calls.append(model_name)
+        await asyncio.sleep(0.05)
+        yield {"type": "delta", "delta": "Paris."}
+        yield {"type": "done", "answer": "Paris.", "raw": None, "usage": None, "error": None}
+
+    monkeypatch.setattr(openai_service, "chat_with_model", fake_chat)
+    monkeypatch.setattr(groq_service, "stream_chat_with_model", fake_stream)
+
+    async def burst(path):
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.gather(*(
+                client.post(path, json={"question": "Capital of France?", "session_id": f"s{i}"})
+                for i in range(10)
+            ))
+
+    responses = asyncio.run(burst("/chat/openai/gpt-5-mini"))
+    assert calls == ["gpt-5-mini"]
+    assert {r.json()["session_id"] for r in responses} == {f"s{i}" for i in range(10)}
+    assert all(r.json()["answer"] == "Paris." for r in responses)
+
+    streams = asyncio.run(burst("/chat/groq/llama-3.1-8b-instant/stream"))
+    assert calls == ["gpt-5-mini", "llama-3.1-8b-instant"]
+    assert all("Paris." in r.text for r in streams)
@@ -167,6 +167,7 @@ export async function POST(request: NextRequest): Promise<NextResponse<ChatRespo
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
+          'X-User-Id': userId, // Backend-llm queues requests fairly per user
         },
         body: JSON.stringify(llmPayload),
       }